@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark: every monitor as its own process vs the single agent.
+Starts each enabled plugin's backend on its own port, then the agent with
+the same plugins, waits for each to serve /openapi.json, lets them settle
+and compares RSS and PSS. Without KUBECONFIG (or a cluster) a placeholder
+kubeconfig pointing at an unreachable server is used: the clients are
+built, the watches just fail and retry.
+
+Usage (repo root): python agent/bench_rss.py [--settle 5] [--plugins memory,storage]
+"""
+from pathlib import Path
+from typing import Dict, List
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from nanoidp import procfs  # noqa: E402
+
+PLACEHOLDER_KUBECONFIG = """apiVersion: v1
+kind: Config
+clusters:
+- cluster: {server: "http://127.0.0.1:1"}
+  name: bench
+contexts:
+- context: {cluster: bench, user: bench}
+  name: bench
+current-context: bench
+users:
+- name: bench
+  user: {token: bench}
+"""
+
+# Import directory and uvicorn target of each standalone backend
+# (the same directories as main.PLUGINS, which this script must not import)
+STANDALONE = {
+    "memory": ("lesson2/module_02/backend", "main:app"),
+    "cni": ("lesson4/nano-idp-lesson04/cni-monitor/backend", "main:app"),
+    "kernel": ("lesson5/nano-idp/kernel-monitor/src", "main:app"),
+    "cgroup": ("lesson6/nano-idp-lesson06/monitor/backend", "main:app"),
+    "storage": ("lesson8/nano-idp-lesson8/backend", "main:app"),
+    "priority": ("lesson9/nano-idp/lesson-09-priorityclasses/backend", "app.main:app"),
+}
+
+
+def memory_kb(pid: int) -> Dict[str, int]:
+    rollup = procfs.parse_keyed(procfs.read_once(f"/proc/{pid}/smaps_rollup"), ["Rss", "Pss"])
+    return {"rss_kb": rollup.get("Rss", 0), "pss_kb": rollup.get("Pss", 0)}
+
+
+def start(cwd: Path, target: str, port: int, env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", target, "--port", str(port), "--log-level", "warning"],
+        cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_ready(port: int, proc: subprocess.Popen, timeout_s: float = 60) -> None:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"process on port {port} exited with {proc.returncode}")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/openapi.json", timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"port {port} not ready after {timeout_s}s")
+
+
+def stop(procs: List[subprocess.Popen]) -> None:
+    for proc in procs:
+        proc.terminate()
+    for proc in procs:
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--plugins", default=",".join(STANDALONE), help="comma-separated plugin names")
+    parser.add_argument("--settle", type=float, default=5.0, help="seconds to run before measuring")
+    parser.add_argument("--port", type=int, default=18100, help="first port to use")
+    args = parser.parse_args()
+    names = [n for n in args.plugins.split(",") if n]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, PYTHONPATH=str(ROOT), AGENT_PLUGINS=",".join(names))
+        if "KUBECONFIG" not in env and not (Path.home() / ".kube" / "config").exists():
+            kubeconfig = Path(tmp) / "config"
+            kubeconfig.write_text(PLACEHOLDER_KUBECONFIG)
+            env["KUBECONFIG"] = str(kubeconfig)
+
+        print(f"{'process':<16} {'RSS MB':>8} {'PSS MB':>8}")
+        procs = []
+        try:
+            for i, name in enumerate(names):
+                proc = start(ROOT / STANDALONE[name][0], STANDALONE[name][1], args.port + i, env)
+                procs.append(proc)
+                wait_ready(args.port + i, proc)
+            time.sleep(args.settle)
+            separate = {"rss_kb": 0, "pss_kb": 0}
+            for name, proc in zip(names, procs):
+                mem = memory_kb(proc.pid)
+                separate = {k: separate[k] + mem[k] for k in separate}
+                print(f"{name:<16} {mem['rss_kb'] / 1024:>8.1f} {mem['pss_kb'] / 1024:>8.1f}")
+        finally:
+            stop(procs)
+        print(f"{'sum (separate)':<16} {separate['rss_kb'] / 1024:>8.1f} {separate['pss_kb'] / 1024:>8.1f}")
+
+        proc = start(ROOT / "agent", "main:app", args.port, env)
+        try:
+            wait_ready(args.port, proc)
+            time.sleep(args.settle)
+            agent = memory_kb(proc.pid)
+        finally:
+            stop([proc])
+        print(f"{'agent':<16} {agent['rss_kb'] / 1024:>8.1f} {agent['pss_kb'] / 1024:>8.1f}")
+        print(f"saved: {(separate['rss_kb'] - agent['rss_kb']) / 1024:.1f} MB RSS, "
+              f"{(separate['pss_kb'] - agent['pss_kb']) / 1024:.1f} MB PSS "
+              f"({1 - agent['rss_kb'] / separate['rss_kb']:.0%} of RSS)")
+
+
+if __name__ == "__main__":
+    main()
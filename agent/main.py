@@ -0,0 +1,189 @@
+"""
+Nano-IDP Agent
+Hosts the lesson monitors as plugins in one process: one interpreter, one
+event loop, one Kubernetes client and one sampling scheduler, instead of
+a pod per monitor.
+
+Each plugin's FastAPI app is mounted unchanged under /<plugin>, e.g. the
+storage monitor's /api/storage/volumes becomes /storage/api/storage/volumes.
+AGENT_PLUGINS selects the plugins to load (comma-separated, default: all).
+"""
+from contextlib import AsyncExitStack, asynccontextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
+import importlib.util
+import logging
+import os
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parents[1]
+
+try:
+    from nanoidp import kube, procfs, scheduler, telemetry
+except ImportError:  # running from a checkout: shared library lives at the repo root
+    sys.path.append(str(ROOT))
+    from nanoidp import kube, procfs, scheduler, telemetry
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# name -> (import directory, module file); the import directory goes on
+# sys.path for the plugin's own sibling imports (lesson8) or package (lesson9)
+PLUGINS: Dict[str, tuple] = {
+    "memory": ("lesson2/module_02/backend", "main.py"),
+    "cni": ("lesson4/nano-idp-lesson04/cni-monitor/backend", "main.py"),
+    "kernel": ("lesson5/nano-idp/kernel-monitor/src", "main.py"),
+    "cgroup": ("lesson6/nano-idp-lesson06/monitor/backend", "main.py"),
+    "storage": ("lesson8/nano-idp-lesson8/backend", "main.py"),
+    "priority": ("lesson9/nano-idp/lesson-09-priorityclasses/backend", "app/main.py"),
+}
+
+# Where the plugin sources live; the image copies them to /app/plugins
+PLUGIN_ROOT = Path(os.getenv("AGENT_PLUGIN_ROOT", str(ROOT)))
+
+
+def rss_kb() -> int:
+    return procfs.parse_keyed(procfs.read_once("/proc/self/status"), ["VmRSS"]).get("VmRSS", 0)
+
+
+class Plugin:
+    """
+    One monitor app and what loading it cost. Mounted in place of the app:
+    requests reach the app once its startup has run, and answer 503 if the
+    plugin failed to load or start.
+    """
+
+    def __init__(self, name: str, directory: Path, module_file: str):
+        self.name = name
+        self.directory = directory
+        self.module_file = module_file
+        self.app: Optional[FastAPI] = None
+        self.error: Optional[str] = None
+        self.started = False
+        self.import_ms = 0.0
+        self.rss_delta_kb = 0
+
+    def load(self) -> None:
+        """Import the plugin's module; failures are recorded, not raised."""
+        before, start = rss_kb(), time.perf_counter()
+        try:
+            if str(self.directory) not in sys.path:
+                sys.path.append(str(self.directory))
+            # Every monitor is a main.py: give each a unique module name
+            spec = importlib.util.spec_from_file_location(
+                f"nanoidp_plugin_{self.name}", self.directory / self.module_file)
+            module = importlib.util.module_from_spec(spec)
+            sys.modules[spec.name] = module
+            spec.loader.exec_module(module)
+            self.app = module.app
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            logger.error(f"Plugin {self.name} failed to load: {self.error}")
+        finally:
+            self.import_ms = round((time.perf_counter() - start) * 1000, 1)
+            self.rss_delta_kb = rss_kb() - before
+
+    async def start(self, stack: AsyncExitStack) -> None:
+        """Run the app's startup on the agent's stack; failures are recorded, not raised."""
+        try:
+            await stack.enter_async_context(self.app.router.lifespan_context(self.app))
+            self.started = True
+        except Exception as e:
+            self.error = f"startup: {type(e).__name__}: {e}"
+            logger.error(f"Plugin {self.name} failed to start: {self.error}")
+
+    async def __call__(self, scope, receive, send) -> None:
+        if self.started or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        detail = f"Plugin '{self.name}' is not running: {self.error or 'starting'}"
+        await JSONResponse({"detail": detail}, status_code=503)(scope, receive, send)
+
+    def status(self) -> Dict:
+        return {
+            "name": self.name,
+            "prefix": f"/{self.name}",
+            "loaded": self.app is not None,
+            "started": self.started,
+            "error": self.error,
+            "import_ms": self.import_ms,
+            "rss_delta_kb": self.rss_delta_kb,
+        }
+
+
+def enabled_plugins() -> List[str]:
+    names = [n.strip() for n in os.getenv("AGENT_PLUGINS", ",".join(PLUGINS)).split(",") if n.strip()]
+    unknown = [n for n in names if n not in PLUGINS]
+    if unknown:
+        raise SystemExit(f"Unknown plugin(s) {unknown}; available: {list(PLUGINS)}")
+    return names
+
+
+baseline_rss_kb = rss_kb()
+plugins: List[Plugin] = []
+for plugin_name in enabled_plugins():
+    directory, module_file = PLUGINS[plugin_name]
+    plugin = Plugin(plugin_name, PLUGIN_ROOT / directory, module_file)
+    plugin.load()
+    plugins.append(plugin)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Mounted apps do not get lifespan events of their own: run each plugin's
+    # startup/shutdown inside the agent's, with the shared scheduler held
+    # open until every plugin has stopped. A plugin whose startup raises (no
+    # kubeconfig, say) is marked failed; the others start regardless
+    sampling = scheduler.default()
+    sampling.start()
+    async with AsyncExitStack() as stack:
+        for plugin in plugins:
+            if plugin.app is not None:
+                await plugin.start(stack)
+        yield
+    await sampling.stop()
+    await kube.close()
+
+app = FastAPI(title="Nano-IDP Agent", version="1.0.0", lifespan=lifespan)
+
+# Process-wide /metrics and /debug/runtime against the DaemonSet's memory
+# request; routes are labelled with their plugin prefix. Each plugin keeps its
+# own /<plugin>/metrics for its routes.
+telemetry.install(app, "nano-idp-agent", memory_budget_mb=128)
+
+
+@app.get("/health")
+async def health():
+    failed = [p.name for p in plugins if not p.started]
+    return {"status": "degraded" if failed else "healthy", "service": "nano-idp-agent", "failed": failed}
+
+
+@app.get("/api/agent/status")
+async def agent_status():
+    """Loaded plugins, their import cost, scheduler jobs and process memory."""
+    return {
+        "plugins": [p.status() for p in plugins],
+        "sampling": scheduler.default().stats(),
+        "memory": {"baseline_rss_kb": baseline_rss_kb, "rss_kb": rss_kb()},
+    }
+
+
+@app.get("/api/agent/plugins/{name}")
+async def plugin_status(name: str):
+    for plugin in plugins:
+        if plugin.name == name:
+            return plugin.status()
+    raise HTTPException(status_code=404, detail=f"Plugin '{name}' is not enabled")
+
+
+for plugin in plugins:
+    if plugin.app is not None:
+        app.mount(f"/{plugin.name}", plugin)
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORT", "8000")), log_level="info")
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Cost of one aggregator refresh as the cluster grows and churns.
+
+A child process serves N fake node agents (kernel and cgroup snapshot
+endpoints backed by real nanoidp.delta logs over synthetic pods and
+processes). Before each refresh it changes `churn` of the records and
+replaces a few pods. The aggregator polls them over its keep-alive pool;
+bytes received and the aggregator's own CPU are reported per refresh, with
+deltas and with a full snapshot every time (what polling without seq costs).
+
+Usage (repo root):
+  python aggregator/bench_refresh.py [--nodes 10,50] [--pods 110] [--processes 2000] [--churn 0,0.01,0.1]
+"""
+from pathlib import Path
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import socket
+import statistics
+import sys
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE))
+sys.path.append(str(HERE.parent))
+
+from aiohttp import web  # noqa: E402
+import orjson  # noqa: E402
+
+from nanoidp import delta  # noqa: E402
+
+
+class FakeNode:
+    def __init__(self, rng: random.Random, pods: int, processes: int):
+        self.rng = rng
+        self.kernel = delta.DeltaLog({
+            "pods": ("qos", "map_count", "processes", "max_process_maps"),
+            "processes": ("map_count", "pod_uid", "container_id"),
+        })
+        self.cgroup = delta.DeltaLog({"pods": ("qos", "current_mb", "limit_ratio", "full_avg10")})
+        self.pods = {self._uid(): rng.choice(("burstable", "besteffort", "guaranteed")) for _ in range(pods)}
+        uids = list(self.pods)
+        self.processes = {str(1000 + i): [rng.randint(20, 2000), rng.choice(uids)] for i in range(processes)}
+        self.memory = {uid: rng.randint(20, 900) for uid in uids}
+        self.next_pid = 1000 + processes
+        self.publish()
+
+    def _uid(self) -> str:
+        h = "%032x" % self.rng.getrandbits(128)
+        return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+    def churn(self, fraction: float) -> None:
+        rng = self.rng
+        for pid in rng.sample(list(self.processes), int(len(self.processes) * fraction)):
+            self.processes[pid][0] += rng.randint(1, 50)
+        for uid in rng.sample(list(self.memory), int(len(self.memory) * fraction)):
+            self.memory[uid] += rng.randint(1, 20)
+        if fraction:  # pod turnover: one pod (and its processes) replaced
+            gone = rng.choice(list(self.pods))
+            del self.pods[gone], self.memory[gone]
+            new = self._uid()
+            self.pods[new], self.memory[new] = "burstable", rng.randint(20, 900)
+            for pid, record in list(self.processes.items()):
+                if record[1] == gone:
+                    del self.processes[pid]
+                    self.processes[str(self.next_pid)] = [rng.randint(20, 2000), new]
+                    self.next_pid += 1
+        self.publish()
+
+    def publish(self) -> None:
+        per_pod = {}
+        for map_count, uid in self.processes.values():
+            total, count, peak = per_pod.get(uid, (0, 0, 0))
+            per_pod[uid] = (total + map_count, count + 1, max(peak, map_count))
+        self.kernel.update({
+            "pods": {uid: (self.pods[uid], *per_pod.get(uid, (0, 0, 0))) for uid in self.pods},
+            "processes": {pid: (m, uid, uid[:13]) for pid, (m, uid) in self.processes.items()},
+        })
+        self.cgroup.update({"pods": {uid: (self.pods[uid], mb, round(mb / 1024, 3), 0.0)
+                                     for uid, mb in self.memory.items()}})
+
+
+def serve(port: int, nodes: int, pods: int, processes: int, ready) -> None:
+    rng = random.Random(0)
+    fleet = {f"node-{i:03d}": FakeNode(rng, pods, processes) for i in range(nodes)}
+
+    def snapshot(log):
+        async def handler(request):
+            since = request.query.get("since")
+            body = log.since(int(since) if since else None, request.query.get("epoch"))
+            return web.Response(body=orjson.dumps(body), content_type="application/json")
+        return handler
+
+    async def tick(request):
+        fraction = float(request.query.get("churn", "0"))
+        for node in fleet.values():
+            node.churn(fraction)
+        return web.Response(text="ok")
+
+    app = web.Application()
+    app.router.add_post("/_tick", tick)
+    for name, node in fleet.items():
+        app.router.add_get(f"/{name}/kernel/metrics/maps/snapshot", snapshot(node.kernel))
+        app.router.add_get(f"/{name}/cgroup/api/snapshot", snapshot(node.cgroup))
+    ready.set()
+    web.run_app(app, host="127.0.0.1", port=port, print=None, access_log=None)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def measure(aggregator, base: str, churn: float, refreshes: int, full: bool):
+    import aiohttp
+    sizes, cpu, wall = [], [], []
+    async with aiohttp.ClientSession() as session:
+        for _ in range(refreshes):
+            async with session.post(f"{base}/_tick", params={"churn": str(churn)}) as response:
+                await response.read()
+            if full:
+                for state in aggregator.sources.values():
+                    state.epoch = state.seq = None
+            await aggregator.refresh()
+            sizes.append(aggregator.last_refresh["bytes"])
+            cpu.append(aggregator.last_refresh["cpu_ms"])
+            wall.append(aggregator.last_refresh["duration_ms"])
+    return statistics.median(sizes), statistics.median(cpu), statistics.median(wall)
+
+
+async def run(nodes: int, pods: int, processes: int, churns, refreshes: int):
+    os.environ.setdefault("AGGREGATOR_TARGETS", "-")
+    import main
+    port = free_port()
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve, args=(port, nodes, pods, processes, ready), daemon=True)
+    server.start()
+    ready.wait()
+    base = f"http://127.0.0.1:{port}"
+    aggregator = main.Aggregator()
+    await aggregator.open()
+    try:
+        aggregator.set_nodes({f"node-{i:03d}": f"{base}/node-{i:03d}" for i in range(nodes)})
+        for _ in range(50):  # wait for the server
+            await aggregator.refresh()
+            if not aggregator.last_refresh["failed"]:
+                break
+            await asyncio.sleep(0.2)
+        records = nodes * (processes + 2 * pods)
+        for churn in churns:
+            for full in (False, True):
+                size, cpu, wall = await measure(aggregator, base, churn, refreshes, full)
+                mode = "full" if full else "delta"
+                print(f"{nodes:5d} {records:9d} {churn:6.1%}  {mode:5s} {size / 1024:10.1f} {cpu:9.1f} {wall:9.1f}")
+        print(f"      pods indexed {len(aggregator.pods)}")
+    finally:
+        await aggregator.close()
+        server.terminate()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", default="10,50", help="comma-separated cluster sizes")
+    parser.add_argument("--pods", type=int, default=110, help="pods per node")
+    parser.add_argument("--processes", type=int, default=2000, help="processes with maps per node")
+    parser.add_argument("--churn", default="0,0.01,0.1", help="fraction of records changed per refresh")
+    parser.add_argument("--refreshes", type=int, default=5)
+    args = parser.parse_args()
+    churns = [float(c) for c in args.churn.split(",")]
+    print(f"{'nodes':>5} {'records':>9} {'churn':>6}  {'mode':5s} {'KB/refresh':>10} {'cpu ms':>9} {'wall ms':>9}")
+    for nodes in (int(n) for n in args.nodes.split(",")):
+        asyncio.run(run(nodes, args.pods, args.processes, churns, args.refreshes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,448 @@
+"""
+Nano-IDP Cluster Aggregator
+One cluster-wide view of the per-node monitors: kernel map counts (lesson 5)
+and cgroup memory (lesson 6) for every pod and process in the cluster.
+
+The node agents are discovered from their pods (or AGGREGATOR_TARGETS) and
+polled concurrently over one keep-alive connection pool. Each poll sends the
+last seq applied from that node, and the node answers with only the pods and
+processes that changed since (nanoidp.delta); the changes are folded into
+the cluster view as they arrive. A refresh therefore costs in proportion to
+churn, not to cluster size. Every node source tracks its staleness; stale
+data is kept and flagged until AGGREGATOR_EXPIRE_S.
+"""
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.middleware.cors import CORSMiddleware
+import asyncio
+import heapq
+import json
+import logging
+import os
+import sys
+import time
+
+import aiohttp
+import orjson
+
+try:
+    from nanoidp import httpcache, kube, scheduler, telemetry
+except ImportError:  # running from a checkout: shared library lives at the repo root
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    from nanoidp import httpcache, kube, scheduler, telemetry
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INTERVAL_S = float(os.getenv("AGGREGATOR_INTERVAL_S", "5"))
+DISCOVERY_S = float(os.getenv("AGGREGATOR_DISCOVERY_S", "30"))
+# A source is stale after this many of its own sample intervals (or polls) without an answer
+STALE_FACTOR = float(os.getenv("AGGREGATOR_STALE_FACTOR", "3"))
+EXPIRE_S = float(os.getenv("AGGREGATOR_EXPIRE_S", "600"))
+REQUEST_TIMEOUT_S = float(os.getenv("AGGREGATOR_TIMEOUT_S", "5"))
+MAX_CONNECTIONS = int(os.getenv("AGGREGATOR_MAX_CONNECTIONS", "64"))
+
+# Node agents: pods of the agent DaemonSet, or a static "node=url,..." list
+NAMESPACE = os.getenv("AGGREGATOR_NAMESPACE", "nano-system")
+SELECTOR = os.getenv("AGGREGATOR_SELECTOR", "app=nano-idp-agent")
+AGENT_PORT = int(os.getenv("AGGREGATOR_AGENT_PORT", "8000"))
+TARGETS = os.getenv("AGGREGATOR_TARGETS", "")
+
+# Snapshot path of each monitor on a node agent (plugins mounted at /<plugin>);
+# AGGREGATOR_SOURCES='{"kernel": "/metrics/maps/snapshot"}' for a standalone monitor
+SOURCES: Dict[str, str] = json.loads(os.getenv("AGGREGATOR_SOURCES") or json.dumps({
+    "kernel": "/kernel/metrics/maps/snapshot",
+    "cgroup": "/cgroup/api/snapshot",
+}))
+
+Change = Tuple[str, str, Optional[tuple]]  # (table, key, record or None when removed)
+
+
+def parse_targets(spec: str) -> Dict[str, str]:
+    targets = {}
+    for item in spec.split(","):
+        if "=" in item:
+            node, url = item.split("=", 1)
+            targets[node.strip()] = url.strip().rstrip("/")
+    return targets
+
+
+def check_snapshot(snapshot) -> None:
+    """Raise ValueError unless this is a nanoidp.delta snapshot, before any table is touched."""
+    if not (isinstance(snapshot, dict) and isinstance(snapshot.get("epoch"), str)
+            and isinstance(snapshot.get("seq"), int) and isinstance(snapshot.get("full"), bool)
+            and isinstance(snapshot.get("tables"), dict)):
+        raise ValueError("not a delta snapshot (epoch, seq, full, tables)")
+    for name, table in snapshot["tables"].items():
+        if not (isinstance(table, dict) and isinstance(table.get("fields"), list)
+                and isinstance(table.get("changed"), dict) and isinstance(table.get("removed"), list)
+                and all(isinstance(record, list) for record in table["changed"].values())):
+            raise ValueError(f"malformed table {name!r} in snapshot")
+
+
+class NodeSource:
+    """One node's copy of one monitor's tables, kept current by deltas."""
+
+    def __init__(self, node: str, source: str, url: str):
+        self.node = node
+        self.source = source
+        self.url = url
+        self.epoch: Optional[str] = None
+        self.seq: Optional[int] = None
+        self.fields: Dict[str, Tuple[str, ...]] = {}
+        self.tables: Dict[str, Dict[str, tuple]] = {}
+        self.summary: Dict = {}
+        self.interval_s = INTERVAL_S
+        self.last_ok: Optional[float] = None  # monotonic
+        self.last_error: Optional[str] = None
+        self.failures = 0
+        self.polls = 0
+        self.full = 0
+        self.bytes_total = 0
+        self.last_bytes = 0
+        self.last_changes = 0
+
+    def apply(self, snapshot: Dict) -> List[Change]:
+        """Fold a snapshot (full or delta) into the tables; returns what changed."""
+        changes: List[Change] = []
+        for name, table in snapshot["tables"].items():
+            records = self.tables.setdefault(name, {})
+            self.fields[name] = tuple(table["fields"])
+            if snapshot["full"]:
+                # Resync: whatever the node no longer has is gone
+                for key in records.keys() - table["changed"].keys():
+                    changes.append((name, key, None))
+                records.clear()
+            for key, record in table["changed"].items():
+                record = tuple(record)
+                records[key] = record
+                changes.append((name, key, record))
+            for key in table["removed"]:
+                if records.pop(key, None) is not None:
+                    changes.append((name, key, None))
+        self.epoch, self.seq = snapshot["epoch"], snapshot["seq"]
+        self.summary = snapshot.get("summary") or {}
+        self.interval_s = snapshot.get("interval_s") or self.interval_s
+        if snapshot["full"]:
+            self.full += 1
+        return changes
+
+    def clear(self) -> List[Change]:
+        changes = [(name, key, None) for name, records in self.tables.items() for key in records]
+        self.tables.clear()
+        self.epoch = self.seq = None
+        return changes
+
+    def age_s(self, now: float) -> Optional[float]:
+        return None if self.last_ok is None else now - self.last_ok
+
+    def stale(self, now: float) -> bool:
+        age = self.age_s(now)
+        return age is None or age > STALE_FACTOR * max(INTERVAL_S, self.interval_s)
+
+    def status(self, now: float) -> Dict:
+        age = self.age_s(now)
+        return {
+            "url": self.url,
+            "stale": self.stale(now),
+            "age_s": None if age is None else round(age, 1),
+            "epoch": self.epoch,
+            "seq": self.seq,
+            "records": {name: len(records) for name, records in self.tables.items()},
+            "polls": self.polls,
+            "full_snapshots": self.full,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "last_bytes": self.last_bytes,
+            "last_changes": self.last_changes,
+            "bytes_total": self.bytes_total,
+        }
+
+
+class Aggregator:
+    """Node sources, the merged pod index and the poller."""
+
+    def __init__(self, sources: Dict[str, str] = SOURCES):
+        self.source_paths = sources
+        self.nodes: Dict[str, str] = {}  # node -> agent base URL
+        self.sources: Dict[Tuple[str, str], NodeSource] = {}
+        # pod UID -> {"node": ..., <source>: record}; updated from changes only
+        self.pods: Dict[str, Dict] = {}
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.discovered = asyncio.Event()
+        self.last_refresh: Dict = {}
+
+    async def open(self) -> None:
+        connector = aiohttp.TCPConnector(limit=MAX_CONNECTIONS, limit_per_host=len(self.source_paths),
+                                         keepalive_timeout=max(30.0, 3 * INTERVAL_S))
+        self.session = aiohttp.ClientSession(
+            connector=connector, timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_S),
+            headers={"Accept": "application/json"})
+
+    async def close(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def set_nodes(self, nodes: Dict[str, str]) -> None:
+        for node in self.nodes.keys() - nodes.keys():
+            for source in self.source_paths:
+                self._fold(self.sources.pop((node, source)), None)
+        for node, base in nodes.items():
+            for source, path in self.source_paths.items():
+                state = self.sources.get((node, source))
+                if state is None:
+                    self.sources[node, source] = NodeSource(node, source, base + path)
+                else:
+                    state.url = base + path  # pod rescheduled: the epoch check resyncs it
+        self.nodes = dict(nodes)
+
+    async def discover(self) -> None:
+        """Refresh the node list; on failure keep the previous one."""
+        try:
+            nodes = parse_targets(TARGETS) if TARGETS else await discover_agents()
+        except Exception as e:
+            logger.warning(f"Node agent discovery failed: {type(e).__name__}: {e}")
+        else:
+            if nodes.keys() != self.nodes.keys():
+                logger.info(f"Polling {len(nodes)} node agent(s)")
+            self.set_nodes(nodes)
+        self.discovered.set()
+
+    async def poll(self, state: NodeSource) -> Tuple[int, int]:
+        """One snapshot request; returns (bytes received, changes applied)."""
+        params = {"since": str(state.seq), "epoch": state.epoch} if state.epoch else None
+        state.polls += 1
+        try:
+            async with self.session.get(state.url, params=params) as response:
+                response.raise_for_status()
+                body = await response.read()
+            snapshot = orjson.loads(body)
+            # A wrong AGGREGATOR_SOURCES path or another plugin version fails this
+            # source only, instead of raising out of apply() and the whole refresh
+            check_snapshot(snapshot)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:  # JSONDecodeError is a ValueError
+            state.failures += 1
+            state.last_error = f"{type(e).__name__}: {e}"
+            now = time.monotonic()
+            if state.last_ok is not None and now - state.last_ok > EXPIRE_S and state.tables:
+                logger.warning(f"{state.node}/{state.source}: no answer for {EXPIRE_S:.0f}s, dropping its data")
+                self._fold(state, state.clear())
+            return 0, 0
+        if (state.node, state.source) not in self.sources:  # node removed while in flight
+            return len(body), 0
+        changes = state.apply(snapshot)
+        self._fold(state, changes)
+        state.last_ok = time.monotonic()
+        state.last_error = None
+        state.last_bytes = len(body)
+        state.last_changes = len(changes)
+        state.bytes_total += len(body)
+        return len(body), len(changes)
+
+    def _fold(self, state: NodeSource, changes: Optional[List[Change]]) -> None:
+        """Apply a source's pod changes to the cluster index (None: the source is gone)."""
+        if changes is None:
+            changes = state.clear()
+        for table, key, record in changes:
+            if table != "pods":
+                continue
+            pod = self.pods.get(key)
+            if record is None:
+                if pod is not None and pod.get("node") == state.node:
+                    pod.pop(state.source, None)
+                    if not any(source in pod for source in self.source_paths):
+                        del self.pods[key]
+                continue
+            if pod is None:
+                pod = self.pods[key] = {"node": state.node}
+            pod["node"] = state.node
+            pod[state.source] = dict(zip(state.fields[table], record))
+
+    async def refresh(self) -> None:
+        start, cpu = time.perf_counter(), time.process_time()
+        results = await asyncio.gather(*(self.poll(state) for state in list(self.sources.values())))
+        now = time.monotonic()
+        self.last_refresh = {
+            "at": time.time(),
+            "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+            "cpu_ms": round((time.process_time() - cpu) * 1000, 1),
+            "polled": len(results),
+            "failed": sum(1 for state in self.sources.values() if state.last_error),
+            "stale": sum(1 for state in self.sources.values() if state.stale(now)),
+            "bytes": sum(size for size, _ in results),
+            "changes": sum(changed for _, changed in results),
+        }
+
+    def node_status(self, node: str, now: float) -> Dict:
+        sources = {source: self.sources[node, source] for source in self.source_paths if (node, source) in self.sources}
+        return {
+            "node": node,
+            "stale": any(state.stale(now) for state in sources.values()),
+            "sources": {source: state.status(now) for source, state in sources.items()},
+            "summary": {source: state.summary for source, state in sources.items()},
+        }
+
+    def pod_view(self, uid: str, pod: Dict, now: float) -> Dict:
+        view = {"pod_uid": uid, "node": pod["node"]}
+        stale = False
+        for source in self.source_paths:
+            record = pod.get(source)
+            if record is not None:
+                view.update(record)
+                state = self.sources.get((pod["node"], source))
+                stale = stale or state is None or state.stale(now)
+        view["stale"] = stale
+        return view
+
+    def processes(self, node: Optional[str] = None) -> Iterator[Tuple[str, str, Dict[str, int], tuple]]:
+        for (state_node, _), state in self.sources.items():
+            if node is not None and state_node != node:
+                continue
+            records = state.tables.get("processes")
+            if records:
+                index = {name: i for i, name in enumerate(state.fields["processes"])}
+                for pid, record in records.items():
+                    yield state_node, pid, index, record
+
+
+aggregator = Aggregator()
+
+
+async def discover_agents() -> Dict[str, str]:
+    """Running agent pods by node name."""
+    from kubernetes_asyncio import client
+    v1 = client.CoreV1Api(await kube.async_api_client())
+    pods = await v1.list_namespaced_pod(NAMESPACE, label_selector=SELECTOR)
+    return {
+        pod.spec.node_name or pod.metadata.name: f"http://{pod.status.pod_ip}:{AGENT_PORT}"
+        for pod in pods.items
+        if pod.status.phase == "Running" and pod.status.pod_ip
+    }
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await aggregator.open()
+    sampling = scheduler.default()
+    sampling.start()
+    jobs = [
+        sampling.every(DISCOVERY_S, aggregator.discover, name="discover-agents"),
+        sampling.every(INTERVAL_S, aggregator.refresh, name="aggregate", after=aggregator.discovered),
+    ]
+    try:
+        yield
+    finally:
+        for job in jobs:
+            job.cancel()
+        await sampling.stop()
+        await aggregator.close()
+        await kube.close()
+
+app = FastAPI(title="Nano-IDP Cluster Aggregator", version="1.0.0", lifespan=lifespan)
+
+# Dashboards poll the merged views; they change at most once per refresh
+cache = httpcache.ResponseCache({
+    "/api/cluster": 1,
+    "/api/cluster/pods": 1,
+    "/api/cluster/processes": 1,
+})
+app.add_middleware(httpcache.CacheMiddleware, cache=cache)
+
+telemetry.install(app, "cluster-aggregator", memory_budget_mb=64)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+
+@app.get("/health")
+async def health():
+    now = time.monotonic()
+    stale = sorted({state.node for state in aggregator.sources.values() if state.stale(now)})
+    return {
+        "status": "degraded" if stale else "healthy",
+        "service": "cluster-aggregator",
+        "nodes": len(aggregator.nodes),
+        "stale_nodes": stale,
+        "cache": cache.stats(),
+    }
+
+
+@app.get("/api/cluster")
+async def cluster():
+    """Nodes with per-source staleness, totals and the cost of the last refresh."""
+    now = time.monotonic()
+    nodes = [aggregator.node_status(node, now) for node in sorted(aggregator.nodes)]
+    return {
+        "nodes": nodes,
+        "totals": {
+            "nodes": len(nodes),
+            "stale_nodes": sum(1 for node in nodes if node["stale"]),
+            "pods": len(aggregator.pods),
+            "processes": sum(len(state.tables.get("processes", ())) for state in aggregator.sources.values()),
+        },
+        "refresh": {"interval_s": INTERVAL_S, **aggregator.last_refresh},
+    }
+
+
+@app.get("/api/cluster/nodes/{node}")
+async def cluster_node(node: str):
+    if node not in aggregator.nodes:
+        raise HTTPException(status_code=404, detail=f"Node '{node}' has no agent")
+    return aggregator.node_status(node, time.monotonic())
+
+
+POD_SORT_KEYS = ("current_mb", "map_count", "full_avg10", "limit_ratio", "max_process_maps")
+
+
+@app.get("/api/cluster/pods")
+async def cluster_pods(
+    sort: str = Query("current_mb", description=f"One of {', '.join(POD_SORT_KEYS)}"),
+    node: Optional[str] = Query(None, description="Only pods on this node"),
+    top: int = Query(50, ge=1, le=5000),
+):
+    """Pods across the cluster with kernel map counts and cgroup memory merged by pod UID."""
+    if sort not in POD_SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {POD_SORT_KEYS}")
+    source = "kernel" if sort in ("map_count", "max_process_maps") else "cgroup"
+
+    def key(item):
+        record = item[1].get(source)
+        value = record.get(sort) if record else None
+        return -1 if value is None else value  # no record, or no limit for limit_ratio
+
+    items = aggregator.pods.items()
+    if node is not None:
+        items = [item for item in items if item[1]["node"] == node]
+    now = time.monotonic()
+    return {
+        "count": len(items),
+        "sort": sort,
+        "pods": [aggregator.pod_view(uid, pod, now) for uid, pod in heapq.nlargest(top, items, key=key)],
+    }
+
+
+@app.get("/api/cluster/processes")
+async def cluster_processes(
+    node: Optional[str] = Query(None, description="Only processes on this node"),
+    top: int = Query(50, ge=1, le=5000),
+):
+    """Processes with the most memory maps across the cluster."""
+    rows = heapq.nlargest(top, aggregator.processes(node), key=lambda row: row[3][row[2]["map_count"]])
+    return {
+        "processes": [
+            {"node": row_node, "pid": int(pid), **{name: record[i] for name, i in index.items()}}
+            for row_node, pid, index, record in rows
+        ],
+    }
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORT", "8000")), log_level="info")
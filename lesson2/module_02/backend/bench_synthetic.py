@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark: the memory monitor's sampling path (stats, alert rules, history)
+over thousands of simulated nodes from nanoidp.synthetic. No cluster required.
+
+Each tick steps every node, builds its MemoryStats, evaluates the alert rules
+over the whole frame and appends the first node to a history file, exactly as
+MEMORY_SOURCE=synthetic does in the service. Reported per cluster size: engine
+and pipeline time per tick, node samples per second, alert transitions, and a
+digest of every sample and transition. --verify replays the run in a fresh
+process and checks the digest matches.
+
+Usage: python bench_synthetic.py [--nodes 100,1000,5000] [--ticks 120] [--scenario mixed] [--seed 0] [--verify]
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ["MEMORY_SOURCE"] = "synthetic"
+os.environ.setdefault("SYNTHETIC_NODES", "1")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import main  # noqa: E402
+from nanoidp import alerts, synthetic, tsdb  # noqa: E402
+
+
+async def run(nodes: int, pods: int, ticks: int, scenario: str, seed: int, directory: str):
+    cluster = synthetic.Cluster(nodes, pods, scenario, seed, interval_s=main.HISTORY_INTERVAL_S)
+    main.simulated, main.simulated_batch, main.simulated_index = cluster, None, {}
+    main.alert_engine = alerts.RuleEngine.from_env(main.DEFAULT_ALERT_RULES)
+    events = main.alert_engine.subscribe(maxsize=1_000_000)
+    series = tsdb.open_series(directory, f"memory-{nodes}", main.HISTORY_FIELDS,
+                              tsdb.default_tiers(main.HISTORY_INTERVAL_S))
+
+    engine_ms = []
+    step = cluster.step
+
+    def timed_step():
+        start = time.perf_counter()
+        batch = step()
+        engine_ms.append((time.perf_counter() - start) * 1000)
+        return batch
+
+    cluster.step = timed_step
+    digest = hashlib.sha256()
+    tick_ms = []
+    transitions = 0
+    for _ in range(ticks):
+        start = time.perf_counter()
+        values = await main.sample_node()
+        series.append(values)
+        tick_ms.append((time.perf_counter() - start) * 1000)
+
+        batch = main.simulated_batch
+        digest.update(json.dumps(batch.columns, sort_keys=True).encode())
+        # Transitions within a tick come in set order, which varies with the hash seed
+        lines = []
+        while not events.empty():
+            event = events.get_nowait()
+            lines.append(f"{batch.tick} {event['event']} {event['rule']} {event['entity']}\n")
+        transitions += len(lines)
+        digest.update("".join(sorted(lines)).encode())
+    series.close()
+    return {
+        "engine_ms": statistics.median(engine_ms),
+        "tick_ms": statistics.median(tick_ms),
+        "p99_ms": sorted(tick_ms)[int(len(tick_ms) * 0.99)],
+        "rate": nodes * ticks / (sum(tick_ms) / 1000),
+        "transitions": transitions,
+        "firing": main.alert_engine.stats()["firing"],
+        "oom_kills": sum(cluster.oom_kills),
+        "digest": digest.hexdigest()[:16],
+    }
+
+
+def cli() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", default="100,1000,5000", help="comma-separated cluster sizes")
+    parser.add_argument("--pods", type=int, default=12, help="pods per node")
+    parser.add_argument("--ticks", type=int, default=120, help="samples per size (5 s each)")
+    parser.add_argument("--scenario", default="mixed", choices=synthetic.SCENARIOS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verify", action="store_true", help="replay in a new process and compare digests")
+    parser.add_argument("--digests-only", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    results = {}
+    if not args.digests_only:
+        print(f"{'nodes':>6} {'engine ms':>10} {'tick ms':>8} {'p99 ms':>8} {'samples/s':>10} "
+              f"{'events':>7} {'firing':>7} {'ooms':>6}  digest")
+    with tempfile.TemporaryDirectory() as directory:
+        for nodes in (int(n) for n in args.nodes.split(",")):
+            r = asyncio.run(run(nodes, args.pods, args.ticks, args.scenario, args.seed, directory))
+            results[nodes] = r["digest"]
+            if args.digests_only:
+                print(nodes, r["digest"])
+            else:
+                print(f"{nodes:6d} {r['engine_ms']:10.1f} {r['tick_ms']:8.1f} {r['p99_ms']:8.1f} {r['rate']:10.0f} "
+                      f"{r['transitions']:7d} {r['firing']:7d} {r['oom_kills']:6d}  {r['digest']}")
+
+    if args.verify:
+        replay = subprocess.run(
+            [sys.executable, __file__, "--nodes", args.nodes, "--pods", str(args.pods), "--ticks", str(args.ticks),
+             "--scenario", args.scenario, "--seed", str(args.seed), "--digests-only"],
+            capture_output=True, text=True, check=True)
+        replayed = dict(line.split() for line in replay.stdout.splitlines() if line.strip())
+        same = all(replayed.get(str(nodes)) == digest for nodes, digest in results.items())
+        print("replay:", "identical" if same else f"MISMATCH {replayed}")
+        if not same:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    cli()
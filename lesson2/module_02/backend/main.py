@@ -1,16 +1,149 @@
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
 from pathlib import Path
 from pydantic import BaseModel, Field
 from typing import Dict, Optional
 import logging
+import os
+import sys
 import time
-import random
+import asyncio
+
+try:
+    from nanoidp import alerts, httpcache, procfs, synthetic, telemetry, tsdb
+except ImportError:  # running from a checkout: shared library lives at the repo root
+    sys.path.append(str(Path(__file__).resolve().parents[3]))
+    from nanoidp import alerts, httpcache, procfs, synthetic, telemetry, tsdb
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Nano-IDP Memory Monitor", version="1.0.0")
+# procfs mount point; point it at a synthetic tree for benchmarks
+PROC_ROOT = os.getenv("PROC_ROOT", "/proc")
+
+# Persistent history (nanoidp.tsdb), sampled every HISTORY_INTERVAL_S
+HISTORY_INTERVAL_S = float(os.getenv("HISTORY_INTERVAL_S", "5"))
+HISTORY_FIELDS = ("total_mb", "available_mb", "used_mb", "swap_used_mb", "swappiness")
+history: Optional[tsdb.TimeSeries] = None
+
+# MEMORY_SOURCE=synthetic samples SYNTHETIC_NODES simulated nodes
+# (nanoidp.synthetic) instead of this node, through the same stats, alert and
+# history path, for load tests; history keeps the first node
+MEMORY_SOURCE = os.getenv("MEMORY_SOURCE", "procfs")
+SYNTHETIC_NODES = int(os.getenv("SYNTHETIC_NODES", "1000"))
+SYNTHETIC_PODS = int(os.getenv("SYNTHETIC_PODS", "12"))
+SYNTHETIC_SCENARIO = os.getenv("SYNTHETIC_SCENARIO", "mixed")
+SYNTHETIC_SEED = int(os.getenv("SYNTHETIC_SEED", "0"))
+simulated: Optional[synthetic.Cluster] = None
+if MEMORY_SOURCE == "synthetic":
+    simulated = synthetic.Cluster(SYNTHETIC_NODES, SYNTHETIC_PODS, SYNTHETIC_SCENARIO,
+                                  SYNTHETIC_SEED, interval_s=HISTORY_INTERVAL_S)
+simulated_batch: Optional[synthetic.Batch] = None
+simulated_index: Dict[str, int] = {}
+simulated_start = time.time()
+
+# ?demo=true: one simulated node running DEMO_SCENARIO, DEMO_TICKS_PER_S
+# samples of 5 s per real second, so a leak reaches OOM in about a minute
+DEMO_SCENARIO = os.getenv("DEMO_SCENARIO", "leak")
+DEMO_SEED = int(os.getenv("DEMO_SEED", "0"))
+DEMO_TICKS_PER_S = float(os.getenv("DEMO_TICKS_PER_S", "5"))
+DEMO_MAX_CATCHUP = 50  # steps per request; a longer gap pauses the demo instead
+demo_cluster = synthetic.Cluster(1, scenario=DEMO_SCENARIO, seed=DEMO_SEED)
+demo_batch = demo_cluster.step()
+demo_start = time.monotonic()
+
+# Alert rules (nanoidp.alerts), also used by calculate_pressure and the
+# recommendations; ALERT_RULES=<json file> overrides them by name
+DEFAULT_ALERT_RULES = [
+    {"name": "memory-pressure-medium", "metric": "available_ratio", "op": "<=", "threshold": 0.4,
+     "clear": 0.45, "for_s": 60, "severity": "info",
+     "summary": "Available memory at {value:.0%} of RAM"},
+    {"name": "memory-pressure-high", "metric": "available_ratio", "op": "<=", "threshold": 0.2,
+     "clear": 0.25, "for_s": 30, "severity": "warning",
+     "summary": "Available memory at {value:.0%} of RAM"},
+    {"name": "memory-pressure-critical", "metric": "available_ratio", "op": "<=", "threshold": 0.1,
+     "clear": 0.15, "for_s": 10, "severity": "critical",
+     "summary": "Critical memory pressure: {value:.0%} of RAM available"},
+    {"name": "swappiness-high", "metric": "swappiness", "op": ">", "threshold": 30,
+     "severity": "warning", "summary": "Swappiness is {value:.0f}. Recommend 10-20 for 8GB systems."},
+    {"name": "swap-missing", "metric": "swap_total_mb", "op": "<=", "threshold": 0,
+     "severity": "critical", "summary": "No swap configured. System vulnerable to OOM kills."},
+    {"name": "swap-undersized", "metric": "swap_ratio", "op": "<", "threshold": 0.5,
+     "severity": "warning", "summary": "Swap is {value:.0%} of RAM. Recommend 4GB minimum."},
+]
+alert_engine = alerts.RuleEngine.from_env(DEFAULT_ALERT_RULES)
+
+def rule_matches(name: str, values: Dict[str, float]) -> bool:
+    """Bare condition of a rule (no for_s/hysteresis); False if the rule is disabled."""
+    rule = alert_engine.rules.get(name)
+    return rule is not None and rule.test(values[rule.metric])
+
+def node_values(stats: "MemoryStats") -> Dict[str, float]:
+    """The metrics the alert rules see."""
+    return {
+        "available_ratio": stats.available_mb / stats.total_mb if stats.total_mb else float("nan"),
+        "swappiness": stats.swappiness,
+        "swap_total_mb": stats.swap_total_mb,
+        # NaN never matches, so no swap only raises swap-missing
+        "swap_ratio": stats.swap_total_mb / stats.total_mb if stats.swap_total_mb and stats.total_mb else float("nan"),
+    }
+
+async def sample_node():
+    """One tick: history sample and alert evaluation."""
+    if simulated is not None:
+        return await sample_simulated()
+    stats = current_stats()
+    values = node_values(stats)
+    alert_engine.observe("node", ["node"], {metric: [value] for metric, value in values.items()})
+    return [getattr(stats, field) for field in HISTORY_FIELDS]
+
+def step_simulated():
+    """Advance every simulated node and build its stats and alert values (off the loop)."""
+    batch = simulated.step()
+    stats = [stats_from_batch(batch, i) for i in range(len(batch.ids))]
+    columns: Dict[str, list] = {}
+    for s in stats:
+        for metric, value in node_values(s).items():
+            columns.setdefault(metric, []).append(value)
+    return batch, stats, columns
+
+async def sample_simulated():
+    """One tick of MEMORY_SOURCE=synthetic: all nodes through the alert rules, the first into history."""
+    global simulated_batch, simulated_index
+    batch, stats, columns = await asyncio.get_running_loop().run_in_executor(None, step_simulated)
+    # Simulated clock, so for_s counts samples and a seed replays the same transitions
+    alert_engine.observe("node", batch.ids, columns, now=simulated_start + batch.tick * simulated.interval_s)
+    if not simulated_index:
+        simulated_index = {node: i for i, node in enumerate(batch.ids)}
+    simulated_batch = batch
+    return [getattr(stats[0], field) for field in HISTORY_FIELDS]
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global history
+    async with tsdb.recording("memory", HISTORY_FIELDS, sample_node, HISTORY_INTERVAL_S) as series:
+        history = series
+        yield
+        history = None
+
+app = FastAPI(title="Nano-IDP Memory Monitor", version="1.0.0", lifespan=lifespan)
+app.include_router(alerts.router(alert_engine, "/api/memory/alerts"))
+
+# The dashboard polls stats and recommendations every few seconds; history
+# only changes once per sample
+cache = httpcache.ResponseCache({
+    "/api/memory/stats": 2,
+    "/api/memory/recommendations": 2,
+    "/api/memory/history": HISTORY_INTERVAL_S,
+    "/api/memory/alerts": 1,
+    "/api/memory/nodes": 2,
+})
+app.add_middleware(httpcache.CacheMiddleware, cache=cache)
+
+# /metrics and /debug/runtime: does sampling thousands of synthetic nodes
+# stay inside the 64MB request?
+telemetry.install(app, "memory-monitor", memory_budget_mb=64)
 
 # CORS for local development
 app.add_middleware(
@@ -34,162 +167,170 @@ class MemoryStats(BaseModel):
 
 def parse_meminfo() -> Dict[str, int]:
     """Parse /proc/meminfo without external dependencies."""
-    meminfo = {}
     try:
-        with Path("/proc/meminfo").open() as f:
-            for line in f:
-                if line.strip():
-                    parts = line.split(":", 1)
-                    if len(parts) == 2:
-                        key = parts[0].strip()
-                        value_parts = parts[1].strip().split()
-                        if value_parts:
-                            meminfo[key] = int(value_parts[0])
+        return procfs.parse_keyed(procfs.read(f"{PROC_ROOT}/meminfo"))
     except FileNotFoundError:
-        logger.warning("/proc/meminfo not found - returning mock data")
+        logger.warning(f"{PROC_ROOT}/meminfo not found - returning mock data")
         return {
             "MemTotal": 8192000,
             "MemAvailable": 4096000,
             "SwapTotal": 4096000,
             "SwapFree": 3500000,
         }
-    return meminfo
 
 def get_sysctl_value(param: str) -> int:
     """Read sysctl value safely."""
     try:
-        return int(Path(f"/proc/sys/{param.replace('.', '/')}").read_text().strip())
+        return procfs.parse_int(procfs.read(f"{PROC_ROOT}/sys/{param.replace('.', '/')}"))
     except (FileNotFoundError, ValueError):
         logger.warning(f"Cannot read {param} - returning default")
         return 60 if "swappiness" in param else 100
 
 def calculate_pressure(available_mb: int, total_mb: int) -> str:
-    """Determine memory pressure level."""
+    """Determine memory pressure level from the memory-pressure-* rules."""
     if total_mb == 0:
         return "unknown"
-    ratio = available_mb / total_mb
-    if ratio > 0.4:
-        return "low"
-    elif ratio > 0.2:
-        return "medium"
-    elif ratio > 0.1:
-        return "high"
-    else:
-        return "critical"
-
-def generate_demo_data() -> Dict[str, int]:
-    """Generate realistic demo data that varies over time."""
-    # Base values for an 8GB system
-    total_mb = 8192
-    base_time = int(time.time())
-    
-    # Create a pattern that cycles through different pressure levels
-    cycle_position = (base_time % 60) / 60.0  # 60 second cycle
-    
-    # Simulate memory usage that varies between 30% and 85%
-    # Ensure swap usage is always visible in demo mode
-    if cycle_position < 0.25:
-        # Low pressure phase - minimal swap usage
-        used_ratio = 0.3 + (cycle_position / 0.25) * 0.1
-        swap_used_ratio = 0.05 + (cycle_position / 0.25) * 0.05  # 5-10% swap
-    elif cycle_position < 0.5:
-        # Medium pressure phase - moderate swap usage
-        used_ratio = 0.4 + ((cycle_position - 0.25) / 0.25) * 0.15
-        swap_used_ratio = 0.1 + ((cycle_position - 0.25) / 0.25) * 0.15  # 10-25% swap
-    elif cycle_position < 0.75:
-        # High pressure phase - significant swap usage
-        used_ratio = 0.55 + ((cycle_position - 0.5) / 0.25) * 0.15
-        swap_used_ratio = 0.25 + ((cycle_position - 0.5) / 0.25) * 0.25  # 25-50% swap
-    else:
-        # Critical pressure phase - heavy swap usage
-        used_ratio = 0.7 + ((cycle_position - 0.75) / 0.25) * 0.15
-        swap_used_ratio = 0.5 + ((cycle_position - 0.75) / 0.25) * 0.3  # 50-80% swap
-    
-    # Add some random variation (±2%)
-    used_ratio += (random.random() - 0.5) * 0.04
-    used_ratio = max(0.25, min(0.9, used_ratio))  # Clamp between 25% and 90%
-    
-    # Add slight variation to swap usage for more realistic demo
-    swap_used_ratio += (random.random() - 0.5) * 0.03
-    swap_used_ratio = max(0.05, min(0.85, swap_used_ratio))  # Clamp between 5% and 85%
-    
-    used_mb = int(total_mb * used_ratio)
-    available_mb = total_mb - used_mb
-    
-    # Swap: 4GB total
-    swap_total_mb = 4096
-    swap_used_mb = int(swap_total_mb * swap_used_ratio)
-    swap_free_mb = swap_total_mb - swap_used_mb
-    
-    return {
-        "MemTotal": total_mb * 1024,  # Convert to KB
-        "MemAvailable": available_mb * 1024,
-        "SwapTotal": swap_total_mb * 1024,
-        "SwapFree": swap_free_mb * 1024,
-    }
+    values = {"available_ratio": available_mb / total_mb}
+    for level in ("critical", "high", "medium"):
+        if rule_matches(f"memory-pressure-{level}", values):
+            return level
+    return "low"
+
+def advance_demo() -> synthetic.Batch:
+    """The demo node at DEMO_TICKS_PER_S samples per second while it is watched."""
+    global demo_batch, demo_start
+    now = time.monotonic()
+    tick = 1 + int((now - demo_start) * DEMO_TICKS_PER_S)
+    if tick - demo_cluster.tick > DEMO_MAX_CATCHUP:
+        # Nobody asked for a while: resume from here rather than replay the gap on the loop
+        tick = demo_cluster.tick + DEMO_MAX_CATCHUP
+        demo_start = now - (tick - 1) / DEMO_TICKS_PER_S
+    demo_batch = demo_cluster.advance_to(tick) or demo_batch
+    return demo_batch
+
+def build_stats(meminfo: Dict[str, int], swappiness: int, cache_pressure: int) -> MemoryStats:
+    """MemoryStats from /proc/meminfo keys (kB) and the two sysctls."""
+    total = meminfo.get("MemTotal", 0) // 1024
+    available = meminfo.get("MemAvailable", 0) // 1024
+    used = total - available
+    swap_total = meminfo.get("SwapTotal", 0) // 1024
+    swap_free = meminfo.get("SwapFree", 0) // 1024
+    swap_used = swap_total - swap_free
+
+    return MemoryStats(
+        total_mb=total,
+        available_mb=available,
+        used_mb=used,
+        swap_total_mb=swap_total,
+        swap_used_mb=swap_used,
+        swap_free_mb=swap_free,
+        swappiness=swappiness,
+        cache_pressure=cache_pressure,
+        pressure_level=calculate_pressure(available, total)
+    )
+
+def stats_from_batch(batch: synthetic.Batch, i: int) -> MemoryStats:
+    return build_stats(batch.meminfo(i), batch.sysctl(i, "vm.swappiness"), batch.sysctl(i, "vm.vfs_cache_pressure"))
+
+def current_stats(demo: bool = False, node: Optional[str] = None) -> MemoryStats:
+    """Stats of this node, the demo node, or a simulated node (MEMORY_SOURCE=synthetic)."""
+    if demo:
+        return stats_from_batch(advance_demo(), 0)
+    if simulated is not None:
+        if simulated_batch is None:
+            raise HTTPException(status_code=503, detail="No synthetic sample yet")
+        i = simulated_index.get(node or simulated_batch.ids[0])
+        if i is None:
+            raise HTTPException(status_code=404, detail=f"Unknown node {node}")
+        return stats_from_batch(simulated_batch, i)
+    if node:
+        raise HTTPException(status_code=400, detail="node requires MEMORY_SOURCE=synthetic")
+    return build_stats(parse_meminfo(), get_sysctl_value("vm.swappiness"),
+                       get_sysctl_value("vm.vfs_cache_pressure"))
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    return {"status": "healthy", "cache": cache.stats()}
 
 @app.get("/api/memory/stats", response_model=MemoryStats)
-async def get_memory_stats(demo: Optional[bool] = Query(False, description="Use demo data instead of real system data")):
+async def get_memory_stats(
+    demo: Optional[bool] = Query(False, description="Use demo data instead of real system data"),
+    node: Optional[str] = Query(None, description="Simulated node (MEMORY_SOURCE=synthetic)"),
+):
     """Gather current memory statistics."""
     try:
-        if demo:
-            logger.info("Generating demo data")
-            meminfo = generate_demo_data()
-            # Demo mode uses optimized settings
-            swappiness = 10
-            cache_pressure = 50
-        else:
-            meminfo = parse_meminfo()
-            swappiness = get_sysctl_value("vm.swappiness")
-            cache_pressure = get_sysctl_value("vm.vfs_cache_pressure")
-        
-        total = meminfo.get("MemTotal", 0) // 1024
-        available = meminfo.get("MemAvailable", 0) // 1024
-        used = total - available
-        swap_total = meminfo.get("SwapTotal", 0) // 1024
-        swap_free = meminfo.get("SwapFree", 0) // 1024
-        swap_used = swap_total - swap_free
-        
-        return MemoryStats(
-            total_mb=total,
-            available_mb=available,
-            used_mb=used,
-            swap_total_mb=swap_total,
-            swap_used_mb=swap_used,
-            swap_free_mb=swap_free,
-            swappiness=swappiness,
-            cache_pressure=cache_pressure,
-            pressure_level=calculate_pressure(available, total)
-        )
+        return current_stats(demo, node)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error gathering memory stats: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/memory/nodes")
+async def get_simulated_nodes(top: int = Query(20, ge=1, le=1000, description="Nodes with the least available memory")):
+    """MEMORY_SOURCE=synthetic: the latest tick across all simulated nodes."""
+    if simulated is None:
+        raise HTTPException(status_code=404, detail="Not running MEMORY_SOURCE=synthetic")
+    batch = simulated_batch
+    if batch is None:
+        return {"tick": 0, "nodes": 0, "scenario": SYNTHETIC_SCENARIO, "seed": SYNTHETIC_SEED, "top": []}
+    columns = batch.columns
+    total, available = columns["total_mb"], columns["available_mb"]
+    order = sorted(range(len(batch.ids)), key=lambda i: available[i] / total[i])[:top]
+    levels: Dict[str, int] = {}
+    for i in range(len(batch.ids)):
+        level = calculate_pressure(int(available[i]), int(total[i]))
+        levels[level] = levels.get(level, 0) + 1
+    return {
+        "tick": batch.tick,
+        "nodes": len(batch.ids),
+        "scenario": SYNTHETIC_SCENARIO,
+        "seed": SYNTHETIC_SEED,
+        "pressure_levels": levels,
+        "oom_kills": sum(columns["oom_kills"]),
+        "top": [{"node": batch.ids[i], "scenario": simulated.scenarios[i],
+                 **{name: columns[name][i] for name in synthetic.COLUMNS}} for i in order],
+    }
+
+@app.get("/api/memory/history")
+async def get_memory_history(
+    since: Optional[float] = Query(None, description="Unix timestamp (inclusive)"),
+    until: Optional[float] = Query(None, description="Unix timestamp (inclusive)"),
+    step: int = Query(0, description="0 for raw samples, 60 or 3600 for mean/max buckets"),
+):
+    """Memory samples kept across restarts."""
+    if history is None:
+        raise HTTPException(status_code=404, detail="History disabled (HISTORY_DIR not writable)")
+    try:
+        return tsdb.query(history, since, until, step)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.get("/api/memory/recommendations")
-async def get_recommendations(demo: Optional[bool] = Query(False, description="Use demo data instead of real system data")):
+async def get_recommendations(
+    demo: Optional[bool] = Query(False, description="Use demo data instead of real system data"),
+    node: Optional[str] = Query(None, description="Simulated node (MEMORY_SOURCE=synthetic)"),
+):
     """Provide swappiness recommendations based on current state."""
-    stats = await get_memory_stats(demo=demo)
+    stats = await get_memory_stats(demo=demo, node=node)
+    values = node_values(stats)
     
     recommendations = []
     
-    if stats.swappiness > 30:
+    if rule_matches("swappiness-high", values):
         recommendations.append({
             "severity": "warning",
             "message": f"Swappiness is {stats.swappiness}. Recommend 10-20 for 8GB systems.",
             "command": "sudo sysctl vm.swappiness=10"
         })
     
-    if stats.swap_total_mb == 0:
+    if rule_matches("swap-missing", values):
         recommendations.append({
             "severity": "critical",
             "message": "No swap configured. System vulnerable to OOM kills.",
             "command": "sudo fallocate -l 4G /swapfile && sudo mkswap /swapfile && sudo swapon /swapfile"
         })
-    elif stats.swap_total_mb < stats.total_mb * 0.5:
+    elif rule_matches("swap-undersized", values):
         recommendations.append({
             "severity": "warning",
             "message": f"Swap ({stats.swap_total_mb}MB) is less than 50% of RAM. Recommend 4GB minimum.",
@@ -4,7 +4,7 @@ set -euo pipefail
 cd "$(dirname "$0")/.."
 
 echo "Building backend image..."
-docker build -t localhost:5000/memory-monitor-backend:latest ./backend
+DOCKER_BUILDKIT=1 docker build --build-context nanoidp=../../nanoidp -t localhost:5000/memory-monitor-backend:latest ./backend
 docker push localhost:5000/memory-monitor-backend:latest
 
 echo "Building frontend image..."
@@ -2,15 +2,43 @@
 CNI Health Monitor - FastAPI Backend
 Memory Target: <30MB
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from kubernetes import client, config
+from pathlib import Path
 from pydantic import BaseModel
-from typing import List, Optional
-import subprocess
-import json
+import asyncio
+import os
+import sys
 
-app = FastAPI(title="CNI Health Monitor")
+try:
+    from nanoidp import httpcache, kube, telemetry
+except ImportError:  # running from a checkout: shared library lives at the repo root
+    sys.path.append(str(Path(__file__).resolve().parents[4]))
+    from nanoidp import httpcache, kube, telemetry
+
+# One pooled kubernetes_asyncio client; each API request times out after
+# K8S_TIMEOUT_S and a health check's concurrent LISTs are cancelled together
+# after K8S_DEADLINE_S, so a slow API server cannot hold a request open
+K8S_POOL_MAXSIZE = int(os.getenv("K8S_POOL_MAXSIZE", "4"))
+K8S_TIMEOUT_S = float(os.getenv("K8S_TIMEOUT_S", "10"))
+K8S_DEADLINE_S = float(os.getenv("K8S_DEADLINE_S", "20"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The client is built on the first health check; close it if one was
+    yield
+    await kube.close()
+
+app = FastAPI(title="CNI Health Monitor", lifespan=lifespan)
+
+# Each health poll LISTs pods and policies; share one answer per TTL and
+# revalidate with ETag/304 (nanoidp.httpcache, CACHE_TTL overrides)
+cache = httpcache.ResponseCache({"/api/cni/health": 10})
+app.add_middleware(httpcache.CacheMiddleware, cache=cache)
+
+# /metrics and /debug/runtime: is the <30MB target met? (nanoidp.telemetry)
+telemetry.install(app, "cni-monitor", memory_budget_mb=30)
 
 # Enable CORS for React frontend
 app.add_middleware(
@@ -20,14 +48,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Load K8s config
-try:
-    config.load_incluster_config()
-except:
-    config.load_kube_config()
-
-v1 = client.CoreV1Api()
-
 class CiliumStatus(BaseModel):
     agent_ready: bool
     operator_ready: bool
@@ -45,22 +65,38 @@ class CNIMetrics(BaseModel):
 
 @app.get("/")
 async def root():
-    return {"service": "CNI Health Monitor", "version": "1.0"}
+    return {"service": "CNI Health Monitor", "version": "1.0", "cache": cache.stats()}
 
 @app.get("/api/cni/health", response_model=CNIMetrics)
 async def get_cni_health():
     """Get Cilium CNI health and memory metrics"""
     try:
-        # Get Cilium pods
-        cilium_agents = v1.list_namespaced_pod(
-            namespace="kube-system",
-            label_selector="k8s-app=cilium"
-        ).items
-        
-        cilium_operator = v1.list_namespaced_pod(
-            namespace="kube-system",
-            label_selector="name=cilium-operator"
-        ).items
+        # Shared K8s client, built on first use (in-cluster config or kubeconfig)
+        from kubernetes_asyncio import client
+        api_client = await kube.async_api_client(pool_maxsize=K8S_POOL_MAXSIZE)
+        v1 = client.CoreV1Api(api_client)
+        networking_v1 = client.NetworkingV1Api(api_client)
+
+        # Cilium agent and operator pods and the network policies, concurrently,
+        # as plain JSON (no model objects built on the loop)
+        agents, operators, policies = await kube.gather(
+            kube.get_json(
+                v1.list_namespaced_pod,
+                K8S_TIMEOUT_S,
+                namespace="kube-system",
+                label_selector="k8s-app=cilium",
+            ),
+            kube.get_json(
+                v1.list_namespaced_pod,
+                K8S_TIMEOUT_S,
+                namespace="kube-system",
+                label_selector="name=cilium-operator",
+            ),
+            kube.get_json(networking_v1.list_network_policy_for_all_namespaces, K8S_TIMEOUT_S),
+            timeout=K8S_DEADLINE_S,
+        )
+        cilium_agents = agents.get("items") or []
+        cilium_operator = operators.get("items") or []
         
         if not cilium_agents:
             raise HTTPException(status_code=404, detail="Cilium agents not found")
@@ -73,7 +109,7 @@ async def get_cni_health():
             # Try to get actual usage from metrics API
             try:
                 # Fallback: extract from resource limits
-                limits = agent.spec.containers[0].resources.limits
+                limits = agent["spec"]["containers"][0]["resources"].get("limits")
                 if limits and "memory" in limits:
                     mem_str = limits["memory"]
                     agent_memory += _parse_memory(mem_str)
@@ -82,25 +118,21 @@ async def get_cni_health():
         
         if cilium_operator:
             try:
-                limits = cilium_operator[0].spec.containers[0].resources.limits
+                limits = cilium_operator[0]["spec"]["containers"][0]["resources"].get("limits")
                 if limits and "memory" in limits:
                     operator_memory = _parse_memory(limits["memory"])
             except:
                 operator_memory = 60
         
         # Get Cilium status via exec (simplified - in production use CRDs)
-        agent_ready = all(pod.status.phase == "Running" for pod in cilium_agents)
-        operator_ready = all(pod.status.phase == "Running" for pod in cilium_operator)
-        
-        # Get network policies count
-        networking_v1 = client.NetworkingV1Api()
-        policies = networking_v1.list_network_policy_for_all_namespaces()
+        agent_ready = all(pod.get("status", {}).get("phase") == "Running" for pod in cilium_agents)
+        operator_ready = all(pod.get("status", {}).get("phase") == "Running" for pod in cilium_operator)
         
         return CNIMetrics(
             cni_type="cilium",
             total_memory_mb=agent_memory + operator_memory,
             agent_count=len(cilium_agents),
-            policy_count=len(policies.items),
+            policy_count=len(policies.get("items") or ()),
             status=CiliumStatus(
                 agent_ready=agent_ready,
                 operator_ready=operator_ready,
@@ -111,6 +143,10 @@ async def get_cni_health():
             )
         )
         
+    except HTTPException:
+        raise
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"Kubernetes API did not answer within {K8S_DEADLINE_S}s")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
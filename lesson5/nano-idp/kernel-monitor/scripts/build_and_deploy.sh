@@ -10,7 +10,7 @@ if ! docker ps | grep -q k3d-nano-cluster-registry; then
 fi
 
 # Build image
-docker build -t localhost:5000/kernel-monitor:latest .
+DOCKER_BUILDKIT=1 docker build --build-context nanoidp="$(dirname "$0")/../../../../nanoidp" -t localhost:5000/kernel-monitor:latest .
 
 # Push to local registry
 docker push localhost:5000/kernel-monitor:latest
@@ -4,13 +4,117 @@ Tracks vm.max_map_count utilization across processes.
 Resource Budget: <60MB memory, <1% CPU
 """
 from pathlib import Path
-from typing import Dict, List, Optional
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import PlainTextResponse
+from typing import Dict, List, Optional, Tuple
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse
+from contextlib import asynccontextmanager
 import asyncio
+import os
+import socket
+import sys
+import threading
 from datetime import datetime
 
-app = FastAPI(title="Kernel Map Monitor", version="1.0.0")
+try:
+    from nanoidp import alerts, delta, httpcache, procfs, telemetry, tsdb
+except ImportError:  # running from a checkout: shared library lives at the repo root
+    sys.path.append(str(Path(__file__).resolve().parents[4]))
+    from nanoidp import alerts, delta, httpcache, procfs, telemetry, tsdb
+
+# procfs mount point; point it at a synthetic tree for benchmarks
+PROC_ROOT = os.getenv("PROC_ROOT", "/proc")
+
+# Persistent history (nanoidp.tsdb); a full /proc scan per sample, so sparser
+HISTORY_INTERVAL_S = float(os.getenv("HISTORY_INTERVAL_S", "15"))
+HISTORY_FIELDS = ("total_maps", "max_map_count", "utilization_percent")
+history: Optional[tsdb.TimeSeries] = None
+
+# Alert rules (nanoidp.alerts); ALERT_RULES=<json file> overrides them by name.
+# max_map_count is a per-process limit, so the process rule is the one that
+# predicts mmap failures; the node rule keeps the dashboard's status.
+DEFAULT_ALERT_RULES = [
+    {"name": "map-utilization-high", "metric": "utilization_percent", "op": ">", "threshold": 80,
+     "clear": 75, "for_s": 60, "severity": "warning",
+     "summary": "Memory maps at {value:.1f}% of vm.max_map_count"},
+    {"name": "process-maps-near-limit", "scope": "processes", "metric": "limit_percent", "op": ">",
+     "threshold": 80, "clear": 75, "for_s": 30, "severity": "critical",
+     "summary": "pid {entity} has {value:.1f}% of vm.max_map_count mappings"},
+]
+alert_engine = alerts.RuleEngine.from_env(DEFAULT_ALERT_RULES)
+
+# Per-pod and per-process map counts of every sample, served as deltas to the
+# cluster aggregator (nanoidp.delta)
+NODE_NAME = os.getenv("NODE_NAME") or socket.gethostname()
+snapshots = delta.DeltaLog({
+    "pods": ("qos", "map_count", "processes", "max_process_maps"),
+    "processes": ("map_count", "pod_uid", "container_id"),
+})
+node_summary: Dict = {}
+
+# Summary and per-pod totals of the last sample: /metrics/maps, /metrics and
+# /metrics/maps/pods answer from them rather than scanning all of /proc per request
+last_summary: Optional[Dict] = None
+last_pods: Optional[Dict] = None
+
+# A scan prunes the shared attribution cache to the pids it saw, so two
+# overlapping scans would drop each other's pids (counted as "host"): one at a time
+scan_lock = threading.Lock()
+
+def snapshot_tables(counts: Dict[int, int], pods_data: Dict) -> Dict[str, Dict[str, Tuple]]:
+    node_summary["host"] = pods_data["host"]
+    processes = {}
+    for pid, map_count in counts.items():
+        pod = pods.get(pid)
+        processes[str(pid)] = (map_count, pod.uid, short_id(pod.container_id)) if pod else (map_count, None, None)
+    return {
+        "pods": {p["pod_uid"]: (p["qos"], p["map_count"], p["processes"], p["max_process_maps"])
+                 for p in pods_data["pods"]},
+        "processes": processes,
+    }
+
+async def sample_node() -> List[float]:
+    """One tick: a /proc scan (in a thread), alert evaluation, snapshot tables and history sample."""
+    global last_summary, last_pods
+    def scan():
+        with scan_lock:
+            counts = count_maps()
+            pods_data = aggregate_pods(counts)
+            return counts, summarize(counts), pods_data, snapshot_tables(counts, pods_data)
+    counts, data, pods_data, tables = await asyncio.get_running_loop().run_in_executor(None, scan)
+    last_summary = data
+    last_pods = {"timestamp": data["timestamp"], "total_maps": data["total_maps"], **pods_data}
+    snapshots.update(tables)
+    node_summary.update((field, data[field]) for field in HISTORY_FIELDS)
+    alert_engine.observe("node", ["node"], {"utilization_percent": [data["utilization_percent"]]})
+    limit = data["max_map_count"] or 1
+    alert_engine.observe("processes", [str(pid) for pid in counts],
+                         {"limit_percent": [count * 100 / limit for count in counts.values()]})
+    return [data[field] for field in HISTORY_FIELDS]
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global history
+    async with tsdb.recording("maps", HISTORY_FIELDS, sample_node, HISTORY_INTERVAL_S) as series:
+        history = series
+        yield
+        history = None
+
+app = FastAPI(title="Kernel Map Monitor", version="1.0.0", lifespan=lifespan)
+app.include_router(alerts.router(alert_engine))
+
+# The map counts and history only change once per sample
+cache = httpcache.ResponseCache({
+    "/metrics/maps": HISTORY_INTERVAL_S,
+    "/metrics/maps/pods": HISTORY_INTERVAL_S,
+    "/metrics/maps/history": HISTORY_INTERVAL_S,
+    "/api/alerts": 1,
+})
+app.add_middleware(httpcache.CacheMiddleware, cache=cache)
+
+# Checks the budget above: self metrics are appended to /metrics, details on
+# /debug/runtime (nanoidp.telemetry)
+instrumentation = telemetry.install(app, "kernel-monitor", memory_budget_mb=60, cpu_budget_percent=1,
+                                    metrics_path=None)
 
 class MapMonitor:
     """Efficient memory map counter using direct /proc access."""
@@ -18,12 +122,8 @@ class MapMonitor:
     @staticmethod
     def get_process_maps(pid: int) -> int:
         """Count memory mappings for a process."""
-        maps_file = Path(f"/proc/{pid}/maps")
         try:
-            if not maps_file.exists():
-                return 0
-            with maps_file.open() as f:
-                return sum(1 for _ in f)
+            return procfs.count_lines(f"{PROC_ROOT}/{pid}/maps")
         except (PermissionError, FileNotFoundError, ProcessLookupError):
             return 0
     
@@ -31,58 +131,120 @@ class MapMonitor:
     def get_current_limit() -> int:
         """Read current kernel max_map_count limit."""
         try:
-            return int(Path("/proc/sys/vm/max_map_count").read_text().strip())
+            return procfs.parse_int(procfs.read(f"{PROC_ROOT}/sys/vm/max_map_count"))
         except (FileNotFoundError, ValueError):
             return 65530  # Default fallback
     
     @staticmethod
     def get_process_info(pid: int) -> Optional[str]:
         """Get process command line."""
-        cmdline_file = Path(f"/proc/{pid}/cmdline")
         try:
-            cmdline = cmdline_file.read_text().replace('\x00', ' ').strip()
-            return cmdline[:100] if cmdline else None
+            cmdline = procfs.read_once(f"{PROC_ROOT}/{pid}/cmdline", 256).replace(b'\x00', b' ').strip()
+            return cmdline[:100].decode(errors="replace") if cmdline else None
         except (PermissionError, FileNotFoundError, ProcessLookupError):
             return None
 
 monitor = MapMonitor()
 
+class PodAttribution:
+    """
+    pid -> pod (uid, QoS class) and container, parsed from /proc/<pid>/cgroup
+    and cached by (pid, starttime) so a reused pid is parsed again.
+
+    The /proc/<pid> inode number comes free with the directory scan, and
+    procfs gives a new process a new inode, so an unchanged inode skips the
+    stat read as well. A changed inode costs one stat read; cgroup is only
+    re-parsed when starttime differs. A process moved to another cgroup
+    keeps its first attribution.
+    """
+
+    def __init__(self):
+        self._cache: Dict[int, Tuple[int, int, Optional[procfs.PodCgroup]]] = {}
+        self.hits = 0
+        self.revalidated = 0
+        self.parsed = 0
+
+    def resolve(self, pid: int, inode: int) -> Optional[procfs.PodCgroup]:
+        entry = self._cache.get(pid)
+        if entry is not None and entry[0] == inode:
+            self.hits += 1
+            return entry[2]
+        try:
+            starttime = procfs.parse_starttime(procfs.read_once(f"{PROC_ROOT}/{pid}/stat", 1024))
+            if entry is not None and entry[1] == starttime:
+                self.revalidated += 1
+                pod = entry[2]
+            else:
+                self.parsed += 1
+                pod = procfs.parse_pod_cgroup(procfs.read_once(f"{PROC_ROOT}/{pid}/cgroup", 4096))
+        except (OSError, ValueError, IndexError):
+            return None
+        self._cache[pid] = (inode, starttime, pod)
+        return pod
+
+    def get(self, pid: int) -> Optional[procfs.PodCgroup]:
+        entry = self._cache.get(pid)
+        return entry[2] if entry else None
+
+    def prune(self, live: Dict[int, int]) -> None:
+        """Forget processes that were not in the last scan."""
+        for pid in list(self._cache):
+            if pid not in live:
+                self._cache.pop(pid, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {"cached": len(self._cache), "hits": self.hits, "revalidated": self.revalidated,
+                "parsed": self.parsed}
+
+pods = PodAttribution()
+
 @app.get("/health")
 async def health_check() -> Dict:
     """Health check endpoint."""
-    return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
+    return {"status": "healthy", "timestamp": datetime.utcnow().isoformat(), "cache": cache.stats()}
 
-@app.get("/metrics/maps")
-async def get_metrics() -> Dict:
-    """
-    Aggregate memory map statistics.
-    Returns current utilization and top consumers.
-    """
-    total_maps = 0
-    process_data: List[Dict] = []
+def count_maps(attribute: bool = True) -> Dict[int, int]:
+    """Map count of every process that has any; attribute=True also resolves their pods."""
+    counts: Dict[int, int] = {}
     
     # Scan all processes
-    for pid_dir in Path("/proc").glob("[0-9]*"):
+    for entry in os.scandir(PROC_ROOT):
+        if not entry.name.isdigit():
+            continue
         try:
-            pid = int(pid_dir.name)
+            pid = int(entry.name)
             map_count = monitor.get_process_maps(pid)
-            
-            if map_count == 0:
-                continue
-            
-            total_maps += map_count
-            
-            # Only track significant processes (>500 maps)
-            if map_count > 500:
-                cmdline = monitor.get_process_info(pid)
-                if cmdline:
-                    process_data.append({
-                        "pid": pid,
-                        "command": cmdline,
-                        "map_count": map_count
-                    })
+            if map_count:
+                counts[pid] = map_count
+                if attribute:
+                    pods.resolve(pid, entry.inode())
         except (ValueError, OSError):
             continue
+    if attribute:
+        pods.prune(counts)
+    return counts
+
+def summarize(counts: Dict[int, int]) -> Dict:
+    """
+    Aggregate memory map statistics.
+    Returns current utilization and top consumers.
+    """
+    total_maps = sum(counts.values())
+    process_data: List[Dict] = []
+    
+    # Only track significant processes (>500 maps)
+    for pid, map_count in counts.items():
+        if map_count > 500:
+            cmdline = monitor.get_process_info(pid)
+            if cmdline:
+                pod = pods.get(pid)
+                process_data.append({
+                    "pid": pid,
+                    "command": cmdline,
+                    "map_count": map_count,
+                    "pod_uid": pod.uid if pod else None,
+                    "container_id": short_id(pod.container_id) if pod else None,
+                })
     
     # Get kernel limit
     max_limit = monitor.get_current_limit()
@@ -91,15 +253,103 @@ async def get_metrics() -> Dict:
     # Sort by map count
     top_consumers = sorted(process_data, key=lambda x: x["map_count"], reverse=True)[:15]
     
+    status_rule = alert_engine.rules.get("map-utilization-high")
     return {
         "timestamp": datetime.utcnow().isoformat(),
         "total_maps": total_maps,
         "max_map_count": max_limit,
         "utilization_percent": round(utilization, 2),
-        "status": "warning" if utilization > 80 else "ok",
+        "status": "warning" if status_rule and status_rule.test(utilization) else "ok",
         "top_consumers": top_consumers
     }
 
+def scan_maps() -> Dict:
+    with scan_lock:
+        return summarize(count_maps())
+
+def short_id(container_id: Optional[str]) -> Optional[str]:
+    """Container id as crictl/docker print it."""
+    return container_id[:13] if container_id else None
+
+def aggregate_pods(counts: Dict[int, int]) -> Dict:
+    """Map counts per pod and per container; processes outside kubepods go to "host"."""
+    by_pod: Dict[str, Dict] = {}
+    host = {"map_count": 0, "processes": 0, "max_process_maps": 0}
+    for pid, map_count in counts.items():
+        pod = pods.get(pid)
+        if pod is None:
+            totals = host
+        else:
+            entry = by_pod.get(pod.uid)
+            if entry is None:
+                entry = by_pod[pod.uid] = {"pod_uid": pod.uid, "qos": pod.qos, "map_count": 0,
+                                           "processes": 0, "max_process_maps": 0, "containers": {}}
+            container = short_id(pod.container_id)
+            totals = entry["containers"].get(container)
+            if totals is None:
+                totals = entry["containers"][container] = {"container_id": container, "map_count": 0,
+                                                           "processes": 0, "max_process_maps": 0}
+            entry["map_count"] += map_count
+            entry["processes"] += 1
+            entry["max_process_maps"] = max(entry["max_process_maps"], map_count)
+        totals["map_count"] += map_count
+        totals["processes"] += 1
+        totals["max_process_maps"] = max(totals["max_process_maps"], map_count)
+    for entry in by_pod.values():
+        entry["containers"] = sorted(entry["containers"].values(), key=lambda c: c["map_count"], reverse=True)
+    return {"pods": sorted(by_pod.values(), key=lambda p: p["map_count"], reverse=True), "host": host}
+
+@app.get("/metrics/maps")
+async def get_metrics() -> Dict:
+    """Map-count utilization and top consumers as of the last sample (scanned in a thread until then)."""
+    if last_summary is None:
+        return await asyncio.get_running_loop().run_in_executor(None, scan_maps)
+    return last_summary
+
+@app.get("/metrics/maps/pods")
+async def get_pod_metrics(top: int = Query(20, ge=1, le=1000, description="Number of pods to return")) -> Dict:
+    """Map counts aggregated per pod and container as of the last sample (scanned in a thread until then)."""
+    data = last_pods
+    if data is None:
+        def scan():
+            with scan_lock:
+                counts = count_maps()
+                return {"timestamp": datetime.utcnow().isoformat(), "total_maps": sum(counts.values()),
+                        **aggregate_pods(counts)}
+        data = await asyncio.get_running_loop().run_in_executor(None, scan)
+    return {
+        "timestamp": data["timestamp"],
+        "total_maps": data["total_maps"],
+        "pod_count": len(data["pods"]),
+        "pods": data["pods"][:top],
+        "host": data["host"],
+        "attribution": pods.stats(),
+    }
+
+@app.get("/metrics/maps/snapshot")
+async def get_snapshot(
+    since: Optional[int] = Query(None, description="Last seq applied; omit for a full snapshot"),
+    epoch: Optional[str] = Query(None, description="Epoch the seq belongs to"),
+) -> JSONResponse:
+    """Pods and processes changed after `since`, as of the last sample (for the cluster aggregator)."""
+    snapshot = snapshots.since(since, epoch)
+    snapshot.update(node=NODE_NAME, interval_s=HISTORY_INTERVAL_S, summary=node_summary)
+    return JSONResponse(snapshot)
+
+@app.get("/metrics/maps/history")
+async def get_metrics_history(
+    since: Optional[float] = Query(None, description="Unix timestamp (inclusive)"),
+    until: Optional[float] = Query(None, description="Unix timestamp (inclusive)"),
+    step: int = Query(0, description="0 for raw samples, 60 or 3600 for mean/max buckets"),
+) -> Dict:
+    """Map-count samples kept across restarts."""
+    if history is None:
+        raise HTTPException(status_code=404, detail="History disabled (HISTORY_DIR not writable)")
+    try:
+        return tsdb.query(history, since, until, step)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.get("/metrics", response_class=PlainTextResponse)
 async def prometheus_metrics() -> str:
     """
@@ -123,7 +373,8 @@ vm_maps_utilization_percent {data['utilization_percent']}
 # HELP vm_maps_status Status indicator (1=ok, 0=warning)
 # TYPE vm_maps_status gauge
 vm_maps_status {1 if data['status'] == 'ok' else 0}
-"""
+
+""" + instrumentation.render()
 
 @app.get("/sysctl/apply")
 async def apply_sysctl() -> Dict:
@@ -1,14 +1,156 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
+from contextlib import asynccontextmanager
 from pathlib import Path
-import re
+import asyncio
 import os
-from typing import Optional
+import socket
+import sys
+from typing import Dict, List, Optional, Tuple
 from pydantic import BaseModel
 
-app = FastAPI(title="cgroup v2 Monitor")
+try:
+    from nanoidp import alerts, delta, httpcache, procfs, telemetry, tsdb
+except ImportError:  # running from a checkout: shared library lives at the repo root
+    sys.path.append(str(Path(__file__).resolve().parents[4]))
+    from nanoidp import alerts, delta, httpcache, procfs, telemetry, tsdb
+
+# cgroup v2 mount point; point it at a synthetic tree for benchmarks
+CGROUP_ROOT = Path(os.getenv("CGROUP_ROOT", "/sys/fs/cgroup"))
+
+# Persistent history (nanoidp.tsdb) of the whole kubepods cgroup
+HISTORY_INTERVAL_S = float(os.getenv("HISTORY_INTERVAL_S", "5"))
+HISTORY_FIELDS = ("current_bytes", "some_avg10", "some_avg60", "full_avg10", "full_avg60")
+history: Optional[tsdb.TimeSeries] = None
+
+# Alert rules (nanoidp.alerts), evaluated over every pod cgroup each tick and
+# used for health_status; ALERT_RULES=<json file> overrides them by name
+DEFAULT_ALERT_RULES = [
+    {"name": "pod-memory-stall-critical", "scope": "pods", "metric": "full_avg10", "op": ">",
+     "threshold": 10, "clear": 8, "for_s": 15, "severity": "critical",
+     "summary": "{entity}: memory full stall {value:.1f}% (avg10)"},
+    {"name": "pod-memory-stall", "scope": "pods", "metric": "full_avg10", "op": ">",
+     "threshold": 5, "clear": 3, "for_s": 30, "severity": "warning",
+     "summary": "{entity}: memory full stall {value:.1f}% (avg10)"},
+    {"name": "pod-memory-near-limit", "scope": "pods", "metric": "limit_ratio", "op": ">",
+     "threshold": 0.9, "clear": 0.85, "for_s": 60, "severity": "warning",
+     "summary": "{entity}: memory at {value:.0%} of memory.high/max"},
+]
+alert_engine = alerts.RuleEngine.from_env(DEFAULT_ALERT_RULES)
+
+# Per-pod memory of every sample, served as deltas to the cluster aggregator
+# (nanoidp.delta); values are rounded so an idle pod does not show as changed
+NODE_NAME = os.getenv("NODE_NAME") or socket.gethostname()
+snapshots = delta.DeltaLog({"pods": ("qos", "current_mb", "limit_ratio", "full_avg10")})
+node_summary: Dict = {}
+
+# The per-pod files the scan reads. Their descriptors stay open between scans
+# in a cache of our own, for as many pods as it can hold without cycling (an
+# LRU smaller than the working set would evict and reopen everything each
+# scan); the rest are opened per read. A pod's files are dropped once its
+# cgroup is gone.
+POD_FILES = ("memory.current", "memory.max", "memory.high", "memory.pressure")
+pod_files = procfs.FileCache()
+pod_paths: Dict[str, str] = {}
+
+def read_pod_files(path: str, cached: bool) -> List[bytes]:
+    read = pod_files.read if cached else procfs.read_once
+    return [read(f"{path}/{name}") for name in POD_FILES]
+
+def discard_pod_files(path: str) -> None:
+    for name in POD_FILES:
+        pod_files.discard(f"{path}/{name}")
+
+def limit_ratio(current: int, max_bytes: Optional[int], high_bytes: Optional[int]) -> Optional[float]:
+    """memory.current over memory.high (else memory.max); None for a pod with neither."""
+    limit = high_bytes or max_bytes
+    return current / limit if limit else None
+
+def node_sample() -> Optional[List[float]]:
+    """kubepods memory.current and PSI; None when there is no kubepods cgroup."""
+    for name in ("kubepods", "kubepods.slice"):  # cgroupfs or systemd driver
+        base = CGROUP_ROOT / name
+        try:
+            current = procfs.parse_int(procfs.read(f"{base}/memory.current"))
+            psi = procfs.parse_pressure(procfs.read(f"{base}/memory.pressure"))
+            break
+        except (OSError, ValueError):
+            continue
+    else:
+        return None
+    some, full = psi.get("some", {}), psi.get("full", {})
+    return [current, some.get("avg10", 0.0), some.get("avg60", 0.0),
+            full.get("avg10", 0.0), full.get("avg60", 0.0)]
+
+def pod_frame() -> Tuple[List[str], Dict[str, List[float]], Dict[str, Tuple]]:
+    """
+    Pod cgroup names with their full_avg10 and limit_ratio columns, and
+    snapshot records by pod UID. Pods without memory.high/max have no
+    limit_ratio: null in their record, 0.0 in the alert column, so the
+    near-limit rules never see them.
+    """
+    ids: List[str] = []
+    stall: List[float] = []
+    ratio: List[float] = []
+    records: Dict[str, Tuple] = {}
+    pods = procfs.discover_pod_cgroups(str(CGROUP_ROOT))
+    for uid in pod_paths.keys() - pods.keys():
+        discard_pod_files(pod_paths.pop(uid))
+    cached_pods = pod_files.max_open // len(POD_FILES)
+    for i, (uid, (path, qos_class)) in enumerate(sorted(pods.items())):
+        pod_paths[uid] = path
+        try:
+            current, max_bytes, high_bytes, pressure = read_pod_files(path, i < cached_pods)
+            current = procfs.parse_int(current)
+            max_bytes = procfs.parse_limit(max_bytes)
+            high_bytes = procfs.parse_limit(high_bytes)
+            full = procfs.parse_pressure(pressure).get("full", {})
+        except (OSError, ValueError):
+            discard_pod_files(pod_paths.pop(uid))
+            continue  # pod removed mid-scan
+        ratio_value = limit_ratio(current, max_bytes, high_bytes)
+        ids.append(f"pod{uid}")
+        stall.append(full.get("avg10", 0.0))
+        ratio.append(0.0 if ratio_value is None else ratio_value)
+        records[uid] = (qos_class, current >> 20,
+                        None if ratio_value is None else round(ratio_value, 3), stall[-1])
+    return ids, {"full_avg10": stall, "limit_ratio": ratio}, records
+
+async def sample_node() -> Optional[List[float]]:
+    """One tick: pod cgroup scan (in a thread), alert evaluation, snapshot table and history sample."""
+    def scan():
+        return node_sample(), pod_frame()
+    values, (ids, columns, records) = await asyncio.get_running_loop().run_in_executor(None, scan)
+    alert_engine.observe("pods", ids, columns)
+    snapshots.update({"pods": records})
+    if values is not None:
+        node_summary.update(zip(HISTORY_FIELDS, values))
+    return values
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global history
+    async with tsdb.recording("cgroup", HISTORY_FIELDS, sample_node, HISTORY_INTERVAL_S) as series:
+        history = series
+        yield
+        history = None
+
+app = FastAPI(title="cgroup v2 Monitor", lifespan=lifespan)
+app.include_router(alerts.router(alert_engine))
+
+# The dashboard polls memory-stats every few seconds; history only changes
+# once per sample
+cache = httpcache.ResponseCache({
+    "/api/memory-stats/{pod_name}": 2,
+    "/api/history": HISTORY_INTERVAL_S,
+    "/api/alerts": 1,
+})
+app.add_middleware(httpcache.CacheMiddleware, cache=cache)
+
+# /metrics and /debug/runtime: the monitor's own cgroup budget, 64MB
+telemetry.install(app, "cgroup-monitor", memory_budget_mb=64)
 
 app.add_middleware(
     CORSMiddleware,
@@ -48,7 +190,7 @@ class MemoryStats(BaseModel):
 
 def find_pod_cgroup(pod_name: str, namespace: Optional[str] = None) -> Optional[Path]:
     """Find cgroup path for a pod in cgroup v2 unified hierarchy"""
-    base = Path("/sys/fs/cgroup/kubepods")
+    base = CGROUP_ROOT / "kubepods"
     if not base.exists():
         return None
     
@@ -71,17 +213,13 @@ def find_pod_cgroup(pod_name: str, namespace: Optional[str] = None) -> Optional[
             if not (pod_dir / "memory.current").exists():
                 continue
             
-            # Check if it has pressure data
-            pressure_file = pod_dir / "memory.pressure"
+            # Check if it has pressure data (non-zero avg10 on every line)
             has_pressure = False
-            if pressure_file.exists():
-                try:
-                    content = pressure_file.read_text()
-                    # Check if there's any non-zero pressure
-                    if "avg10=" in content and not re.search(r'avg10=0\.00', content):
-                        has_pressure = True
-                except Exception:
-                    pass
+            try:
+                psi = procfs.parse_pressure(procfs.read(str(pod_dir / "memory.pressure")))
+                has_pressure = bool(psi) and all(line["avg10"] > 0 for line in psi.values())
+            except (OSError, ValueError):
+                pass
             
             if has_pressure:
                 pods_with_pressure.append(pod_dir)
@@ -96,31 +234,33 @@ def find_pod_cgroup(pod_name: str, namespace: Optional[str] = None) -> Optional[
     
     return None
 
-def parse_pressure_file(content: str) -> PressureMetrics:
+def parse_pressure_file(content: bytes) -> PressureMetrics:
     """Parse memory.pressure PSI format"""
-    some_match = re.search(r'some avg10=(\d+\.\d+) avg60=(\d+\.\d+) avg300=\d+\.\d+ total=(\d+)', content)
-    full_match = re.search(r'full avg10=(\d+\.\d+) avg60=(\d+\.\d+)', content)
+    psi = procfs.parse_pressure(content)
+    some = psi.get("some", {})
+    full = psi.get("full", {})
     
     return PressureMetrics(
-        some_avg10=float(some_match.group(1)) if some_match else 0.0,
-        some_avg60=float(some_match.group(2)) if some_match else 0.0,
-        full_avg10=float(full_match.group(1)) if full_match else 0.0,
-        full_avg60=float(full_match.group(2)) if full_match else 0.0,
-        total_stall_time_us=int(some_match.group(3)) if some_match else 0,
+        some_avg10=some.get("avg10", 0.0),
+        some_avg60=some.get("avg60", 0.0),
+        full_avg10=full.get("avg10", 0.0),
+        full_avg60=full.get("avg60", 0.0),
+        total_stall_time_us=some.get("total", 0),
     )
 
 @app.get("/api/health")
 async def health_check():
     """Verify cgroup v2 availability"""
-    cgroup_base = Path("/sys/fs/cgroup/cgroup.controllers")
+    cgroup_base = CGROUP_ROOT / "cgroup.controllers"
     if not cgroup_base.exists():
         return {"status": "error", "message": "cgroup v2 not detected"}
     
-    controllers = cgroup_base.read_text().strip().split()
+    controllers = procfs.read(str(cgroup_base)).decode().split()
     return {
         "status": "ok",
         "cgroup_version": "v2",
-        "controllers": controllers
+        "controllers": controllers,
+        "cache": cache.stats(),
     }
 
 @app.get("/api/memory-stats/{pod_name}", response_model=MemoryStats)
@@ -130,19 +270,23 @@ async def get_memory_stats(pod_name: str, namespace: Optional[str] = None):
     if not cgroup_path:
         raise HTTPException(status_code=404, detail=f"Pod cgroup not found for '{pod_name}'. Make sure the pod exists and is running.")
     
-    # Read memory stats
-    current = int((cgroup_path / "memory.current").read_text().strip())
-    max_content = (cgroup_path / "memory.max").read_text().strip()
-    max_bytes = int(max_content) if max_content != "max" else None
-    
-    high_content = (cgroup_path / "memory.high").read_text().strip()
-    high_bytes = int(high_content) if high_content != "max" else None
+    # Read memory stats (descriptors stay open across requests). A cgroup
+    # removed since it was found fails with ENOENT, or ENODEV on a cached fd
+    try:
+        current = procfs.parse_int(procfs.read(f"{cgroup_path}/memory.current"))
+        max_bytes = procfs.parse_limit(procfs.read(f"{cgroup_path}/memory.max"))
+        high_bytes = procfs.parse_limit(procfs.read(f"{cgroup_path}/memory.high"))
+    except OSError:
+        for name in POD_FILES:
+            procfs.files.discard(f"{cgroup_path}/{name}")
+        raise HTTPException(status_code=404, detail=f"Pod cgroup for '{pod_name}' went away")
     
     # Read pressure metrics from pod cgroup
     pressure = None
-    pressure_file = cgroup_path / "memory.pressure"
-    if pressure_file.exists():
-        pressure = parse_pressure_file(pressure_file.read_text())
+    try:
+        pressure = parse_pressure_file(procfs.read(f"{cgroup_path}/memory.pressure"))
+    except OSError:
+        procfs.files.discard(f"{cgroup_path}/memory.pressure")
     
     # If pod-level pressure is all zeros, try to get QoS-level pressure as fallback
     # This shows system-level pressure that affects the pod
@@ -152,21 +296,18 @@ async def get_memory_stats(pod_name: str, namespace: Optional[str] = None):
         if parent and parent.name in ["burstable", "besteffort", "guaranteed"]:
             qos_pressure_file = parent / "memory.pressure"
             if qos_pressure_file.exists():
-                qos_pressure = parse_pressure_file(qos_pressure_file.read_text())
+                qos_pressure = parse_pressure_file(procfs.read(str(qos_pressure_file)))
                 # Use QoS pressure if it has any non-zero values (avg10, avg60, or total stall time)
                 if (qos_pressure.some_avg10 > 0.0 or qos_pressure.some_avg60 > 0.0 or 
                     qos_pressure.full_avg10 > 0.0 or qos_pressure.full_avg60 > 0.0 or
                     qos_pressure.total_stall_time_us > 0):
                     pressure = qos_pressure
     
-    # Determine health
-    health = "ok"
-    if pressure and pressure.full_avg10 > 10.0:
-        health = "critical"
-    elif pressure and pressure.full_avg10 > 5.0:
-        health = "warning"
-    elif current > (high_bytes or max_bytes or current) * 0.9:
-        health = "warning"
+    # Determine health from the pod rules (bare conditions, no for_s)
+    values = {"limit_ratio": limit_ratio(current, max_bytes, high_bytes)}  # None: no near-limit rule applies
+    if pressure:
+        values["full_avg10"] = pressure.full_avg10
+    health = alert_engine.worst(values, scope="pods")
     
     return MemoryStats(
         current_bytes=current,
@@ -176,6 +317,30 @@ async def get_memory_stats(pod_name: str, namespace: Optional[str] = None):
         health_status=health
     )
 
+@app.get("/api/snapshot")
+async def get_snapshot(
+    since: Optional[int] = Query(None, description="Last seq applied; omit for a full snapshot"),
+    epoch: Optional[str] = Query(None, description="Epoch the seq belongs to"),
+) -> JSONResponse:
+    """Pods changed after `since`, as of the last sample (for the cluster aggregator)."""
+    snapshot = snapshots.since(since, epoch)
+    snapshot.update(node=NODE_NAME, interval_s=HISTORY_INTERVAL_S, summary=node_summary)
+    return JSONResponse(snapshot)
+
+@app.get("/api/history")
+async def get_history(
+    since: Optional[float] = Query(None, description="Unix timestamp (inclusive)"),
+    until: Optional[float] = Query(None, description="Unix timestamp (inclusive)"),
+    step: int = Query(0, description="0 for raw samples, 60 or 3600 for mean/max buckets"),
+):
+    """kubepods memory and PSI samples kept across restarts."""
+    if history is None:
+        raise HTTPException(status_code=404, detail="History disabled (HISTORY_DIR not writable)")
+    try:
+        return tsdb.query(history, since, until, step)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000, log_level="info")
@@ -53,7 +53,7 @@ fi
 echo "🔨 Building Docker image..."
 cd monitor
 export DOCKER_BUILDKIT=1
-docker build -f backend/Dockerfile -t localhost:5000/cgroupv2-monitor:latest . --quiet 2>&1 | grep -E "(Step|Successfully|ERROR)" || echo "Building..."
+docker build --build-context nanoidp=../../../nanoidp -f backend/Dockerfile -t localhost:5000/cgroupv2-monitor:latest . --quiet 2>&1 | grep -E "(Step|Successfully|ERROR)" || echo "Building..."
 echo "✓ Image built"
 
 # Push image
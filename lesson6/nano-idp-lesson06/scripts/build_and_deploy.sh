@@ -12,7 +12,7 @@ fi
 # Use buildkit for faster builds
 export DOCKER_BUILDKIT=1
 cd monitor
-docker build -f backend/Dockerfile -t localhost:5000/cgroupv2-monitor:latest . --progress=plain 2>&1 | grep -E "(Step|Successfully|ERROR)" || true
+docker build --build-context nanoidp=../../../nanoidp -f backend/Dockerfile -t localhost:5000/cgroupv2-monitor:latest . --progress=plain 2>&1 | grep -E "(Step|Successfully|ERROR)" || true
 docker push localhost:5000/cgroupv2-monitor:latest 2>&1 | tail -5
 
 # Deploy to cluster (skip validation for speed)
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Async HTTP/1.1 load generator for the ingress test backend.
+Keep-alive connections, closed-loop (fixed concurrency) or open-loop
+(fixed arrival rate) modes, HDR-style latency histograms. No dependencies
+beyond the standard library, so client overhead stays out of the numbers.
+
+Open-loop latency is measured from each request's scheduled start time, so
+queueing behind a slow response is counted (no coordinated omission).
+
+Usage:
+  python loadgen.py http://127.0.0.1:8000                        # closed loop, 10 connections
+  python loadgen.py --rate 500 --duration 30 http://localhost:30080
+  python loadgen.py --host test.local http://127.0.0.1:8000 http://localhost:30080   # compare
+"""
+import argparse
+import asyncio
+import json
+import math
+import ssl
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+DEFAULT_PATHS = ("/", "/health", "/echo/bench")
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+class Histogram:
+    """
+    Log-linear latency histogram in microseconds (HDR layout, 64 sub-buckets
+    per power of two, so every recorded value is within ~1.6% of its bucket).
+    """
+
+    SUB_BITS = 6
+    SUB_COUNT = 1 << SUB_BITS
+
+    def __init__(self):
+        self.counts: List[int] = []
+        self.total = 0
+        self.min = math.inf
+        self.max = 0
+        self.sum = 0
+
+    def _index(self, value: int) -> int:
+        if value < 2 * self.SUB_COUNT:
+            return value
+        shift = value.bit_length() - self.SUB_BITS - 1
+        return shift * self.SUB_COUNT + (value >> shift)
+
+    def _upper(self, index: int) -> int:
+        if index < 2 * self.SUB_COUNT:
+            return index
+        shift = index // self.SUB_COUNT - 1
+        return ((index - shift * self.SUB_COUNT + 1) << shift) - 1
+
+    def record(self, value_us: int) -> None:
+        index = self._index(value_us)
+        if index >= len(self.counts):
+            self.counts.extend([0] * (index + 1 - len(self.counts)))
+        self.counts[index] += 1
+        self.total += 1
+        self.sum += value_us
+        self.min = min(self.min, value_us)
+        self.max = max(self.max, value_us)
+
+    def merge(self, other: "Histogram") -> None:
+        if len(other.counts) > len(self.counts):
+            self.counts.extend([0] * (len(other.counts) - len(self.counts)))
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.total += other.total
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentile(self, pct: float) -> int:
+        if not self.total:
+            return 0
+        target = max(1, math.ceil(self.total * pct / 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self._upper(index), self.max)
+        return self.max
+
+    def mean(self) -> float:
+        return self.sum / self.total if self.total else 0.0
+
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection; responses are read and discarded."""
+
+    def __init__(self, host: str, port: int, use_tls: bool, host_header: str):
+        self.host = host
+        self.port = port
+        self.use_tls = use_tls
+        self.host_header = host_header
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def connect(self) -> None:
+        context = ssl.create_default_context() if self.use_tls else None
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=context)
+
+    def close(self) -> None:
+        if self.writer:
+            self.writer.close()
+            self.writer = None
+
+    async def request(self, method: str, path: str, body: bytes = b"") -> Tuple[int, int]:
+        """Send one request and drain the response; returns (status, body bytes)."""
+        if self.writer is None:
+            await self.connect()
+        head = f"{method} {path} HTTP/1.1\r\nHost: {self.host_header}\r\n"
+        if body:
+            head += f"Content-Length: {len(body)}\r\n"
+        self.writer.write(head.encode() + b"\r\n" + body)
+
+        header = await self.reader.readuntil(b"\r\n\r\n")
+        lines = header.split(b"\r\n")
+        status = int(lines[0].split(None, 2)[1])
+        length, chunked, close = None, False, False
+        for line in lines[1:]:
+            name, _, value = line.partition(b":")
+            name = name.strip().lower()
+            if name == b"content-length":
+                length = int(value)
+            elif name == b"transfer-encoding" and b"chunked" in value.lower():
+                chunked = True
+            elif name == b"connection" and b"close" in value.lower():
+                close = True
+
+        received = 0
+        if chunked:
+            while True:
+                size = int((await self.reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                await self.reader.readexactly(size + 2)
+                received += size
+                if size == 0:
+                    break
+        elif length is not None:
+            await self.reader.readexactly(length)
+            received = length
+        else:
+            received = len(await self.reader.read())
+            close = True
+        if close:
+            self.close()
+        return status, received
+
+
+class Target:
+    """Per-target results: one histogram per path plus status/error counters."""
+
+    def __init__(self, url: str, paths, host_header: Optional[str]):
+        parts = urlsplit(url)
+        self.url = url
+        self.host = parts.hostname or "127.0.0.1"
+        self.use_tls = parts.scheme == "https"
+        self.port = parts.port or (443 if self.use_tls else 80)
+        self.host_header = host_header or parts.netloc
+        self.prefix = parts.path.rstrip("/")
+        self.paths = [self.prefix + p for p in paths]
+        self.histograms: Dict[str, Histogram] = {p: Histogram() for p in self.paths}
+        self.errors = 0
+        self.non_2xx = 0
+        self.bytes = 0
+        self.elapsed = 0.0
+
+    def connection(self) -> Connection:
+        return Connection(self.host, self.port, self.use_tls, self.host_header)
+
+    async def issue(self, conn: Connection, path: str, method: str, body: bytes,
+                    started: float, recording: bool) -> None:
+        try:
+            status, size = await conn.request(method, path, body)
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            conn.close()
+            if recording:
+                self.errors += 1
+            return
+        if not recording:
+            return
+        self.histograms[path].record(int((time.perf_counter() - started) * 1_000_000))
+        self.bytes += size
+        if not 200 <= status < 300:
+            self.non_2xx += 1
+
+    def summary(self) -> Dict:
+        overall = Histogram()
+        for histogram in self.histograms.values():
+            overall.merge(histogram)
+
+        def stats(h: Histogram) -> Dict:
+            return {
+                "requests": h.total,
+                "rps": round(h.total / self.elapsed, 1) if self.elapsed else 0.0,
+                "mean_ms": round(h.mean() / 1000, 3),
+                **{f"p{p:g}_ms": round(h.percentile(p) / 1000, 3) for p in PERCENTILES},
+                "max_ms": round(h.max / 1000, 3),
+            }
+
+        return {
+            "url": self.url,
+            "errors": self.errors,
+            "non_2xx": self.non_2xx,
+            "bytes": self.bytes,
+            "duration_s": round(self.elapsed, 2),
+            "overall": stats(overall),
+            "paths": {p: stats(h) for p, h in self.histograms.items()},
+        }
+
+
+async def closed_loop(target: Target, concurrency: int, duration: float, warmup: float,
+                      method: str, body: bytes) -> None:
+    """Each connection sends its next request as soon as the previous one returns."""
+    start = time.perf_counter()
+    record_from = start + warmup
+    deadline = record_from + duration
+
+    async def worker(offset: int) -> None:
+        conn = target.connection()
+        i = offset
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            path = target.paths[i % len(target.paths)]
+            i += 1
+            await target.issue(conn, path, method, body, now, now >= record_from)
+        conn.close()
+
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    target.elapsed = time.perf_counter() - record_from
+
+
+async def open_loop(target: Target, concurrency: int, rate: float, duration: float,
+                    warmup: float, method: str, body: bytes) -> None:
+    """
+    Requests arrive at a fixed rate regardless of response times and are
+    dispatched onto a pool of `concurrency` keep-alive connections.
+    """
+    pool: asyncio.Queue = asyncio.Queue()
+    for _ in range(concurrency):
+        pool.put_nowait(target.connection())
+    start = time.perf_counter()
+    record_from = start + warmup
+    total = int(rate * (warmup + duration))
+    tasks = set()
+
+    async def one(path: str, scheduled: float) -> None:
+        conn = await pool.get()
+        try:
+            await target.issue(conn, path, method, body, scheduled, scheduled >= record_from)
+        finally:
+            pool.put_nowait(conn)
+
+    for i in range(total):
+        scheduled = start + i / rate
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.create_task(one(target.paths[i % len(target.paths)], scheduled))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    await asyncio.gather(*tasks)
+    target.elapsed = time.perf_counter() - record_from
+    while not pool.empty():
+        pool.get_nowait().close()
+
+
+def print_summary(results: List[Dict]) -> None:
+    columns = ["requests", "rps", "mean_ms"] + [f"p{p:g}_ms" for p in PERCENTILES] + ["max_ms"]
+    for result in results:
+        print(f"\n{result['url']}  ({result['duration_s']}s, errors={result['errors']}, "
+              f"non-2xx={result['non_2xx']}, {result['bytes'] / 1e6:.1f} MB)")
+        print(f"  {'path':<20}" + "".join(f"{c:>11}" for c in columns))
+        rows = [("ALL", result["overall"])] + list(result["paths"].items())
+        for name, stats in rows:
+            print(f"  {name:<20}" + "".join(f"{stats[c]:>11}" for c in columns))
+    if len(results) > 1:
+        base = results[0]["overall"]
+        print("\nOverhead vs first target (p50 / p99 / p99.9 ms):")
+        for result in results[1:]:
+            o = result["overall"]
+            print(f"  {result['url']:<40} "
+                  f"{o['p50_ms'] - base['p50_ms']:+.3f} / {o['p99_ms'] - base['p99_ms']:+.3f} / "
+                  f"{o['p99.9_ms'] - base['p99.9_ms']:+.3f}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Load generator for the ingress test backend")
+    parser.add_argument("urls", nargs="+", help="base URL(s); several are run one after another")
+    parser.add_argument("-c", "--concurrency", type=int, default=10, help="keep-alive connections")
+    parser.add_argument("-r", "--rate", type=float, default=0,
+                        help="open loop at this many requests/s (default: closed loop)")
+    parser.add_argument("-d", "--duration", type=float, default=10, help="measured seconds")
+    parser.add_argument("-w", "--warmup", type=float, default=2, help="unrecorded warm-up seconds")
+    parser.add_argument("-p", "--path", action="append", dest="paths",
+                        help=f"path to request, repeatable (default: {' '.join(DEFAULT_PATHS)})")
+    parser.add_argument("--host", help="Host header, e.g. test.local for the host-based ingress rule")
+    parser.add_argument("--method", default="GET")
+    parser.add_argument("--body-bytes", type=int, default=0, help="request body size")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    body = b"x" * args.body_bytes
+    results = []
+    for url in args.urls:
+        target = Target(url, args.paths or DEFAULT_PATHS, args.host)
+        if args.rate > 0:
+            await open_loop(target, args.concurrency, args.rate, args.duration,
+                            args.warmup, args.method, body)
+        else:
+            await closed_loop(target, args.concurrency, args.duration, args.warmup,
+                              args.method, body)
+        results.append(target.summary())
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        mode = f"open loop @ {args.rate:g} req/s" if args.rate > 0 else "closed loop"
+        print(f"{mode}, {args.concurrency} connections, {args.duration:g}s (+{args.warmup:g}s warm-up)")
+        print_summary(results)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
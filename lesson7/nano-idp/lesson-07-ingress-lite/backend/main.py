@@ -1,12 +1,16 @@
 """
 Minimal test backend for ingress verification.
-Memory footprint: ~40MB
+Memory footprint: ~40MB (+ PAYLOAD_BUFFER_BYTES for the emulation endpoints)
 """
-from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Path, Query, Request
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import os
 import logging
+import time
+
+from stats import SharedStats, StatsMiddleware
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -22,6 +26,62 @@ app.add_middleware(
     allow_headers=["*"],  # Allow all headers
 )
 
+# Per-worker counters; attaches to the supervisor's shared segment when WORKERS > 1
+stats = SharedStats.from_env()
+app.add_middleware(StatsMiddleware, stats=stats)
+
+# Emulation limits; one preallocated buffer backs every generated body
+PAYLOAD_BUFFER_BYTES = int(os.getenv("PAYLOAD_BUFFER_BYTES", str(1024 * 1024)))
+PAYLOAD_MAX_BYTES = int(os.getenv("PAYLOAD_MAX_BYTES", str(1024 ** 3)))
+MAX_DELAY_MS = int(os.getenv("MAX_DELAY_MS", "120000"))
+
+# Random bytes so an ingress with compression enabled cannot shrink the body
+PAYLOAD = memoryview(os.urandom(PAYLOAD_BUFFER_BYTES))
+
+
+class BufferResponse(Response):
+    """
+    Body of `size` bytes sent as slices of the shared buffer - no copies,
+    constant memory however large the response. With `rate` (bytes/s) the
+    body is streamed chunked at that pace instead of with a Content-Length.
+    """
+
+    media_type = "application/octet-stream"
+
+    def __init__(self, size: int, chunk_bytes: int = PAYLOAD_BUFFER_BYTES,
+                 rate: float = 0, headers: dict = None):
+        super().__init__(content=None, headers=headers)
+        self.size = size
+        self.chunk_bytes = min(chunk_bytes, len(PAYLOAD))
+        self.rate = rate
+        if rate:
+            del self.headers["content-length"]
+        else:
+            self.headers["content-length"] = str(size)
+
+    async def __call__(self, scope, receive, send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code,
+                    "headers": self.raw_headers})
+        interval = self.chunk_bytes / self.rate if self.rate else 0
+        next_tick = time.monotonic()
+        remaining = self.size
+        while remaining > 0:
+            n = min(remaining, self.chunk_bytes)
+            remaining -= n
+            await send({"type": "http.response.body", "body": PAYLOAD[:n],
+                        "more_body": remaining > 0})
+            if interval and remaining > 0:
+                # Fixed-rate schedule so the pace does not drift with send time
+                next_tick += interval
+                await asyncio.sleep(max(0.0, next_tick - time.monotonic()))
+        if self.size == 0:
+            await send({"type": "http.response.body", "body": b""})
+
+
+async def emulate_delay(delay_ms: int) -> None:
+    if delay_ms:
+        await asyncio.sleep(delay_ms / 1000)
+
 @app.get("/health")
 async def health():
     """Health check endpoint for K8s probes."""
@@ -69,12 +129,91 @@ async def echo(path: str, request: Request):
         }
     )
 
+@app.get("/stats")
+async def get_stats():
+    """Request counts and latency aggregated across all worker processes."""
+    return JSONResponse(status_code=200, content=stats.snapshot())
+
+
+@app.get("/payload/{size}")
+async def payload(
+    size: int = Path(..., ge=0, le=PAYLOAD_MAX_BYTES),
+    delay_ms: int = Query(0, ge=0, le=MAX_DELAY_MS, description="Delay before the response starts"),
+):
+    """N-byte response body from the preallocated buffer."""
+    await emulate_delay(delay_ms)
+    return BufferResponse(size)
+
+
+@app.get("/delay/{delay_ms}")
+async def delay(delay_ms: int = Path(..., ge=0, le=MAX_DELAY_MS)):
+    """Slow upstream: answers after delay_ms milliseconds."""
+    start = time.monotonic()
+    await emulate_delay(delay_ms)
+    return JSONResponse(
+        status_code=200,
+        content={
+            "delay_ms": delay_ms,
+            "actual_ms": round((time.monotonic() - start) * 1000, 3),
+            "pod": os.getenv("HOSTNAME", "unknown")
+        }
+    )
+
+
+@app.get("/stream")
+async def stream(
+    size: int = Query(1024 * 1024, ge=0, le=PAYLOAD_MAX_BYTES, description="Total bytes"),
+    chunk_bytes: int = Query(16 * 1024, ge=1, le=PAYLOAD_BUFFER_BYTES),
+    rate: float = Query(256 * 1024, gt=0, description="Bytes per second"),
+    delay_ms: int = Query(0, ge=0, le=MAX_DELAY_MS, description="Delay before the first byte"),
+):
+    """Chunked response of `size` bytes paced at `rate` bytes/s."""
+    await emulate_delay(delay_ms)
+    return BufferResponse(size, chunk_bytes=chunk_bytes, rate=rate)
+
+
+@app.post("/upload")
+async def upload(
+    request: Request,
+    delay_ms: int = Query(0, ge=0, le=MAX_DELAY_MS, description="Delay before reading the body"),
+):
+    """Accept an upload of any size and discard it, reporting what arrived."""
+    await emulate_delay(delay_ms)
+    start = time.monotonic()
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+    elapsed = time.monotonic() - start
+    return JSONResponse(
+        status_code=200,
+        content={
+            "received_bytes": received,
+            "elapsed_ms": round(elapsed * 1000, 3),
+            "mb_per_s": round(received / elapsed / 1e6, 2) if elapsed else None,
+            "pod": os.getenv("HOSTNAME", "unknown")
+        }
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(
-        app,
+    # WORKERS > 1 forks shared-nothing processes on one listening socket.
+    # SERVER_LOOP=uvloop / SERVER_HTTP=httptools select the faster C implementations
+    # (auto picks them when installed; asyncio / h11 force the pure-Python ones).
+    workers = int(os.getenv("WORKERS", "1"))
+    options = dict(
         host="0.0.0.0",
-        port=8000,
+        port=int(os.getenv("PORT", "8000")),
+        loop=os.getenv("SERVER_LOOP", "auto"),
+        http=os.getenv("SERVER_HTTP", "auto"),
         log_level="info",
         access_log=False  # Reduce memory overhead
     )
+    if workers > 1:
+        shared = SharedStats.create()
+        try:
+            uvicorn.run("main:app", workers=workers, **options)
+        finally:
+            shared.unlink()
+    else:
+        uvicorn.run(app, **options)
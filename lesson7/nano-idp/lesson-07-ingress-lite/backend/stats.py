@@ -0,0 +1,239 @@
+"""
+Request counters and latency histograms shared across worker processes.
+The supervisor creates one shared-memory segment; every worker claims a
+slot in it and is the only writer of that slot, so recording needs no
+locks. /stats sums all slots, whichever worker serves it.
+"""
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional
+import atexit
+import fcntl
+import os
+import time
+
+SHM_ENV = "STATS_SHM"
+MAX_WORKERS = 64
+
+# Log-linear latency buckets in microseconds: 16 per power of two (~6%
+# resolution) up to 2^27 us (~134 s); slower requests land in the last one
+SUB_BITS = 4
+SUB_COUNT = 1 << SUB_BITS
+MAX_SHIFT = 27 - SUB_BITS
+BUCKETS = (MAX_SHIFT + 2) * SUB_COUNT
+
+# Slot layout (int64): pid, requests, errors (5xx), latency sum us, latency max us, buckets...
+PID, REQUESTS, ERRORS, LATENCY_SUM, LATENCY_MAX = range(5)
+SLOT_FIELDS = 5 + BUCKETS
+HEADER_FIELDS = 2  # slot count, created at (unix ns)
+
+
+def bucket(value_us: int) -> int:
+    if value_us < 2 * SUB_COUNT:
+        return value_us
+    shift = min(value_us.bit_length() - SUB_BITS - 1, MAX_SHIFT)
+    return min(shift * SUB_COUNT + (value_us >> shift), BUCKETS - 1)
+
+
+def bucket_upper(index: int) -> int:
+    if index < 2 * SUB_COUNT:
+        return index
+    shift = index // SUB_COUNT - 1
+    return ((index - shift * SUB_COUNT + 1) << shift) - 1
+
+
+def memory_kb(pid: int) -> Dict[str, Optional[int]]:
+    """RSS and PSS of a process; PSS splits shared pages between workers."""
+    result = {"rss_kb": None, "pss_kb": None}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    result["rss_kb"] = int(line.split()[1])
+                    break
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    result["pss_kb"] = int(line.split()[1])
+                    break
+    except OSError:
+        pass
+    return result
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class SharedStats:
+    """View over the stats segment; `slot` is this process's row once claimed."""
+
+    def __init__(self, buf, shm: Optional[shared_memory.SharedMemory] = None):
+        self.shm = shm
+        self.values = memoryview(buf).cast("q")
+        self.slots = self.values[0]
+        self.slot: Optional[int] = None
+        self._base = 0
+
+    @classmethod
+    def create(cls, slots: int = MAX_WORKERS) -> "SharedStats":
+        """Supervisor side: allocate the segment and export its name to workers."""
+        size = (HEADER_FIELDS + slots * SLOT_FIELDS) * 8
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        values = memoryview(shm.buf).cast("q")
+        values[0], values[1] = slots, time.time_ns()
+        values.release()
+        os.environ[SHM_ENV] = shm.name
+        return cls(shm.buf, shm)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedStats":
+        # Spawned workers share the supervisor's resource tracker, which
+        # unlinks the segment if the supervisor dies without cleaning up
+        shm = shared_memory.SharedMemory(name=name)
+        stats = cls(shm.buf, shm)
+        atexit.register(stats.close)
+        return stats
+
+    @classmethod
+    def private(cls) -> "SharedStats":
+        """Single-process mode: same layout in ordinary memory."""
+        buf = bytearray((HEADER_FIELDS + SLOT_FIELDS) * 8)
+        values = memoryview(buf).cast("q")
+        values[0], values[1] = 1, time.time_ns()
+        values.release()
+        return cls(buf)
+
+    @classmethod
+    def from_env(cls) -> "SharedStats":
+        """Attach to the supervisor's segment when there is one, and claim a slot."""
+        name = os.getenv(SHM_ENV)
+        stats = cls.attach(name) if name else cls.private()
+        stats.claim()
+        return stats
+
+    def _offset(self, slot: int) -> int:
+        return HEADER_FIELDS + slot * SLOT_FIELDS
+
+    def claim(self) -> int:
+        """Take the first free (or dead worker's) slot; counters carry over."""
+        lock_fd = os.open(f"/dev/shm/{self.shm.name.lstrip('/')}", os.O_RDONLY) if self.shm else None
+        try:
+            if lock_fd is not None:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            for slot in range(self.slots):
+                base = self._offset(slot)
+                pid = self.values[base + PID]
+                if pid == 0 or pid == os.getpid() or not _alive(pid):
+                    self.values[base + PID] = os.getpid()
+                    self.slot, self._base = slot, base
+                    return slot
+            raise RuntimeError(f"All {self.slots} stats slots are taken")
+        finally:
+            if lock_fd is not None:
+                fcntl.flock(lock_fd, fcntl.LOCK_UN)
+                os.close(lock_fd)
+
+    def record(self, latency_us: int, status: int) -> None:
+        values, base = self.values, self._base
+        values[base + REQUESTS] += 1
+        if status >= 500:
+            values[base + ERRORS] += 1
+        values[base + LATENCY_SUM] += latency_us
+        if latency_us > values[base + LATENCY_MAX]:
+            values[base + LATENCY_MAX] = latency_us
+        values[base + 5 + bucket(latency_us)] += 1
+
+    def snapshot(self) -> Dict:
+        """Totals, latency percentiles and per-worker counters across all slots."""
+        uptime = (time.time_ns() - self.values[1]) / 1e9
+        workers: List[Dict] = []
+        counts = [0] * BUCKETS
+        requests = errors = latency_sum = latency_max = 0
+        for slot in range(self.slots):
+            base = self._offset(slot)
+            row = self.values[base:base + SLOT_FIELDS].tolist()
+            if row[PID] == 0:
+                continue
+            requests += row[REQUESTS]
+            errors += row[ERRORS]
+            latency_sum += row[LATENCY_SUM]
+            latency_max = max(latency_max, row[LATENCY_MAX])
+            for i, count in enumerate(row[5:]):
+                if count:
+                    counts[i] += count
+            alive = _alive(row[PID])
+            workers.append({
+                "slot": slot,
+                "pid": row[PID],
+                "alive": alive,
+                "requests": row[REQUESTS],
+                "errors": row[ERRORS],
+                **(memory_kb(row[PID]) if alive else {"rss_kb": None, "pss_kb": None}),
+            })
+
+        def percentile(pct: float) -> float:
+            target = requests * pct / 100
+            seen = 0
+            for i, count in enumerate(counts):
+                seen += count
+                if count and seen >= target:
+                    return round(min(bucket_upper(i), latency_max) / 1000, 3)
+            return 0.0
+
+        return {
+            "uptime_s": round(uptime, 1),
+            "requests": requests,
+            "errors": errors,
+            "requests_per_s": round(requests / uptime, 1) if uptime > 0 else 0.0,
+            "latency_ms": {
+                "mean": round(latency_sum / requests / 1000, 3) if requests else 0.0,
+                "p50": percentile(50),
+                "p90": percentile(90),
+                "p99": percentile(99),
+                "max": round(latency_max / 1000, 3),
+            },
+            "served_by": os.getpid(),
+            "workers": workers,
+        }
+
+    def close(self) -> None:
+        self.values.release()
+        if self.shm:
+            self.shm.close()
+
+    def unlink(self) -> None:
+        self.close()
+        if self.shm:
+            self.shm.unlink()
+
+
+class StatsMiddleware:
+    """Pure ASGI middleware timing each request until its last body chunk."""
+
+    def __init__(self, app, stats: SharedStats):
+        self.app = app
+        self.stats = stats
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.stats.record(int((time.perf_counter() - start) * 1_000_000), status)
@@ -0,0 +1,43 @@
+#!/bin/bash
+set -euo pipefail
+
+echo "=========================================="
+echo "Benchmarking Ingress Lite"
+echo "=========================================="
+
+LESSON_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+BACKEND_DIR="$LESSON_DIR/backend"
+
+INGRESS_PORT=30080
+LOCAL_PORT=18000
+TEST_HOST="test.local"
+
+# Extra loadgen flags, e.g. ./bench.sh -r 200 -d 30
+LOADGEN_ARGS=("$@")
+
+cleanup() {
+    [ -n "${BACKEND_PID:-}" ] && kill "$BACKEND_PID" 2>/dev/null || true
+}
+trap cleanup EXIT
+
+# Direct path: the same backend on a local uvicorn, no ingress in between
+echo "Starting local backend on port $LOCAL_PORT..."
+cd "$BACKEND_DIR"
+python3 -c "import uvicorn, main; uvicorn.run(main.app, host='127.0.0.1', port=$LOCAL_PORT, log_level='warning', access_log=False)" &
+BACKEND_PID=$!
+
+for _ in $(seq 1 20); do
+    curl -s "http://127.0.0.1:$LOCAL_PORT/health" > /dev/null 2>&1 && break
+    sleep 0.5
+done
+
+# Ingress path is only benchmarked when the controller answers
+TARGETS=("http://127.0.0.1:$LOCAL_PORT")
+if curl -s -o /dev/null -H "Host: $TEST_HOST" "http://localhost:$INGRESS_PORT/health"; then
+    TARGETS+=("http://localhost:$INGRESS_PORT")
+else
+    echo "Ingress not reachable on port $INGRESS_PORT, benchmarking the direct path only"
+fi
+
+echo ""
+python3 loadgen.py --host "$TEST_HOST" "${LOADGEN_ARGS[@]}" "${TARGETS[@]}"
@@ -0,0 +1,49 @@
+#!/bin/bash
+set -euo pipefail
+
+echo "=========================================="
+echo "Worker Scaling: throughput and memory per worker"
+echo "=========================================="
+
+LESSON_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+BACKEND_DIR="$LESSON_DIR/backend"
+
+PORT=18001
+WORKER_COUNTS="${WORKER_COUNTS:-1 2 4}"
+STACKS="${STACKS:-asyncio/h11 uvloop/httptools}"
+DURATION="${DURATION:-10}"
+CONCURRENCY="${CONCURRENCY:-64}"
+
+cleanup() {
+    [ -n "${BACKEND_PID:-}" ] && kill "$BACKEND_PID" 2>/dev/null || true
+}
+trap cleanup EXIT
+
+cd "$BACKEND_DIR"
+printf "%-18s %8s %10s %10s %10s %12s %12s\n" "stack" "workers" "req/s" "p50 ms" "p99 ms" "PSS/worker" "PSS total"
+for stack in $STACKS; do
+    for workers in $WORKER_COUNTS; do
+        WORKERS=$workers PORT=$PORT SERVER_LOOP="${stack%/*}" SERVER_HTTP="${stack#*/}" \
+            python3 main.py > /dev/null 2>&1 &
+        BACKEND_PID=$!
+        for _ in $(seq 1 40); do
+            curl -s "http://127.0.0.1:$PORT/health" > /dev/null 2>&1 && break
+            sleep 0.5
+        done
+
+        result=$(python3 loadgen.py --json -c "$CONCURRENCY" -d "$DURATION" -w 2 -p /health "http://127.0.0.1:$PORT")
+        stats=$(curl -s "http://127.0.0.1:$PORT/stats")
+        python3 - "$stack" "$workers" "$result" "$stats" <<'PY'
+import json, sys
+stack, workers, result, stats = sys.argv[1], sys.argv[2], json.loads(sys.argv[3])[0], json.loads(sys.argv[4])
+overall = result["overall"]
+pss = [w["pss_kb"] or w["rss_kb"] or 0 for w in stats["workers"] if w["alive"]]
+print(f"{stack:<18} {workers:>8} {overall['rps']:>10} {overall['p50_ms']:>10} {overall['p99_ms']:>10} "
+      f"{sum(pss) / len(pss) / 1024:>10.1f}MB {sum(pss) / 1024:>10.1f}MB")
+PY
+
+        kill -INT "$BACKEND_PID"
+        wait "$BACKEND_PID" 2>/dev/null || true
+        BACKEND_PID=""
+    done
+done
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-request ApiClient + sequential LISTs (old handlers) vs one
+pooled ApiClient + concurrent, coalesced LISTs (StorageTopology.live).
+Serves PV/PVC lists from a local aiohttp stand-in for the API server with
+injected latency. No cluster required.
+
+Usage: python bench_api.py [--clients 50] [--requests 10] [--volumes 500] [--latency-ms 20]
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from aiohttp import web
+from kubernetes_asyncio import client
+
+from singleflight import SingleFlight
+from topology import StorageTopology
+
+
+def make_lists(n: int):
+    pvs, pvcs = [], []
+    for i in range(n):
+        pvs.append({
+            "metadata": {"name": f"pvc-{i:08d}"},
+            "spec": {"capacity": {"storage": "1Gi"}, "storageClassName": "local-path",
+                     "hostPath": {"path": f"/var/lib/rancher/k3s/storage/pvc-{i:08d}"},
+                     "persistentVolumeReclaimPolicy": "Delete", "accessModes": ["ReadWriteOnce"]},
+            "status": {"phase": "Bound"},
+        })
+        pvcs.append({
+            "metadata": {"name": f"data-{i}", "namespace": f"tenant-{i % 20}"},
+            "spec": {"volumeName": f"pvc-{i:08d}", "storageClassName": "local-path",
+                     "accessModes": ["ReadWriteOnce"], "resources": {"requests": {"storage": "1Gi"}}},
+            "status": {"phase": "Bound", "capacity": {"storage": "1Gi"}},
+        })
+    meta = {"resourceVersion": "1"}
+    return (json.dumps({"kind": "PersistentVolumeList", "apiVersion": "v1", "metadata": meta, "items": pvs}),
+            json.dumps({"kind": "PersistentVolumeClaimList", "apiVersion": "v1", "metadata": meta, "items": pvcs}))
+
+
+async def start_fake_api(volumes: int, latency_s: float):
+    pv_body, pvc_body = make_lists(volumes)
+    counts = {"lists": 0}
+
+    def handler(body):
+        async def handle(request):
+            counts["lists"] += 1
+            await asyncio.sleep(latency_s)
+            return web.Response(text=body, content_type="application/json")
+        return handle
+
+    app = web.Application()
+    app.router.add_get("/api/v1/persistentvolumes", handler(pv_body))
+    app.router.add_get("/api/v1/persistentvolumeclaims", handler(pvc_body))
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}", counts
+
+
+async def old_handler(configuration):
+    """The original get_volumes: fresh ApiClient, sequential LISTs, O(PV x PVC) join."""
+    async with client.ApiClient(configuration) as api_client:
+        v1 = client.CoreV1Api(api_client)
+        pvs = await v1.list_persistent_volume()
+        pvcs = await v1.list_persistent_volume_claim_for_all_namespaces()
+        return [
+            next((p for p in pvcs.items if p.spec.volume_name == pv.metadata.name), None)
+            for pv in pvs.items
+        ]
+
+
+async def run(mode: str, configuration, clients: int, requests: int):
+    latencies = []
+    if mode == "pooled":
+        api_client = client.ApiClient(configuration)
+        v1 = client.CoreV1Api(api_client)
+        flight = SingleFlight()
+        call = lambda: StorageTopology.live(v1, flight)
+    else:
+        call = lambda: old_handler(configuration)
+
+    async def worker():
+        for _ in range(requests):
+            start = time.perf_counter()
+            await call()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    wall = time.perf_counter() - start
+    if mode == "pooled":
+        await api_client.close()
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+    return pick(0.50), pick(0.99), len(latencies) / wall
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--volumes", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    runner, host, counts = await start_fake_api(args.volumes, args.latency_ms / 1000)
+    configuration = client.Configuration(host=host)
+    configuration.connection_pool_maxsize = 16
+
+    print(f"{args.clients} clients x {args.requests} requests, {args.volumes} PVs/PVCs, "
+          f"{args.latency_ms}ms API latency")
+    print(f"{'mode':<12} {'p50 ms':>10} {'p99 ms':>10} {'req/s':>10} {'LISTs':>8}")
+    for mode in ("per-request", "pooled"):
+        counts["lists"] = 0
+        p50, p99, rps = await run(mode, configuration, args.clients, args.requests)
+        print(f"{mode:<12} {p50:>10.1f} {p99:>10.1f} {rps:>10.1f} {counts['lists']:>8}")
+    await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
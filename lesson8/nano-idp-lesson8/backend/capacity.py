@@ -0,0 +1,159 @@
+"""
+PV fill-level collector: concurrent os.statvfs on every resolved host path.
+Each statvfs runs in a thread pool with a per-path timeout, so a hung mount
+costs one blocked thread instead of a blocked event loop. Results are cached
+with a short history per volume to project days-until-full.
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+import asyncio
+import logging
+import os
+import time
+
+from nanoidp.scheduler import Job, Scheduler
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_DAY = 86400
+
+
+def project_days_until_full(history, available: int) -> Tuple[Optional[float], Optional[float]]:
+    """
+    Least-squares growth rate over (timestamp, used_bytes) samples.
+    Returns (bytes_per_day, days_until_full); days is None when not growing.
+    """
+    n = len(history)
+    if n < 2:
+        return None, None
+    mean_t = sum(t for t, _ in history) / n
+    mean_u = sum(u for _, u in history) / n
+    var_t = sum((t - mean_t) ** 2 for t, _ in history)
+    if var_t == 0:
+        return None, None
+    slope = sum((t - mean_t) * (u - mean_u) for t, u in history) / var_t
+    per_day = slope * SECONDS_PER_DAY
+    if slope <= 0:
+        return round(per_day), None
+    return round(per_day), round(available / per_day, 2)
+
+
+class VolumeUsageCollector:
+    """Background statvfs sampler for PV host paths."""
+
+    def __init__(self, volumes: Callable[[], List[Dict]], interval_s: float = 60.0,
+                 timeout_s: float = 2.0, workers: int = 8, history: int = 240,
+                 host_root: str = "/host", ready: Optional[asyncio.Event] = None):
+        self.volumes = volumes
+        self.ready = ready
+        self.interval_s = interval_s
+        self.timeout_s = timeout_s
+        self.host_root = host_root
+        self.history_len = history
+        self.usage: Dict[str, Dict] = {}
+        self.history: Dict[str, Deque[Tuple[float, int]]] = {}
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="statvfs")
+        self._inflight: Set[str] = set()
+        self._job: Optional[Job] = None
+
+    @classmethod
+    def from_env(cls, volumes: Callable[[], List[Dict]],
+                 ready: Optional[asyncio.Event] = None) -> "VolumeUsageCollector":
+        return cls(
+            volumes,
+            ready=ready,
+            interval_s=float(os.getenv("USAGE_INTERVAL_S", "60")),
+            timeout_s=float(os.getenv("USAGE_TIMEOUT_S", "2")),
+            workers=int(os.getenv("USAGE_WORKERS", "8")),
+            history=int(os.getenv("USAGE_HISTORY", "240")),
+            host_root=os.getenv("HOST_ROOT", "/host"),
+        )
+
+    def resolve(self, host_path: str) -> str:
+        """Host path as seen from this container (under HOST_ROOT when mounted)."""
+        mounted = os.path.join(self.host_root, host_path.lstrip("/"))
+        return mounted if os.path.exists(mounted) else host_path
+
+    def _resolve_statvfs(self, host_path: str) -> os.statvfs_result:
+        # Both touch the mount (exists() hangs on a dead one too), so both run in the pool
+        return os.statvfs(self.resolve(host_path))
+
+    async def _statvfs(self, path: str) -> Tuple[str, Optional[os.statvfs_result]]:
+        if path in self._inflight:
+            # A previous call is still stuck on this mount; don't pile up threads
+            return "hung", None
+        self._inflight.add(path)
+        future = asyncio.get_running_loop().run_in_executor(self._pool, self._resolve_statvfs, path)
+
+        def done(f):
+            self._inflight.discard(path)
+            if not f.cancelled():
+                f.exception()  # mark retrieved; late errors after a timeout are expected
+
+        future.add_done_callback(done)
+        try:
+            return "ok", await asyncio.wait_for(asyncio.shield(future), self.timeout_s)
+        except asyncio.TimeoutError:
+            return "timeout", None
+        except FileNotFoundError:
+            return "missing", None
+        except OSError as e:
+            logger.warning(f"statvfs {path} failed: {e}")
+            return "error", None
+
+    async def collect(self) -> None:
+        """statvfs every PV with a host path, concurrently."""
+        volumes = [v for v in self.volumes() if v.get("hostPath")]
+        paths = [v["hostPath"] for v in volumes]
+        unique = list(dict.fromkeys(paths))
+        results = dict(zip(unique, await asyncio.gather(*(self._statvfs(p) for p in unique))))
+        now = time.time()
+
+        usage = {}
+        for volume, path in zip(volumes, paths):
+            status, st = results[path]
+            name = volume["name"]
+            entry = {
+                "name": name,
+                "claim": volume.get("claim"),
+                "hostPath": volume["hostPath"],
+                "status": status,
+                "sampledAt": round(now, 3),
+            }
+            if st is not None:
+                total = st.f_blocks * st.f_frsize
+                available = st.f_bavail * st.f_frsize
+                used = total - st.f_bfree * st.f_frsize
+                history = self.history.setdefault(name, deque(maxlen=self.history_len))
+                history.append((now, used))
+                per_day, days = project_days_until_full(history, available)
+                entry.update({
+                    "totalBytes": total,
+                    "usedBytes": used,
+                    "availableBytes": available,
+                    "usedPercent": round(used / total * 100, 2) if total else 0.0,
+                    "growthBytesPerDay": per_day,
+                    "daysUntilFull": days,
+                })
+            elif name in self.usage and "usedBytes" in self.usage[name]:
+                # Keep the last good numbers, flagged with the current status
+                entry = {**self.usage[name], "status": status, "sampledAt": round(now, 3)}
+            usage[name] = entry
+
+        for name in set(self.history) - set(usage):
+            del self.history[name]
+        self.usage = usage
+
+    def list_usage(self) -> List[Dict]:
+        return list(self.usage.values())
+
+    def start(self, scheduler: Scheduler) -> None:
+        # First collection as soon as the volume list is ready
+        self._job = scheduler.every(self.interval_s, self.collect, name="volume-usage",
+                                    after=self.ready)
+
+    async def stop(self) -> None:
+        if self._job:
+            self._job.cancel()
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,222 @@
+"""
+iostat -x style rate engine over /proc/diskstats.
+A background sampler keeps the previous sample, derives per-device rates
+and appends them to a bounded history ring, and to one persistent
+nanoidp.tsdb series per disk when a history directory is configured.
+"""
+from collections import deque
+from functools import lru_cache
+from operator import itemgetter
+from typing import Deque, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import os
+import re
+import time
+
+from nanoidp import procfs, tsdb
+from nanoidp.scheduler import Job, Scheduler
+
+logger = logging.getLogger(__name__)
+
+SECTOR_BYTES = 512
+
+# Whole-disk name patterns; partitions are rolled up into their parent disk
+DEFAULT_DEVICES = r"^(sd[a-z]+|vd[a-z]+|xvd[a-z]+|nvme\d+n\d+|mmcblk\d+)$"
+_PARTITION = re.compile(r"^(nvme\d+n\d+|mmcblk\d+)p\d+$|^((?:sd|vd|xvd|hd)[a-z]+)\d+$")
+
+# Counter columns kept from /proc/diskstats (0-based, after major/minor/name)
+#   reads, sectors read, ms reading, writes, sectors written, ms writing,
+#   in flight, ms doing I/O, weighted ms doing I/O
+_FIELDS = (3, 5, 6, 7, 9, 10, 11, 12, 13)
+_pick_fields = itemgetter(*_FIELDS)
+
+Counters = Tuple[int, ...]
+
+# Rate columns kept in the persistent per-disk series
+HISTORY_FIELDS = ("r_s", "w_s", "rkB_s", "wkB_s", "await", "aqu_sz", "util")
+
+
+def diskstats_path() -> str:
+    """Host diskstats when mounted into the pod, otherwise our own."""
+    return "/host/proc/diskstats" if os.path.exists("/host/proc/diskstats") else "/proc/diskstats"
+
+
+@lru_cache(maxsize=1024)
+def parent_disk(device: str) -> str:
+    """sda1 -> sda, nvme0n1p2 -> nvme0n1; whole disks map to themselves."""
+    match = _PARTITION.match(device)
+    if not match:
+        return device
+    return match.group(1) or match.group(2)
+
+
+def parse_diskstats(data: bytes, device_filter: re.Pattern) -> Dict[str, Counters]:
+    """
+    Per-disk counters. Whole-disk lines already include their partitions;
+    partitions are only summed into a parent that has no line of its own.
+    """
+    disks: Dict[str, Counters] = {}
+    orphans: Dict[str, List[int]] = {}
+    for fields in procfs.iter_rows(data, 14):
+        device = fields[2].decode()
+        parent = parent_disk(device)
+        if not device_filter.match(parent):
+            continue
+        counters = tuple(map(int, _pick_fields(fields)))
+        if parent == device:
+            disks[device] = counters
+        else:
+            total = orphans.setdefault(parent, [0] * len(_FIELDS))
+            for i, value in enumerate(counters):
+                total[i] += value
+    for parent, total in orphans.items():
+        if parent not in disks:
+            # in_flight is a gauge; summing partitions is still correct
+            disks[parent] = tuple(total)
+    return disks
+
+
+def parse_device_numbers(data: bytes) -> Dict[str, str]:
+    """"major:minor" -> disk name, partitions mapped to their parent disk."""
+    return {
+        f"{int(fields[0])}:{int(fields[1])}": parent_disk(fields[2].decode())
+        for fields in procfs.iter_rows(data, 3)
+    }
+
+
+def compute_rates(prev: Counters, cur: Counters, interval_s: float) -> Dict[str, float]:
+    """iostat -x columns from two samples taken interval_s apart."""
+    d = [c - p for c, p in zip(cur, prev)]
+    reads, rsect, rticks, writes, wsect, wticks, _, io_ticks, weighted = d
+    interval_ms = interval_s * 1000
+    ios = reads + writes
+    return {
+        "r_s": round(reads / interval_s, 2),
+        "w_s": round(writes / interval_s, 2),
+        "rkB_s": round(rsect * SECTOR_BYTES / 1024 / interval_s, 2),
+        "wkB_s": round(wsect * SECTOR_BYTES / 1024 / interval_s, 2),
+        "r_await": round(rticks / reads, 2) if reads else 0.0,
+        "w_await": round(wticks / writes, 2) if writes else 0.0,
+        "await": round((rticks + wticks) / ios, 2) if ios else 0.0,
+        "aqu_sz": round(weighted / interval_ms, 2),
+        "util": round(min(100.0, io_ticks / interval_ms * 100), 2),
+    }
+
+
+class IOStatSampler:
+    """Samples diskstats every interval and keeps a bounded rate history."""
+
+    def __init__(self, interval_s: float = 1.0, history: int = 600,
+                 devices: str = DEFAULT_DEVICES, path: Optional[str] = None,
+                 store_dir: Optional[str] = None, store_hours: float = 1):
+        self.interval_s = interval_s
+        self.device_filter = re.compile(devices)
+        self.path = path or diskstats_path()
+        self._file = procfs.KernelFile(self.path, size=16384)
+        self.history: Deque[Dict] = deque(maxlen=history)
+        self.store_dir = store_dir
+        self.store_tiers = tsdb.default_tiers(interval_s, raw_hours=store_hours)
+        self._stores: Dict[str, Optional[tsdb.TimeSeries]] = {}
+        self.counters: Dict[str, Counters] = {}
+        self._prev: Optional[Tuple[float, Dict[str, Counters]]] = None
+        self._subscribers: List[asyncio.Queue] = []
+        self._job: Optional[Job] = None
+
+    @classmethod
+    def from_env(cls) -> "IOStatSampler":
+        return cls(
+            interval_s=float(os.getenv("IOSTAT_INTERVAL_S", "1.0")),
+            history=int(os.getenv("IOSTAT_HISTORY", "600")),
+            devices=os.getenv("IOSTAT_DEVICES", DEFAULT_DEVICES),
+            path=os.getenv("DISKSTATS_PATH"),
+            store_dir=os.getenv("HISTORY_DIR", tsdb.DEFAULT_DIR),
+            store_hours=float(os.getenv("IOSTAT_STORE_HOURS", "1")),
+        )
+
+    def read(self) -> Dict[str, Counters]:
+        return parse_diskstats(self._file.read(), self.device_filter)
+
+    def device_numbers(self) -> Dict[str, str]:
+        # Called from pod discovery in the executor: _file belongs to the
+        # loop's sampler, so read through procfs' locked cache instead
+        return parse_device_numbers(procfs.read(self.path))
+
+    def sample(self) -> Optional[Dict]:
+        """Take one sample; returns the rate entry once two samples exist."""
+        now = time.monotonic()
+        counters = self.read()
+        self.counters = counters
+        prev, self._prev = self._prev, (now, counters)
+        if prev is None:
+            return None
+
+        elapsed = now - prev[0]
+        if elapsed <= 0:
+            return None
+        entry = {
+            "timestamp": round(time.time(), 3),
+            "interval_s": round(elapsed, 3),
+            "devices": {
+                device: compute_rates(prev[1][device], cur, elapsed)
+                for device, cur in counters.items()
+                if device in prev[1]
+            },
+        }
+        self.history.append(entry)
+        if self.store_dir:
+            for device, rates in entry["devices"].items():
+                series = self.store(device)
+                if series is not None:
+                    series.append([rates[field] for field in HISTORY_FIELDS], entry["timestamp"])
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()  # drop oldest for slow readers
+            queue.put_nowait(entry)
+        return entry
+
+    def store(self, device: str) -> Optional[tsdb.TimeSeries]:
+        """The device's persistent series, opened on first use (None if disabled)."""
+        if device not in self._stores:
+            self._stores[device] = tsdb.open_series(self.store_dir, f"diskstats-{device}",
+                                                    HISTORY_FIELDS, self.store_tiers)
+        return self._stores[device]
+
+    def latest(self) -> Optional[Dict]:
+        return self.history[-1] if self.history else None
+
+    def range(self, since: Optional[float] = None, until: Optional[float] = None,
+              device: Optional[str] = None) -> List[Dict]:
+        """History entries with since <= timestamp <= until, optionally one device."""
+        entries = []
+        for entry in self.history:
+            ts = entry["timestamp"]
+            if (since is not None and ts < since) or (until is not None and ts > until):
+                continue
+            if device is not None:
+                if device not in entry["devices"]:
+                    continue
+                entry = {**entry, "devices": {device: entry["devices"][device]}}
+            entries.append(entry)
+        return entries
+
+    def subscribe(self, maxsize: int = 30) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        if queue in self._subscribers:
+            self._subscribers.remove(queue)
+
+    def start(self, scheduler: Scheduler) -> None:
+        # A diskstats read takes microseconds; it runs on the loop
+        self._job = scheduler.every(self.interval_s, self.sample, name="iostat")
+
+    async def stop(self) -> None:
+        if self._job:
+            self._job.cancel()
+        for series in self._stores.values():
+            if series is not None:
+                series.close()
+        self._stores.clear()
@@ -1,24 +1,81 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from kubernetes_asyncio import client, config
-from typing import List, Dict
+from fastapi.responses import StreamingResponse
+from kubernetes_asyncio import client
+from typing import List, Dict, Optional
 from contextlib import asynccontextmanager
+import asyncio
 import os
-import atexit
+import json
+import logging
+import sys
+
+try:
+    import nanoidp  # noqa: F401
+except ImportError:  # running from a checkout: shared library lives at the repo root
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+
+from nanoidp import httpcache, kube, scheduler, telemetry, tsdb
+
+from capacity import VolumeUsageCollector
+from iostat import IOStatSampler
+from podio import PodIOSampler
+from singleflight import SingleFlight
+from topology import StorageTopology
+
+logging.basicConfig(level=logging.INFO)
+
+# Seconds a request waits for the initial LIST of every kind
+SYNC_TIMEOUT_S = 10
+# Parallel connections to the API server; the topology watches hold four
+K8S_POOL_MAXSIZE = int(os.getenv("K8S_POOL_MAXSIZE", "16"))
+
+topology = StorageTopology()
+iostat = IOStatSampler.from_env()
+usage = VolumeUsageCollector.from_env(topology.list_volumes, ready=topology.synced)
+pod_io = PodIOSampler.from_env(topology.pod_by_uid.get, iostat.device_numbers)
+flight = SingleFlight()
+core_v1: Optional[client.CoreV1Api] = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Load Kubernetes config
-    if os.path.exists("/var/run/secrets/kubernetes.io/serviceaccount"):
-        config.load_incluster_config()
-    else:
-        await config.load_kube_config()
+    # Startup: one long-lived, pooled keep-alive client shared by watches and
+    # live reads (and by every other plugin when hosted by the agent)
+    global core_v1
+    api_client = await kube.async_api_client(pool_maxsize=K8S_POOL_MAXSIZE)
+    core_v1 = client.CoreV1Api(api_client)
+    topology.start(api_client)
+    sampling = scheduler.default()
+    sampling.start()
+    iostat.start(sampling)
+    usage.start(sampling)
+    pod_io.start(sampling)
     yield
-    # Shutdown: cleanup if needed
-    pass
+    # Shutdown: stop background jobs and close the HTTP session
+    await pod_io.stop()
+    await usage.stop()
+    await iostat.stop()
+    await sampling.stop()
+    await topology.stop()
+    await kube.close()
 
 app = FastAPI(title="Storage Monitor", version="1.0.0", lifespan=lifespan)
 
+# volumes and pvcs are left out: they are watch-fed already and
+# consistent=true must reach the API server
+cache = httpcache.ResponseCache({
+    "/api/storage/volumes/{name}/consumers": 2,
+    "/api/storage/classes": 2,
+    "/api/storage/usage": 5,
+    "/api/storage/iostat": 1,
+    "/api/storage/iostat/history": 1,
+    "/api/storage/pods/io": 1,
+})
+app.add_middleware(httpcache.CacheMiddleware, cache=cache)
+
+# /metrics and /debug/runtime: is the documented 60MB met?
+telemetry.install(app, "storage-monitor", memory_budget_mb=60)
+
 # CORS for local development
 app.add_middleware(
     CORSMiddleware,
@@ -29,86 +86,124 @@ app.add_middleware(
 
 @app.get("/api/health")
 async def health():
-    return {"status": "healthy", "service": "storage-monitor"}
+    return {
+        "status": "healthy",
+        "service": "storage-monitor",
+        "coalescing": flight.stats(),
+        "cache": cache.stats(),
+        "sampling": scheduler.default().stats(),
+    }
+
+async def synced_topology() -> StorageTopology:
+    """The topology graph, once every kind has completed its initial LIST."""
+    try:
+        await asyncio.wait_for(topology.synced.wait(), SYNC_TIMEOUT_S)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Storage topology not synced yet")
+    return topology
+
+async def graph(consistent: bool) -> StorageTopology:
+    """Watch-fed graph, or a fresh coalesced LIST when consistent=true."""
+    if consistent:
+        return await StorageTopology.live(core_v1, flight)
+    return await synced_topology()
+
+CONSISTENT_QUERY = Query(False, description="Bypass the watch cache and LIST from the API server")
 
 @app.get("/api/storage/volumes")
-async def get_volumes() -> List[Dict]:
+async def get_volumes(consistent: bool = CONSISTENT_QUERY) -> List[Dict]:
     """List all PVs and their bound PVCs."""
-    async with client.ApiClient() as api_client:
-        v1 = client.CoreV1Api(api_client)
-        
-        pvs = await v1.list_persistent_volume()
-        pvcs = await v1.list_persistent_volume_claim_for_all_namespaces()
-        
-        volumes = []
-        for pv in pvs.items:
-            bound_pvc = next(
-                (p for p in pvcs.items if p.spec.volume_name == pv.metadata.name),
-                None
-            )
-            
-            pv_spec = pv.spec
-            volumes.append({
-                "name": pv.metadata.name,
-                "capacity": pv.spec.capacity.get("storage", "unknown"),
-                "status": pv.status.phase,
-                "storageClass": pv.spec.storage_class_name,
-                "claim": f"{bound_pvc.metadata.namespace}/{bound_pvc.metadata.name}" if bound_pvc else None,
-                "hostPath": pv_spec.local.path if pv_spec.local else (
-                    pv_spec.host_path.path if pv_spec.host_path else None
-                ),
-                "reclaimPolicy": pv_spec.persistent_volume_reclaim_policy
-            })
-        
-        return volumes
+    return (await graph(consistent)).list_volumes()
+
+@app.get("/api/storage/volumes/{name}/consumers")
+async def get_volume_consumers(name: str) -> Dict:
+    """Who uses this volume: bound PVC and the pods mounting it."""
+    consumers = (await synced_topology()).volume_consumers(name)
+    if consumers is None:
+        raise HTTPException(status_code=404, detail=f"PersistentVolume '{name}' not found")
+    return consumers
+
+@app.get("/api/storage/classes")
+async def get_storage_classes() -> List[Dict]:
+    """List StorageClasses with their PV and PVC counts."""
+    return (await synced_topology()).list_classes()
+
+@app.get("/api/storage/usage")
+async def get_volume_usage() -> List[Dict]:
+    """Actual fill level of each PV host path with a days-until-full projection."""
+    return usage.list_usage()
 
 @app.get("/api/storage/iostat")
 async def get_iostat() -> Dict:
-    """Parse /proc/diskstats for disk I/O metrics."""
-    try:
-        with open("/host/proc/diskstats") as f:
-            lines = f.readlines()
-    except FileNotFoundError:
-        # Fallback if not mounted
-        with open("/proc/diskstats") as f:
-            lines = f.readlines()
-    
+    """Per-disk diskstats counters with iostat -x rates from the latest sample."""
+    latest = iostat.latest()
+    rates = latest["devices"] if latest else {}
     stats = {}
-    for line in lines:
-        fields = line.split()
-        if len(fields) < 14:
-            continue
-        
-        device = fields[2]
-        # Filter for physical disks only
-        if device.startswith(("sd", "nvme", "vd")):
-            stats[device] = {
-                "reads_completed": int(fields[3]),
-                "sectors_read": int(fields[5]),
-                "writes_completed": int(fields[7]),
-                "sectors_written": int(fields[9]),
-                "io_time_ms": int(fields[12])
-            }
-    
+    for device, c in iostat.counters.items():
+        stats[device] = {
+            "reads_completed": c[0],
+            "sectors_read": c[1],
+            "writes_completed": c[3],
+            "sectors_written": c[4],
+            "io_time_ms": c[7],
+            **rates.get(device, {}),
+        }
     return stats
 
+@app.get("/api/storage/iostat/history")
+async def get_iostat_history(
+    since: Optional[float] = Query(None, description="Unix timestamp (inclusive)"),
+    until: Optional[float] = Query(None, description="Unix timestamp (inclusive)"),
+    device: Optional[str] = Query(None, description="Only this device"),
+    step: Optional[int] = Query(None, description="Read the persistent store instead: 0 for raw "
+                                                  "samples, 60 or 3600 for mean/max buckets (needs device)"),
+):
+    """Rate samples from the in-memory history ring, or from the per-disk store across restarts."""
+    if step is None:
+        return iostat.range(since, until, device)
+    if device is None:
+        raise HTTPException(status_code=400, detail="step requires device")
+    series = iostat.store(device) if iostat.store_dir and device in iostat.counters else None
+    if series is None:
+        raise HTTPException(status_code=404, detail=f"No persistent history for '{device}'")
+    try:
+        return {"device": device, **tsdb.query(series, since, until, step)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/storage/iostat/stream")
+async def stream_iostat(request: Request):
+    """Server-Sent Events: one rate sample per sampler interval."""
+    queue = iostat.subscribe()
+
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    entry = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"data: {json.dumps(entry)}\n\n"
+        finally:
+            iostat.unsubscribe(queue)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+@app.get("/api/storage/pods/io")
+async def get_pod_io(
+    top: int = Query(10, ge=1, le=500, description="Number of pods to return"),
+    by: str = Query("bytes", pattern="^(bytes|iops)$", description="Rank by bytes/s or IOPS"),
+) -> Dict:
+    """Top-N pods by disk I/O, from cgroup io.stat deltas."""
+    return {
+        "interval_s": pod_io.interval_s,
+        "scan_ms": pod_io.scan_ms,
+        "pods": pod_io.top(top, by),
+    }
+
 @app.get("/api/storage/pvcs")
-async def get_pvcs() -> List[Dict]:
+async def get_pvcs(consistent: bool = CONSISTENT_QUERY) -> List[Dict]:
     """List all PVCs across namespaces."""
-    async with client.ApiClient() as api_client:
-        v1 = client.CoreV1Api(api_client)
-        pvcs = await v1.list_persistent_volume_claim_for_all_namespaces()
-        
-        claims = []
-        for pvc in pvcs.items:
-            claims.append({
-                "name": pvc.metadata.name,
-                "namespace": pvc.metadata.namespace,
-                "status": pvc.status.phase,
-                "volumeName": pvc.spec.volume_name,
-                "storageClass": pvc.spec.storage_class_name,
-                "capacity": pvc.status.capacity.get("storage") if pvc.status.capacity else None,
-                "requested": pvc.spec.resources.requests.get("storage")
-            })
-        
-        return claims
+    return (await graph(consistent)).list_claims()
@@ -0,0 +1,276 @@
+"""
+In-memory storage topology graph: StorageClass -> PV <-> PVC -> Pods.
+Every edge has a hash index, so joins are O(1) per object instead of a scan.
+Kept current by one LIST + WATCH loop per resource kind.
+"""
+from kubernetes_asyncio import client, watch
+from kubernetes_asyncio.client.rest import ApiException
+from typing import Dict, List, Optional, Set, Tuple
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+ClaimKey = Tuple[str, str]  # (namespace, name)
+
+WATCH_TIMEOUT_S = 300
+RETRY_DELAY_S = 5
+
+
+class StorageTopology:
+    """Graph of storage objects with indexes on every edge."""
+
+    KINDS = ("storageclasses", "persistentvolumes", "persistentvolumeclaims", "pods")
+
+    def __init__(self):
+        self.classes: Dict[str, Dict] = {}
+        self.volumes: Dict[str, Dict] = {}
+        self.claims: Dict[ClaimKey, Dict] = {}
+        self.pod_claims: Dict[ClaimKey, Tuple[str, ...]] = {}
+
+        # Edge indexes
+        self.claim_by_volume: Dict[str, ClaimKey] = {}
+        self.volumes_by_class: Dict[str, Set[str]] = {}
+        self.claims_by_class: Dict[str, Set[ClaimKey]] = {}
+        self.pods_by_claim: Dict[ClaimKey, Set[ClaimKey]] = {}
+        self.pod_by_uid: Dict[str, ClaimKey] = {}
+        self.uid_by_pod: Dict[ClaimKey, str] = {}
+
+        self.synced = asyncio.Event()
+        self._synced_kinds: Set[str] = set()
+        self._tasks: List[asyncio.Task] = []
+
+    # --- StorageClass ---------------------------------------------------
+
+    def upsert_class(self, sc) -> None:
+        self.classes[sc.metadata.name] = {
+            "name": sc.metadata.name,
+            "provisioner": sc.provisioner,
+            "reclaimPolicy": sc.reclaim_policy,
+            "volumeBindingMode": sc.volume_binding_mode,
+        }
+
+    def delete_class(self, sc) -> None:
+        self.classes.pop(sc.metadata.name, None)
+
+    # --- PersistentVolume -----------------------------------------------
+
+    def upsert_volume(self, pv) -> None:
+        name = pv.metadata.name
+        self.delete_volume(pv)
+        spec = pv.spec
+        volume = {
+            "name": name,
+            "capacity": (spec.capacity or {}).get("storage", "unknown"),
+            "status": pv.status.phase if pv.status else None,
+            "storageClass": spec.storage_class_name,
+            "hostPath": spec.local.path if spec.local else (
+                spec.host_path.path if spec.host_path else None
+            ),
+            "reclaimPolicy": spec.persistent_volume_reclaim_policy,
+        }
+        self.volumes[name] = volume
+        self.volumes_by_class.setdefault(volume["storageClass"], set()).add(name)
+
+    def delete_volume(self, pv) -> None:
+        volume = self.volumes.pop(pv.metadata.name, None)
+        if volume:
+            self.volumes_by_class.get(volume["storageClass"], set()).discard(volume["name"])
+
+    # --- PersistentVolumeClaim ------------------------------------------
+
+    def upsert_claim(self, pvc) -> None:
+        key = (pvc.metadata.namespace, pvc.metadata.name)
+        self.delete_claim(pvc)
+        spec, status = pvc.spec, pvc.status
+        claim = {
+            "name": pvc.metadata.name,
+            "namespace": pvc.metadata.namespace,
+            "status": status.phase if status else None,
+            "volumeName": spec.volume_name,
+            "storageClass": spec.storage_class_name,
+            "capacity": status.capacity.get("storage") if status and status.capacity else None,
+            "requested": (spec.resources.requests or {}).get("storage") if spec.resources else None,
+        }
+        self.claims[key] = claim
+        if claim["volumeName"]:
+            self.claim_by_volume[claim["volumeName"]] = key
+        self.claims_by_class.setdefault(claim["storageClass"], set()).add(key)
+
+    def delete_claim(self, pvc) -> None:
+        key = (pvc.metadata.namespace, pvc.metadata.name)
+        claim = self.claims.pop(key, None)
+        if not claim:
+            return
+        if claim["volumeName"] and self.claim_by_volume.get(claim["volumeName"]) == key:
+            del self.claim_by_volume[claim["volumeName"]]
+        self.claims_by_class.get(claim["storageClass"], set()).discard(key)
+
+    # --- Pods (uid index for all, claim edges for those mounting PVCs) ---
+
+    def upsert_pod(self, pod) -> None:
+        self.delete_pod(pod)
+        key = (pod.metadata.namespace, pod.metadata.name)
+        if pod.metadata.uid:
+            self.pod_by_uid[pod.metadata.uid] = key
+            self.uid_by_pod[key] = pod.metadata.uid
+        claim_names = tuple(
+            v.persistent_volume_claim.claim_name
+            for v in (pod.spec.volumes or ())
+            if v.persistent_volume_claim
+        )
+        if not claim_names:
+            return
+        self.pod_claims[key] = claim_names
+        for claim_name in claim_names:
+            self.pods_by_claim.setdefault((key[0], claim_name), set()).add(key)
+
+    def delete_pod(self, pod) -> None:
+        key = (pod.metadata.namespace, pod.metadata.name)
+        # The uid stored for this name, not the event's: a recreated pod
+        # reuses the name with a new uid
+        uid = self.uid_by_pod.pop(key, None)
+        if uid is not None:
+            self.pod_by_uid.pop(uid, None)
+        for claim_name in self.pod_claims.pop(key, ()):
+            pods = self.pods_by_claim.get((key[0], claim_name))
+            if pods:
+                pods.discard(key)
+                if not pods:
+                    del self.pods_by_claim[(key[0], claim_name)]
+
+    # --- Queries ----------------------------------------------------------
+
+    def list_volumes(self) -> List[Dict]:
+        """All PVs with their bound claim - one index lookup per PV."""
+        volumes = []
+        for name, volume in self.volumes.items():
+            claim = self.claim_by_volume.get(name)
+            volumes.append({
+                **volume,
+                "claim": f"{claim[0]}/{claim[1]}" if claim else None,
+            })
+        return volumes
+
+    def list_claims(self) -> List[Dict]:
+        return list(self.claims.values())
+
+    def list_classes(self) -> List[Dict]:
+        return [
+            {
+                **sc,
+                "volumes": len(self.volumes_by_class.get(name, ())),
+                "claims": len(self.claims_by_class.get(name, ())),
+            }
+            for name, sc in self.classes.items()
+        ]
+
+    def volume_consumers(self, volume_name: str) -> Optional[Dict]:
+        """Who uses this volume: PV -> bound claim -> pods mounting it."""
+        if volume_name not in self.volumes:
+            return None
+        claim = self.claim_by_volume.get(volume_name)
+        pods = sorted(self.pods_by_claim.get(claim, ())) if claim else []
+        return {
+            "volume": volume_name,
+            "claim": f"{claim[0]}/{claim[1]}" if claim else None,
+            "pods": [{"namespace": ns, "name": name} for ns, name in pods],
+        }
+
+    # --- Live (consistent) reads -----------------------------------------
+
+    @classmethod
+    async def live(cls, v1: client.CoreV1Api, flight) -> "StorageTopology":
+        """
+        Fresh PV/PVC graph straight from the API server. Both LISTs run
+        concurrently and are coalesced with identical in-flight LISTs.
+        """
+        pvs, pvcs = await asyncio.gather(
+            flight.do("persistentvolumes", v1.list_persistent_volume),
+            flight.do("persistentvolumeclaims", v1.list_persistent_volume_claim_for_all_namespaces),
+        )
+        graph = cls()
+        for pv in pvs.items:
+            graph.upsert_volume(pv)
+        for pvc in pvcs.items:
+            graph.upsert_claim(pvc)
+        return graph
+
+    # --- Watch loops ------------------------------------------------------
+
+    def start(self, api_client: client.ApiClient) -> None:
+        v1 = client.CoreV1Api(api_client)
+        storage_v1 = client.StorageV1Api(api_client)
+        self._tasks = [
+            asyncio.create_task(self._watch(
+                "storageclasses", storage_v1.list_storage_class,
+                self.upsert_class, self.delete_class)),
+            asyncio.create_task(self._watch(
+                "persistentvolumes", v1.list_persistent_volume,
+                self.upsert_volume, self.delete_volume)),
+            asyncio.create_task(self._watch(
+                "persistentvolumeclaims", v1.list_persistent_volume_claim_for_all_namespaces,
+                self.upsert_claim, self.delete_claim)),
+            asyncio.create_task(self._watch(
+                "pods", v1.list_pod_for_all_namespaces,
+                self.upsert_pod, self.delete_pod)),
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _reset(self, kind: str) -> None:
+        """Drop every object of one kind before a relist."""
+        if kind == "storageclasses":
+            self.classes.clear()
+        elif kind == "persistentvolumes":
+            self.volumes.clear()
+            self.volumes_by_class.clear()
+        elif kind == "persistentvolumeclaims":
+            self.claims.clear()
+            self.claim_by_volume.clear()
+            self.claims_by_class.clear()
+        elif kind == "pods":
+            self.pod_claims.clear()
+            self.pods_by_claim.clear()
+            self.pod_by_uid.clear()
+            self.uid_by_pod.clear()
+
+    async def _watch(self, kind: str, list_call, upsert, delete) -> None:
+        """LIST once, then WATCH from its resourceVersion; relist on 410 Gone."""
+        while True:
+            try:
+                listing = await list_call()
+                self._reset(kind)
+                for obj in listing.items:
+                    upsert(obj)
+                resource_version = listing.metadata.resource_version
+                self._mark_synced(kind)
+                logger.info(f"Topology synced {kind}: {len(listing.items)} objects")
+
+                while True:
+                    w = watch.Watch()
+                    async for event in w.stream(list_call, resource_version=resource_version,
+                                                timeout_seconds=WATCH_TIMEOUT_S):
+                        if event["type"] == "DELETED":
+                            delete(event["object"])
+                        else:
+                            upsert(event["object"])
+                    resource_version = w.resource_version or resource_version
+            except asyncio.CancelledError:
+                raise
+            except ApiException as e:
+                if e.status == 410:
+                    logger.info(f"Topology watch for {kind} expired, relisting")
+                    continue
+                logger.warning(f"Topology watch for {kind} failed: {e.status} {e.reason}")
+            except Exception as e:
+                logger.warning(f"Topology watch for {kind} failed: {e}")
+            await asyncio.sleep(RETRY_DELAY_S)
+
+    def _mark_synced(self, kind: str) -> None:
+        self._synced_kinds.add(kind)
+        if self._synced_kinds.issuperset(self.KINDS):
+            self.synced.set()
@@ -29,6 +29,13 @@ interface IOStat {
     writes_completed: number
     sectors_written: number
     io_time_ms: number
+    r_s?: number
+    w_s?: number
+    rkB_s?: number
+    wkB_s?: number
+    await?: number
+    aqu_sz?: number
+    util?: number
   }
 }
 
@@ -54,7 +61,8 @@ function App() {
     queryFn: async () => {
       const res = await axios.get('/api/storage/iostat')
       return res.data
-    }
+    },
+    refetchInterval: 2000
   })
 
   return (
@@ -162,6 +170,26 @@ function App() {
                 <span>I/O Time:</span>
                 <span className="value">{(stats.io_time_ms / 1000).toFixed(2)}s</span>
               </div>
+              {stats.util !== undefined && (
+                <>
+                  <div className="stat">
+                    <span>r/s | w/s:</span>
+                    <span className="value">{stats.r_s} | {stats.w_s}</span>
+                  </div>
+                  <div className="stat">
+                    <span>rkB/s | wkB/s:</span>
+                    <span className="value">{stats.rkB_s} | {stats.wkB_s}</span>
+                  </div>
+                  <div className="stat">
+                    <span>await | aqu-sz:</span>
+                    <span className="value">{stats.await}ms | {stats.aqu_sz}</span>
+                  </div>
+                  <div className="stat">
+                    <span>%util:</span>
+                    <span className="value">{stats.util}%</span>
+                  </div>
+                </>
+              )}
             </div>
           ))}
         </div>
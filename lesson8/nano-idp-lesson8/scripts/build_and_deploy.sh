@@ -3,7 +3,7 @@ set -e
 
 echo "🔨 Building Backend..."
 cd backend
-docker build -t localhost:5000/storage-monitor-backend:latest .
+DOCKER_BUILDKIT=1 docker build --build-context nanoidp=../../../nanoidp -t localhost:5000/storage-monitor-backend:latest .
 docker push localhost:5000/storage-monitor-backend:latest
 
 echo "✅ Backend built and pushed to local registry"
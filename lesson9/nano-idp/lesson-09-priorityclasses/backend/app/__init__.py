@@ -0,0 +1,8 @@
+"""Priority Monitor backend package."""
+import sys
+from pathlib import Path
+
+try:
+    import nanoidp  # noqa: F401
+except ImportError:  # running from a checkout: shared library lives at the repo root
+    sys.path.append(str(Path(__file__).resolve().parents[5]))
@@ -0,0 +1,88 @@
+"""
+Negotiated response compression (zstd, then gzip) for responses above a size threshold.
+Pure ASGI middleware - buffers only single-chunk bodies, streams pass through.
+"""
+import gzip
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; gzip is always available
+    zstandard = None
+
+MIN_SIZE = 1024
+
+
+def _accepted(header: str) -> set:
+    """Encodings from Accept-Encoding, ignoring those with q=0."""
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0"):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = MIN_SIZE, gzip_level: int = 6, zstd_level: int = 3):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self._zstd = zstandard.ZstdCompressor(level=zstd_level) if zstandard else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        accepted = _accepted(accept)
+        if self._zstd and "zstd" in accepted:
+            encoding = "zstd"
+        elif "gzip" in accepted:
+            encoding = "gzip"
+        else:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+
+        async def send_compressed(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = start_message.get("headers", [])
+            already_encoded = any(name == b"content-encoding" for name, _ in headers)
+            if message.get("more_body") or already_encoded or len(body) < self.minimum_size:
+                # Streaming, pre-encoded or too small to be worth it
+                await send(start_message)
+                start_message = None
+                await send(message)
+                return
+
+            if encoding == "zstd":
+                body = self._zstd.compress(body)
+            else:
+                body = gzip.compress(body, compresslevel=self.gzip_level)
+
+            headers = [(k, v) for k, v in headers if k != b"content-length"]
+            headers += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(body)).encode()),
+                (b"vary", b"Accept-Encoding"),
+            ]
+            await send({**start_message, "headers": headers})
+            start_message = None
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
@@ -1,21 +1,64 @@
 """
 Priority Monitor API - FastAPI backend for PriorityClass visibility
 Memory footprint: ~40MB
+Set PRIORITY_SNAPSHOT=<file> to serve a captured snapshot instead of the cluster.
 """
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from kubernetes import client, config
-from kubernetes.client.rest import ApiException
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse
 from typing import List, Optional
+import asyncio
 import logging
+import os
+
+from app import queries
+from app.compression import CompressionMiddleware
+from app.models import PodPriorityInfo, PriorityClassInfo
+from app.snapshot import ClusterSource, ClusterState, SnapshotSource
+from nanoidp import httpcache, kube, telemetry
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Priority Monitor", version="1.0.0")
+SNAPSHOT_PATH = os.getenv("PRIORITY_SNAPSHOT")
+
+# API server reads go through one pooled kubernetes_asyncio client: each
+# request (LIST page) times out after K8S_TIMEOUT_S, and an endpoint's
+# concurrent reads are cancelled together after K8S_DEADLINE_S (504)
+K8S_POOL_MAXSIZE = int(os.getenv("K8S_POOL_MAXSIZE", "16"))
+K8S_TIMEOUT_S = float(os.getenv("K8S_TIMEOUT_S", "10"))
+K8S_DEADLINE_S = float(os.getenv("K8S_DEADLINE_S", "30"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The client is built on the first API request; close it if one was
+    yield
+    await kube.close()
+
+
+# orjson encoder; handlers return plain dicts, skipping per-row model validation
+app = FastAPI(title="Priority Monitor", version="1.0.0", default_response_class=ORJSONResponse,
+              lifespan=lifespan)
+
+# zstd/gzip for responses above 1KB, negotiated via Accept-Encoding
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+# Each poll LISTs the cluster; keep the compressed answer per TTL and
+# revalidate with ETag/304 (nanoidp.httpcache, CACHE_TTL overrides).
+# Added after compression so hits skip re-encoding.
+cache = httpcache.ResponseCache({
+    "/api/priorityclasses": 5,
+    "/api/pods/priorities": 5,
+    "/api/stats": 5,
+})
+app.add_middleware(httpcache.CacheMiddleware, cache=cache)
 
-# CORS - allow frontend access
+# /metrics and /debug/runtime: is the ~40MB footprint met? (nanoidp.telemetry)
+telemetry.install(app, "priority-monitor", memory_budget_mb=40)
+
+# CORS - allow frontend access (outermost: it echoes the request's Origin)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -24,156 +67,78 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Load K8s config
-try:
-    config.load_incluster_config()
-    logger.info("Loaded in-cluster Kubernetes config")
-except:
-    config.load_kube_config()
-    logger.info("Loaded local Kubernetes config")
-
-v1 = client.CoreV1Api()
-scheduling_v1 = client.SchedulingV1Api()
+_snapshot: Optional[SnapshotSource] = None
+_cluster: Optional[ClusterSource] = None
+
+
+async def get_state(pods: bool = True, memory: bool = False) -> ClusterState:
+    """
+    The state a query needs: the snapshot, or the live cluster's fetched with
+    concurrent requests. Sources are built on the first API request rather
+    than at import, so /health answers without a cluster.
+    """
+    global _snapshot, _cluster
+    if SNAPSHOT_PATH:
+        # Offline replay - no cluster access needed
+        if _snapshot is None:
+            _snapshot = SnapshotSource(SNAPSHOT_PATH)
+        return _snapshot
+    try:
+        if _cluster is None:
+            _cluster = await ClusterSource.connect(K8S_POOL_MAXSIZE, K8S_TIMEOUT_S)
+        return await _cluster.state(pods=pods, memory=memory, deadline_s=K8S_DEADLINE_S)
+    except kube.ConfigException as e:
+        raise HTTPException(status_code=503, detail=f"No Kubernetes config: {e}")
+    except asyncio.TimeoutError:
+        logger.error(f"K8s API timed out after {K8S_DEADLINE_S}s")
+        raise HTTPException(status_code=504, detail=f"Kubernetes API did not answer within {K8S_DEADLINE_S}s")
+    except kube.ApiException as e:
+        logger.error(f"K8s API error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
 
-class PriorityClassInfo(BaseModel):
-    name: str
-    value: int
-    global_default: bool
-    description: Optional[str]
-    preemption_policy: Optional[str]
+@app.get("/health")
+async def health_check():
+    """Health check endpoint"""
+    return {"status": "healthy", "cache": cache.stats()}
 
 
-class PodPriorityInfo(BaseModel):
-    pod_name: str
-    namespace: str
-    priority_class: str
-    priority_value: int
-    memory_usage: Optional[str]
-    status: str
+FIELDS_QUERY = Query(None, description="Comma-separated fields to return, e.g. pod_name,priority_value")
+STATS_FIELDS = ("count", "priority_value", "running", "pending", "failed")
 
 
-@app.get("/health")
-async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy"}
+def _fields(fields: Optional[str], allowed) -> Optional[List[str]]:
+    try:
+        return queries.parse_fields(fields, allowed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.get("/api/priorityclasses", response_model=List[PriorityClassInfo])
-async def list_priority_classes():
+async def list_priority_classes(fields: Optional[str] = FIELDS_QUERY):
     """List all PriorityClasses in the cluster"""
-    try:
-        priority_classes = scheduling_v1.list_priority_class()
-        
-        results = []
-        for pc in priority_classes.items:
-            results.append(PriorityClassInfo(
-                name=pc.metadata.name,
-                value=pc.value,
-                global_default=pc.global_default or False,
-                description=pc.description,
-                preemption_policy=pc.preemption_policy
-            ))
-        
-        return sorted(results, key=lambda x: x.value, reverse=True)
-    
-    except ApiException as e:
-        logger.error(f"K8s API error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    selected = _fields(fields, list(PriorityClassInfo.model_fields))
+    state = await get_state(pods=False)
+    return ORJSONResponse(queries.project(queries.priority_classes(state), selected))
 
 
 @app.get("/api/pods/priorities", response_model=List[PodPriorityInfo])
-async def get_pod_priorities():
+async def get_pod_priorities(fields: Optional[str] = FIELDS_QUERY):
     """Get priority information for all running pods"""
-    try:
-        # Build priority class lookup
-        priority_classes = {
-            pc.metadata.name: pc.value 
-            for pc in scheduling_v1.list_priority_class().items
-        }
-        
-        # Default for pods without explicit priority class
-        if "tenant-default" in priority_classes:
-            default_priority = priority_classes["tenant-default"]
-        else:
-            default_priority = 0
-        
-        results = []
-        pods = v1.list_pod_for_all_namespaces()
-        
-        for pod in pods.items:
-            priority_class = pod.spec.priority_class_name or "tenant-default"
-            priority_value = priority_classes.get(priority_class, default_priority)
-            
-            # Try to get memory usage from metrics server
-            memory_usage = None
-            try:
-                custom_api = client.CustomObjectsApi()
-                metrics = custom_api.get_namespaced_custom_object(
-                    group="metrics.k8s.io",
-                    version="v1beta1",
-                    namespace=pod.metadata.namespace,
-                    plural="pods",
-                    name=pod.metadata.name
-                )
-                if metrics.get("containers"):
-                    memory_usage = metrics["containers"][0]["usage"].get("memory")
-            except:
-                pass  # Metrics server might not be available
-            
-            results.append(PodPriorityInfo(
-                pod_name=pod.metadata.name,
-                namespace=pod.metadata.namespace,
-                priority_class=priority_class,
-                priority_value=priority_value,
-                memory_usage=memory_usage,
-                status=pod.status.phase
-            ))
-        
-        return sorted(results, key=lambda x: x.priority_value, reverse=True)
-    
-    except ApiException as e:
-        logger.error(f"K8s API error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    selected = _fields(fields, list(PodPriorityInfo.model_fields))
+    # PriorityClasses, pods and pod metrics are read concurrently
+    state = await get_state(pods=True, memory=True)
+    return ORJSONResponse(queries.project(queries.pod_priorities(state), selected))
 
 
 @app.get("/api/stats")
-async def get_priority_stats():
+async def get_priority_stats(fields: Optional[str] = FIELDS_QUERY):
     """Get aggregate statistics about priority class usage"""
-    try:
-        pods = v1.list_pod_for_all_namespaces()
-        priority_classes = {
-            pc.metadata.name: pc.value 
-            for pc in scheduling_v1.list_priority_class().items
-        }
-        
-        stats = {}
-        for pod in pods.items:
-            priority_class = pod.spec.priority_class_name or "tenant-default"
-            
-            if priority_class not in stats:
-                stats[priority_class] = {
-                    "count": 0,
-                    "priority_value": priority_classes.get(priority_class, 0),
-                    "running": 0,
-                    "pending": 0,
-                    "failed": 0
-                }
-            
-            stats[priority_class]["count"] += 1
-            
-            if pod.status.phase == "Running":
-                stats[priority_class]["running"] += 1
-            elif pod.status.phase == "Pending":
-                stats[priority_class]["pending"] += 1
-            elif pod.status.phase == "Failed":
-                stats[priority_class]["failed"] += 1
-        
-        return stats
-    
-    except ApiException as e:
-        logger.error(f"K8s API error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    selected = _fields(fields, STATS_FIELDS)
+    stats = queries.priority_stats(await get_state(pods=True))
+    if selected:
+        stats = {name: {f: stat[f] for f in selected} for name, stat in stats.items()}
+    return stats
 
 
 if __name__ == "__main__":
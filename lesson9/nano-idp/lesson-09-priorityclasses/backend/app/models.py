@@ -0,0 +1,22 @@
+"""
+Priority Monitor API response models
+"""
+from pydantic import BaseModel
+from typing import Optional
+
+
+class PriorityClassInfo(BaseModel):
+    name: str
+    value: int
+    global_default: bool
+    description: Optional[str]
+    preemption_policy: Optional[str]
+
+
+class PodPriorityInfo(BaseModel):
+    pod_name: str
+    namespace: str
+    priority_class: str
+    priority_value: int
+    memory_usage: Optional[str]
+    status: str
@@ -0,0 +1,81 @@
+"""
+Lean Kubernetes list path for the Priority Monitor.
+Requests raw responses (no V1Pod model preloading) from the kubernetes_asyncio
+client via kube.get_json and keeps only the fields the monitor reads.
+Every request carries its own timeout, so one slow LIST cannot hold a handler
+(or, via the loop, the rest of the API) indefinitely.
+"""
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
+
+from nanoidp import kube
+
+# Pods per LIST page - bounds peak memory regardless of cluster size
+PAGE_SIZE = 500
+
+# Seconds per API request (one page), unless the caller passes its own
+REQUEST_TIMEOUT_S = 10.0
+
+
+class PodRecord(NamedTuple):
+    """Compact projection of a Pod - the only fields the monitor reads."""
+    name: str
+    namespace: str
+    priority_class_name: Optional[str]
+    phase: str
+
+
+async def _list_raw(list_call, page_size: int = PAGE_SIZE, timeout_s: float = REQUEST_TIMEOUT_S,
+                    **kwargs) -> AsyncIterator[dict]:
+    """Yield raw JSON items from a paginated LIST call (limit/continue)."""
+    _continue = None
+    while True:
+        if _continue:
+            kwargs["_continue"] = _continue
+        body = await kube.get_json(list_call, timeout_s, limit=page_size, **kwargs)
+        for item in body.get("items") or ():
+            yield item
+        _continue = (body.get("metadata") or {}).get("continue")
+        if not _continue:
+            break
+
+
+async def list_pods(v1, page_size: int = PAGE_SIZE, timeout_s: float = REQUEST_TIMEOUT_S) -> List[PodRecord]:
+    """All pods as PodRecords, fetched one page at a time."""
+    pods = []
+    async for item in _list_raw(v1.list_pod_for_all_namespaces, page_size, timeout_s):
+        metadata = item["metadata"]
+        pods.append(PodRecord(
+            metadata["name"],
+            metadata.get("namespace", ""),
+            (item.get("spec") or {}).get("priorityClassName"),
+            (item.get("status") or {}).get("phase") or "Unknown",
+        ))
+    return pods
+
+
+async def list_priority_classes(scheduling_v1, timeout_s: float = REQUEST_TIMEOUT_S) -> list:
+    """Return PriorityClasses as raw dicts (name, value, globalDefault, ...)."""
+    return (await kube.get_json(scheduling_v1.list_priority_class, timeout_s)).get("items") or []
+
+
+async def pod_memory_usage(custom_api, timeout_s: float = REQUEST_TIMEOUT_S) -> Dict[Tuple[str, str], str]:
+    """
+    Memory usage of the first container of every pod, keyed by (namespace, name).
+    One cluster-wide LIST of metrics.k8s.io instead of one GET per pod.
+    """
+    usage = {}
+    body = await kube.get_json(
+        custom_api.list_cluster_custom_object,
+        timeout_s,
+        group="metrics.k8s.io",
+        version="v1beta1",
+        plural="pods",
+    )
+    for item in body.get("items") or ():
+        containers = item.get("containers")
+        if containers:
+            metadata = item["metadata"]
+            usage[(metadata["namespace"], metadata["name"])] = (
+                containers[0].get("usage", {}).get("memory")
+            )
+    return usage
@@ -0,0 +1,102 @@
+"""
+Priority Monitor queries shared by the API and the show_*.py scripts.
+Each takes fetched cluster state (ClusterState or SnapshotSource) and returns
+plain dicts shaped like the API responses.
+"""
+from typing import Dict, List, Optional
+
+
+def priority_classes(source) -> List[Dict]:
+    """All PriorityClasses, highest value first."""
+    results = []
+    for pc in source.priority_classes():
+        results.append({
+            "name": pc["metadata"]["name"],
+            "value": pc.get("value", 0),
+            "global_default": pc.get("globalDefault") or False,
+            "description": pc.get("description"),
+            "preemption_policy": pc.get("preemptionPolicy"),
+        })
+    return sorted(results, key=lambda x: x["value"], reverse=True)
+
+
+def priority_values(source) -> Dict[str, int]:
+    """PriorityClass name -> value lookup."""
+    return {pc["metadata"]["name"]: pc.get("value", 0) for pc in source.priority_classes()}
+
+
+def pod_priorities(source) -> List[Dict]:
+    """Priority information for every pod, highest priority first."""
+    priority_classes = priority_values(source)
+
+    # Default for pods without explicit priority class
+    default_priority = priority_classes.get("tenant-default", 0)
+
+    # Metrics server might not be available
+    try:
+        memory_usage = source.pod_memory_usage()
+    except Exception:
+        memory_usage = {}
+
+    results = []
+    for pod in source.pods():
+        priority_class = pod.priority_class_name or "tenant-default"
+        results.append({
+            "pod_name": pod.name,
+            "namespace": pod.namespace,
+            "priority_class": priority_class,
+            "priority_value": priority_classes.get(priority_class, default_priority),
+            "memory_usage": memory_usage.get((pod.namespace, pod.name)),
+            "status": pod.phase,
+        })
+    return sorted(results, key=lambda x: x["priority_value"], reverse=True)
+
+
+def priority_stats(source) -> Dict[str, Dict]:
+    """Pod counts per PriorityClass, broken down by phase."""
+    priority_classes = priority_values(source)
+
+    stats = {}
+    for pod in source.pods():
+        priority_class = pod.priority_class_name or "tenant-default"
+
+        if priority_class not in stats:
+            stats[priority_class] = {
+                "count": 0,
+                "priority_value": priority_classes.get(priority_class, 0),
+                "running": 0,
+                "pending": 0,
+                "failed": 0
+            }
+
+        stats[priority_class]["count"] += 1
+
+        if pod.phase == "Running":
+            stats[priority_class]["running"] += 1
+        elif pod.phase == "Pending":
+            stats[priority_class]["pending"] += 1
+        elif pod.phase == "Failed":
+            stats[priority_class]["failed"] += 1
+
+    return stats
+
+
+def parse_fields(fields: Optional[str], allowed) -> Optional[List[str]]:
+    """
+    Parse a sparse fieldset (?fields=pod_name,priority_value).
+    Returns None for "all fields"; raises ValueError on unknown names.
+    """
+    if not fields:
+        return None
+    wanted = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in wanted if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}")
+    return wanted or None
+
+
+def project(rows: List[Dict], fields: Optional[List[str]]) -> List[Dict]:
+    """Keep only the requested keys of each row."""
+    if fields is None:
+        return rows
+    return [{f: row[f] for f in fields} for row in rows]
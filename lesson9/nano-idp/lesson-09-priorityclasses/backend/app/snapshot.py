@@ -0,0 +1,189 @@
+"""
+Cluster state sources for the Priority Monitor.
+ClusterSource reads the live API server asynchronously and returns a
+ClusterState; SnapshotSource replays a captured snapshot file as one, so the
+queries, the API and the show_*.py scripts can run offline.
+
+Capture: python -m app.snapshot --output priority-snapshot.json.gz
+"""
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+import argparse
+import asyncio
+import gzip
+import logging
+import time
+
+import orjson
+
+from app import podlist
+from app.podlist import PodRecord
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+# PriorityClass fields kept in a snapshot
+_PC_FIELDS = ("value", "globalDefault", "description", "preemptionPolicy")
+
+
+class ClusterState:
+    """Cluster state already fetched; the interface the queries read."""
+
+    def __init__(self, priority_classes: List[dict], pods: List[PodRecord],
+                 memory: Dict[Tuple[str, str], str]):
+        self._priority_classes = priority_classes
+        self._pods = pods
+        self._memory = memory
+
+    def priority_classes(self) -> List[dict]:
+        return self._priority_classes
+
+    def pods(self) -> Iterator[PodRecord]:
+        return iter(self._pods)
+
+    def pod_memory_usage(self) -> Dict[Tuple[str, str], str]:
+        return self._memory
+
+
+class ClusterSource:
+    """Live cluster state through the lean list path, on the shared kubernetes_asyncio client."""
+
+    def __init__(self, v1, scheduling_v1, custom_api, timeout_s: float = podlist.REQUEST_TIMEOUT_S):
+        self.v1 = v1
+        self.scheduling_v1 = scheduling_v1
+        self.custom_api = custom_api
+        self.timeout_s = timeout_s
+
+    @classmethod
+    async def connect(cls, pool_maxsize: int = 16,
+                      timeout_s: float = podlist.REQUEST_TIMEOUT_S) -> "ClusterSource":
+        """Build APIs on the shared client (in-cluster config or kubeconfig)."""
+        from kubernetes_asyncio import client
+        from nanoidp import kube
+        api_client = await kube.async_api_client(pool_maxsize=pool_maxsize)
+        return cls(client.CoreV1Api(api_client), client.SchedulingV1Api(api_client),
+                   client.CustomObjectsApi(api_client), timeout_s)
+
+    async def _memory(self) -> Dict[Tuple[str, str], str]:
+        # Metrics server might not be available; never fail the whole state for it
+        try:
+            return await podlist.pod_memory_usage(self.custom_api, self.timeout_s)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Pod metrics unavailable: {e}")
+            return {}
+
+    async def state(self, pods: bool = True, memory: bool = True,
+                    deadline_s: Optional[float] = None) -> ClusterState:
+        """
+        Fetch what a query needs: PriorityClasses always, pods and pod metrics
+        on request, as concurrent requests. The first failure or deadline_s
+        (asyncio.TimeoutError) cancels the rest.
+        """
+        from nanoidp import kube
+        classes, pod_list, usage = await kube.gather(
+            podlist.list_priority_classes(self.scheduling_v1, self.timeout_s),
+            podlist.list_pods(self.v1, timeout_s=self.timeout_s) if pods else _value([]),
+            self._memory() if memory else _value({}),
+            timeout=deadline_s,
+        )
+        return ClusterState(classes, pod_list, usage)
+
+
+async def _value(value):
+    return value
+
+
+async def fetch_state() -> ClusterState:
+    """One-shot read of the live cluster, for the CLI tools."""
+    from nanoidp import kube
+    try:
+        source = await ClusterSource.connect()
+        return await source.state()
+    finally:
+        await kube.close()
+
+
+class SnapshotSource(ClusterState):
+    """Replays a snapshot written by capture()."""
+
+    def __init__(self, path: str):
+        data = load(path)
+        self.captured_at = data["captured_at"]
+        super().__init__(
+            data["priority_classes"],
+            [PodRecord(*row) for row in data["pods"]],
+            {(ns, name): memory for ns, name, memory in data["pod_metrics"]},
+        )
+        logger.info(f"Loaded snapshot {path}: {len(self._pods)} pods captured at {self.captured_at}")
+
+
+def capture(source) -> dict:
+    """Collect cluster state from a source into the snapshot layout."""
+    try:
+        memory = source.pod_memory_usage()
+    except Exception as e:
+        logger.warning(f"Pod metrics unavailable, capturing without them: {e}")
+        memory = {}
+
+    return {
+        "version": SNAPSHOT_VERSION,
+        "captured_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "priority_classes": [
+            {"metadata": {"name": pc["metadata"]["name"]},
+             **{k: pc[k] for k in _PC_FIELDS if pc.get(k) is not None}}
+            for pc in source.priority_classes()
+        ],
+        # Pods and metrics as positional rows - PodRecord field order
+        "pods": [list(pod) for pod in source.pods()],
+        "pod_metrics": [[ns, name, value] for (ns, name), value in memory.items()],
+    }
+
+
+def save(data: dict, path: str) -> None:
+    """Write a snapshot; gzip-compressed when the path ends in .gz."""
+    raw = orjson.dumps(data)
+    if path.endswith(".gz"):
+        raw = gzip.compress(raw, compresslevel=6)
+    Path(path).write_bytes(raw)
+
+
+def load(path: str) -> dict:
+    """Read and validate a snapshot file (plain or gzip JSON)."""
+    raw = Path(path).read_bytes()
+    if raw[:2] == b"\x1f\x8b":
+        raw = gzip.decompress(raw)
+    data = orjson.loads(raw)
+    if data.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(
+            f"Unsupported snapshot version {data.get('version')!r} in {path} "
+            f"(expected {SNAPSHOT_VERSION})"
+        )
+    return data
+
+
+def make_source(snapshot_path: str = None) -> ClusterState:
+    """SnapshotSource when a snapshot path is given, otherwise the live cluster's state."""
+    if snapshot_path:
+        return SnapshotSource(snapshot_path)
+    return asyncio.run(fetch_state())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Capture cluster state into a priority snapshot")
+    parser.add_argument("--output", "-o", default="priority-snapshot.json.gz",
+                        help="snapshot file (.gz for gzip compression)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    data = capture(asyncio.run(fetch_state()))
+    save(data, args.output)
+    print(f"Captured {len(data['pods'])} pods, {len(data['priority_classes'])} PriorityClasses, "
+          f"{len(data['pod_metrics'])} pod metrics -> {args.output} "
+          f"({Path(args.output).stat().st_size:,} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Benchmark: V1Pod model deserialization vs the lean raw-JSON path (app/podlist.py).
+Runs each path in a fresh interpreter against a synthetic PodList so peak RSS
+is comparable. No cluster required.
+
+Usage: python bench_podlist.py [--pods 5000] [--rounds 5]
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_pod(i: int) -> dict:
+    """A realistic-sized pod object (labels, env, volumes, probes, statuses)."""
+    name = f"workload-{i // 10}-{i:06d}"
+    namespace = f"tenant-{i % 40}"
+    return {
+        "metadata": {
+            "name": name,
+            "namespace": namespace,
+            "uid": f"{i:08x}-0000-4000-8000-{i:012x}",
+            "resourceVersion": str(100000 + i),
+            "creationTimestamp": "2024-01-01T00:00:00Z",
+            "labels": {"app": f"workload-{i // 10}", "pod-template-hash": "5d8f7c9b6"},
+            "annotations": {"kubectl.kubernetes.io/restartedAt": "2024-01-01T00:00:00Z"},
+            "ownerReferences": [{
+                "apiVersion": "apps/v1", "kind": "ReplicaSet", "name": f"workload-{i // 10}-5d8f7c9b6",
+                "uid": f"{i:08x}-1111-4000-8000-{i:012x}", "controller": True, "blockOwnerDeletion": True,
+            }],
+        },
+        "spec": {
+            "priorityClassName": ("platform-critical", "platform-core", None)[i % 3],
+            "priority": (1000000, 10000, 0)[i % 3],
+            "serviceAccountName": "default",
+            "nodeName": f"k3d-nano-agent-{i % 3}",
+            "restartPolicy": "Always",
+            "dnsPolicy": "ClusterFirst",
+            "schedulerName": "default-scheduler",
+            "terminationGracePeriodSeconds": 30,
+            "containers": [{
+                "name": "app",
+                "image": "localhost:5000/workload:latest",
+                "imagePullPolicy": "IfNotPresent",
+                "ports": [{"containerPort": 8080, "protocol": "TCP"}],
+                "env": [{"name": f"ENV_{k}", "value": f"value-{k}"} for k in range(8)],
+                "resources": {"requests": {"cpu": "50m", "memory": "64Mi"},
+                              "limits": {"cpu": "200m", "memory": "128Mi"}},
+                "volumeMounts": [{"name": "kube-api-access", "mountPath": "/var/run/secrets/kubernetes.io/serviceaccount",
+                                  "readOnly": True}],
+                "livenessProbe": {"httpGet": {"path": "/health", "port": 8080, "scheme": "HTTP"},
+                                  "initialDelaySeconds": 10, "periodSeconds": 30},
+                "terminationMessagePath": "/dev/termination-log",
+                "terminationMessagePolicy": "File",
+            }],
+            "volumes": [{"name": "kube-api-access", "projected": {"sources": [
+                {"serviceAccountToken": {"expirationSeconds": 3607, "path": "token"}},
+                {"configMap": {"name": "kube-root-ca.crt", "items": [{"key": "ca.crt", "path": "ca.crt"}]}},
+            ]}}],
+            "tolerations": [
+                {"key": "node.kubernetes.io/not-ready", "operator": "Exists", "effect": "NoExecute",
+                 "tolerationSeconds": 300},
+            ],
+        },
+        "status": {
+            "phase": ("Running", "Running", "Pending", "Failed")[i % 4],
+            "hostIP": "172.18.0.3",
+            "podIP": f"10.42.{i // 250 % 256}.{i % 250}",
+            "startTime": "2024-01-01T00:00:00Z",
+            "qosClass": "Burstable",
+            "conditions": [{"type": t, "status": "True", "lastTransitionTime": "2024-01-01T00:00:00Z"}
+                           for t in ("Initialized", "Ready", "ContainersReady", "PodScheduled")],
+            "containerStatuses": [{
+                "name": "app", "ready": True, "restartCount": 0, "started": True,
+                "image": "localhost:5000/workload:latest", "imageID": "sha256:" + "ab" * 32,
+                "containerID": "containerd://" + f"{i:064x}",
+                "state": {"running": {"startedAt": "2024-01-01T00:00:00Z"}},
+            }],
+        },
+    }
+
+
+class _Response:
+    """The raw aiohttp response kubernetes_asyncio returns with _preload_content=False."""
+    status = 200
+    reason = "OK"
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    async def read(self) -> bytes:
+        return self.data
+
+    def release(self) -> None:
+        pass
+
+
+class FakeCoreV1:
+    """Serves pre-serialized PodList pages like list_pod_for_all_namespaces."""
+
+    def __init__(self, pods: int):
+        self.items = [make_pod(i) for i in range(pods)]
+
+    async def list_pod_for_all_namespaces(self, limit=None, _continue=None, _preload_content=True,
+                                          _request_timeout=None):
+        start = int(_continue or 0)
+        end = len(self.items) if not limit else start + limit
+        metadata = {"resourceVersion": "1"}
+        if end < len(self.items):
+            metadata["continue"] = str(end)
+        body = json.dumps({"kind": "PodList", "apiVersion": "v1", "metadata": metadata,
+                           "items": self.items[start:end]}).encode()
+        return _Response(body)
+
+
+async def run_model(v1) -> int:
+    """Baseline: what list_pod_for_all_namespaces() does with preloading on."""
+    from kubernetes_asyncio import client
+    async with client.ApiClient() as api_client:
+        data = json.loads(await (await v1.list_pod_for_all_namespaces()).read())
+        pods = api_client._ApiClient__deserialize(data, "V1PodList")
+    return sum(1 for pod in pods.items
+               if (pod.metadata.name, pod.metadata.namespace, pod.spec.priority_class_name, pod.status.phase))
+
+
+async def run_lean(v1) -> int:
+    from app import podlist
+    return len(await podlist.list_pods(v1))
+
+
+async def child(mode: str, pods: int, rounds: int) -> None:
+    v1 = FakeCoreV1(pods)
+    if mode == "model":
+        from kubernetes_asyncio import client  # noqa: F401 - import cost is not list cost
+        run = run_model
+    else:
+        from app import podlist  # noqa: F401
+        run = run_lean
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await run(v1)
+        timings.append((time.perf_counter() - start) * 1000)
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        "mode": mode,
+        "best_ms": round(min(timings), 1),
+        "median_ms": round(sorted(timings)[len(timings) // 2], 1),
+        "peak_rss_mb": round(peak_kb / 1024, 1),
+        "list_overhead_mb": round((peak_kb - baseline_kb) / 1024, 1),
+    }))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pods", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--child", choices=["model", "lean"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        asyncio.run(child(args.child, args.pods, args.rounds))
+        return
+
+    print(f"Listing {args.pods} pods, {args.rounds} rounds")
+    print(f"{'path':<8} {'best ms':>10} {'median ms':>10} {'peak RSS MB':>12} {'list MB':>10}")
+    for mode in ("model", "lean"):
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", mode, "--pods", str(args.pods), "--rounds", str(args.rounds)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        r = json.loads(out)
+        print(f"{mode:<8} {r['best_ms']:>10} {r['median_ms']:>10} {r['peak_rss_mb']:>12} {r['list_overhead_mb']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /api/pods/priorities serialization - pydantic models + stdlib JSON
+vs plain dicts + orjson, with sparse fieldsets and gzip/zstd. No cluster required.
+
+Usage: python bench_responses.py [--pods 10000] [--rounds 5]
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import queries
+from app.models import PodPriorityInfo
+from app.podlist import PodRecord
+
+
+class SyntheticSource:
+    """In-memory source with the same interface as ClusterSource/SnapshotSource."""
+
+    def __init__(self, pods: int):
+        classes = ("platform-critical", "platform-core", None)
+        phases = ("Running", "Running", "Pending", "Failed")
+        self._pods = [
+            PodRecord(f"workload-{i // 10}-{i:06d}", f"tenant-{i % 40}", classes[i % 3], phases[i % 4])
+            for i in range(pods)
+        ]
+        self._memory = {(p.namespace, p.name): f"{32 + i % 200}Mi" for i, p in enumerate(self._pods)}
+
+    def priority_classes(self):
+        return [
+            {"metadata": {"name": "platform-critical"}, "value": 1000000},
+            {"metadata": {"name": "platform-core"}, "value": 10000},
+            {"metadata": {"name": "tenant-default"}, "value": 0, "globalDefault": True},
+        ]
+
+    def pods(self):
+        return iter(self._pods)
+
+    def pod_memory_usage(self):
+        return self._memory
+
+
+def best_ms(fn, rounds: int):
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings), result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pods", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = queries.pod_priorities(SyntheticSource(args.pods))
+    fields = queries.parse_fields("pod_name,priority_value", PodPriorityInfo.model_fields)
+
+    def before():
+        # FastAPI default path: response_model validation, jsonable_encoder, json.dumps
+        models = [PodPriorityInfo(**row) for row in rows]
+        return json.dumps(jsonable_encoder(models), ensure_ascii=False, separators=(",", ":")).encode()
+
+    cases = [
+        ("models + json", before),
+        ("dicts + orjson", lambda: orjson.dumps(rows)),
+        ("fields + orjson", lambda: orjson.dumps(queries.project(rows, fields))),
+        ("fields + orjson + gzip", lambda: gzip.compress(orjson.dumps(queries.project(rows, fields)), 6)),
+    ]
+    try:
+        import zstandard
+        zstd = zstandard.ZstdCompressor(level=3)
+        cases.append(("fields + orjson + zstd", lambda: zstd.compress(orjson.dumps(queries.project(rows, fields)))))
+    except ImportError:
+        pass
+
+    print(f"Serializing {args.pods} pods, best of {args.rounds}")
+    print(f"{'path':<24} {'ms':>8} {'bytes':>12}")
+    for name, fn in cases:
+        ms, body = best_ms(fn, args.rounds)
+        print(f"{name:<24} {ms:>8.1f} {len(body):>12,}")
+
+
+if __name__ == "__main__":
+    main()
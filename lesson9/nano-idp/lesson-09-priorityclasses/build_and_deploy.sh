@@ -46,13 +46,13 @@ sleep 5
 echo "🐍 Step 3: Building Python backend..."
 if [ "$DOCKER_ACCESSIBLE" = true ]; then
     cd backend
-    docker build -t "${BACKEND_IMAGE}" . || (echo "❌ Docker build failed" && exit 1)
+    DOCKER_BUILDKIT=1 docker build --build-context nanoidp=../../../../nanoidp -t "${BACKEND_IMAGE}" . || (echo "❌ Docker build failed" && exit 1)
     docker push "${BACKEND_IMAGE}" || (echo "❌ Docker push failed" && exit 1)
     cd ..
 else
     echo "⚠️  Skipping Docker build (Docker not accessible)"
     echo "   Please build images manually:"
-    echo "   cd backend && docker build -t ${BACKEND_IMAGE} . && docker push ${BACKEND_IMAGE}"
+    echo "   cd backend && DOCKER_BUILDKIT=1 docker build --build-context nanoidp=../../../../nanoidp -t ${BACKEND_IMAGE} . && docker push ${BACKEND_IMAGE}"
     echo "   Then re-run this script or continue with: kubectl apply -f k8s/backend-deployment.yaml"
 fi
 
@@ -2,17 +2,31 @@
 """
 Script to show the API JSON output of the Priority Monitor project
 """
-from kubernetes import client, config
-from kubernetes.client.rest import ApiException
+from pathlib import Path
+import argparse
+import asyncio
 import json
+import sys
 
-try:
-    config.load_kube_config()
-except:
-    config.load_incluster_config()
+# Shared query code lives in the backend package, the monitor library at the repo root
+sys.path.insert(0, str(Path(__file__).resolve().parent / "backend"))
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from app import queries
+from app.snapshot import make_source
+from nanoidp import kube
+
+parser = argparse.ArgumentParser(description="Show Priority Monitor API JSON output")
+parser.add_argument("--snapshot", help="replay a captured snapshot instead of the live cluster")
+args = parser.parse_args()
 
-v1 = client.CoreV1Api()
-scheduling_v1 = client.SchedulingV1Api()
+# The live cluster is read once, up front (PriorityClasses, pods and metrics
+# concurrently), so this is the only place a Kubernetes error can surface
+try:
+    source = make_source(args.snapshot)
+except (kube.ApiException, kube.ConfigException) as e:
+    sys.exit(f"Kubernetes API error: {e}")
+except asyncio.TimeoutError:
+    sys.exit("Kubernetes API did not answer in time")
 
 print("=" * 80)
 print("🎯 Priority Monitor - API Endpoint Outputs")
@@ -22,23 +36,8 @@ print()
 # API Endpoint 1: /api/priorityclasses
 print("1️⃣  GET /api/priorityclasses")
 print("-" * 80)
-try:
-    priority_classes = scheduling_v1.list_priority_class()
-    
-    results = []
-    for pc in priority_classes.items:
-        results.append({
-            "name": pc.metadata.name,
-            "value": pc.value,
-            "global_default": pc.global_default or False,
-            "description": pc.description,
-            "preemption_policy": pc.preemption_policy
-        })
-    
-    results.sort(key=lambda x: x["value"], reverse=True)
-    print(json.dumps(results, indent=2))
-except ApiException as e:
-    print(json.dumps({"error": str(e)}, indent=2))
+results = queries.priority_classes(source)
+print(json.dumps(results, indent=2))
 
 print()
 print()
@@ -46,38 +45,8 @@ print()
 # API Endpoint 2: /api/stats
 print("2️⃣  GET /api/stats")
 print("-" * 80)
-try:
-    pods = v1.list_pod_for_all_namespaces()
-    priority_classes = {
-        pc.metadata.name: pc.value 
-        for pc in scheduling_v1.list_priority_class().items
-    }
-    
-    stats = {}
-    for pod in pods.items:
-        priority_class = pod.spec.priority_class_name or "tenant-default"
-        
-        if priority_class not in stats:
-            stats[priority_class] = {
-                "count": 0,
-                "priority_value": priority_classes.get(priority_class, 0),
-                "running": 0,
-                "pending": 0,
-                "failed": 0
-            }
-        
-        stats[priority_class]["count"] += 1
-        
-        if pod.status.phase == "Running":
-            stats[priority_class]["running"] += 1
-        elif pod.status.phase == "Pending":
-            stats[priority_class]["pending"] += 1
-        elif pod.status.phase == "Failed":
-            stats[priority_class]["failed"] += 1
-    
-    print(json.dumps(stats, indent=2))
-except ApiException as e:
-    print(json.dumps({"error": str(e)}, indent=2))
+stats = queries.priority_stats(source)
+print(json.dumps(stats, indent=2))
 
 print()
 print()
@@ -85,39 +54,9 @@ print()
 # API Endpoint 3: /api/pods/priorities (sample)
 print("3️⃣  GET /api/pods/priorities (showing first 10 pods)")
 print("-" * 80)
-try:
-    priority_classes = {
-        pc.metadata.name: pc.value 
-        for pc in scheduling_v1.list_priority_class().items
-    }
-    
-    if "tenant-default" in priority_classes:
-        default_priority = priority_classes["tenant-default"]
-    else:
-        default_priority = 0
-    
-    results = []
-    pods = v1.list_pod_for_all_namespaces()
-    
-    for pod in pods.items:
-        priority_class = pod.spec.priority_class_name or "tenant-default"
-        priority_value = priority_classes.get(priority_class, default_priority)
-        
-        results.append({
-            "pod_name": pod.metadata.name,
-            "namespace": pod.metadata.namespace,
-            "priority_class": priority_class,
-            "priority_value": priority_value,
-            "memory_usage": None,  # Would require metrics server
-            "status": pod.status.phase
-        })
-    
-    results.sort(key=lambda x: x["priority_value"], reverse=True)
-    print(json.dumps(results[:10], indent=2))
-    print(f"\n... and {len(results) - 10} more pods")
-    
-except ApiException as e:
-    print(json.dumps({"error": str(e)}, indent=2))
+results = queries.pod_priorities(source)
+print(json.dumps(results[:10], indent=2))
+print(f"\n... and {len(results) - 10} more pods")
 
 print()
 print("=" * 80)
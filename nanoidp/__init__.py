@@ -0,0 +1,5 @@
+"""
+Shared library for the Nano-IDP node monitors.
+Each lesson backend imports it from the repo root when run from a checkout;
+images get a copy next to main.py through the `nanoidp` build context.
+"""
@@ -0,0 +1,318 @@
+"""
+Declarative alert rules, evaluated incrementally on every sample.
+
+A rule compares one metric of an entity with a threshold:
+
+    {"name": "pod-memory-stall", "scope": "pods", "metric": "full_avg10", "op": ">",
+     "threshold": 5, "clear": 3, "for_s": 30, "severity": "warning",
+     "summary": "{entity}: memory full stall {value:.1f}% (avg10)"}
+
+`for_s` is how long the condition must hold before the alert fires (it is
+pending until then); `clear` is the hysteresis threshold: a firing alert
+stays firing until the value no longer satisfies `op` against `clear`
+(defaults to `threshold`). Each monitor ships its rules as data and
+ALERT_RULES can point at a JSON list that overrides them by name, adds new
+ones, or drops one with {"name": ..., "disabled": true}.
+
+A sample is a frame: entity ids plus one column per metric, for a scope
+("node", "pods", "processes"...). Rules on the same metric and direction
+share one C-level pass over the column (max/min, then map and compress
+past the loosest threshold); each rule then scans only the few entities
+that passed. Only breaching or firing entities are touched in
+Python, and the pending/firing state carries over between samples instead
+of re-scanning a window.
+"""
+from itertools import compress, repeat
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+import asyncio
+import json
+import logging
+import operator
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+OPS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le}
+SEVERITY = {"info": 0, "warning": 1, "critical": 2}
+
+
+class Rule(NamedTuple):
+    name: str
+    metric: str
+    op: str
+    threshold: float
+    scope: str = "node"
+    for_s: float = 0.0
+    clear: Optional[float] = None
+    severity: str = "warning"
+    summary: str = ""
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "Rule":
+        rule = cls(**{k: v for k, v in data.items() if k in cls._fields})
+        if rule.op not in OPS:
+            raise ValueError(f"Rule {rule.name}: op must be one of {sorted(OPS)}")
+        if rule.severity not in SEVERITY:
+            raise ValueError(f"Rule {rule.name}: severity must be one of {sorted(SEVERITY)}")
+        return rule
+
+    def test(self, value: float) -> bool:
+        """The bare condition, without for_s or hysteresis."""
+        return OPS[self.op](value, self.threshold)
+
+
+def load_rules(defaults: Iterable[Mapping], path: Optional[str] = None) -> List[Rule]:
+    """Defaults merged by name with the JSON list at path (ALERT_RULES)."""
+    merged = {rule["name"]: dict(rule) for rule in defaults}
+    path = path or os.getenv("ALERT_RULES")
+    if path:
+        with open(path) as f:
+            for rule in json.load(f):
+                if rule.get("disabled"):
+                    merged.pop(rule["name"], None)
+                else:
+                    merged[rule["name"]] = {**merged.get(rule["name"], {}), **rule}
+    return [Rule.from_dict(rule) for rule in merged.values()]
+
+
+class _State:
+    __slots__ = ("pending", "firing")
+
+    def __init__(self):
+        self.pending: Dict[str, float] = {}
+        self.firing: Dict[str, Dict] = {}
+
+
+class _Group:
+    """
+    The rules of one scope that test one metric in one direction. Per sample
+    the group makes one C-level pass to pick the entities past the loosest
+    bound any rule still needs; each rule then only scans those.
+    """
+
+    __slots__ = ("metric", "upper", "rules")
+
+    def __init__(self, metric: str, upper: bool):
+        self.metric = metric
+        self.upper = upper
+        self.rules: List[Rule] = []
+
+    def candidates(self, column: Sequence[float], states: Mapping[str, _State]):
+        bounds = []
+        for rule in self.rules:
+            bounds.append(rule.threshold)
+            if rule.clear is not None and states[rule.name].firing:
+                bounds.append(rule.clear)
+        if self.upper:
+            bound = min(bounds)
+            hit = column and max(column) >= bound
+            op = operator.ge
+        else:
+            bound = max(bounds)
+            hit = column and min(column) <= bound
+            op = operator.le
+        if not hit:
+            return lambda rule_op, threshold: ()
+        picked = list(compress(range(len(column)), map(op, column, repeat(bound))))
+        values = [column[i] for i in picked]
+
+        def matches(rule_op: str, threshold: float) -> Iterable[int]:
+            return compress(picked, map(OPS[rule_op], values, repeat(threshold)))
+
+        return matches
+
+
+class RuleEngine:
+    """Pending/firing state per rule and entity, plus a push stream of transitions."""
+
+    def __init__(self, rules: Iterable[Rule]):
+        self.rules = {rule.name: rule for rule in rules}
+        self._scopes: Dict[str, List[Rule]] = {}
+        groups: Dict[Tuple[str, str, bool], _Group] = {}
+        for rule in self.rules.values():
+            self._scopes.setdefault(rule.scope, []).append(rule)
+            key = (rule.scope, rule.metric, rule.op in (">", ">="))
+            groups.setdefault(key, _Group(rule.metric, key[2])).rules.append(rule)
+        self._groups: Dict[str, List[_Group]] = {}
+        for (scope, _, _), group in groups.items():
+            self._groups.setdefault(scope, []).append(group)
+        self._state = {name: _State() for name in self.rules}
+        self._subscribers: List[asyncio.Queue] = []
+        self._frames: Dict[str, Tuple[Sequence[str], Mapping[str, Sequence[float]]]] = {}
+        self.evaluations = 0
+        self.last_us = 0.0
+
+    @classmethod
+    def from_env(cls, defaults: Iterable[Mapping]) -> "RuleEngine":
+        return cls(load_rules(defaults))
+
+    def rule(self, name: str) -> Rule:
+        return self.rules[name]
+
+    def worst(self, values: Mapping[str, float], scope: str = "node") -> str:
+        """Highest severity whose bare condition matches one entity's values, else "ok"."""
+        worst = "ok"
+        for rule in self._scopes.get(scope, ()):
+            value = values.get(rule.metric)
+            if value is not None and rule.test(value):
+                if worst == "ok" or SEVERITY[rule.severity] > SEVERITY[worst]:
+                    worst = rule.severity
+        return worst
+
+    def observe(self, scope: str, ids: Sequence[str], columns: Mapping[str, Sequence[float]],
+                now: Optional[float] = None) -> List[Dict]:
+        """
+        Evaluate every rule of a scope against one sample and return the
+        transitions (firing/resolved). Entities missing from the sample
+        resolve, and so does every alert of a rule whose metric the sample
+        lacks. Runs on the event loop (it feeds the subscriber queues);
+        the frame is kept by reference to report current values.
+        """
+        start = time.perf_counter()
+        now = time.time() if now is None else now
+        events: List[Dict] = []
+        index: Optional[Dict[str, int]] = None
+        for group in self._groups.get(scope, ()):
+            column = columns.get(group.metric)
+            if column is None:
+                for rule in group.rules:
+                    state = self._state[rule.name]
+                    state.pending.clear()
+                    for alert in state.firing.values():
+                        events.append({"event": "resolved", **alert, "value": None,
+                                       "resolved_at": now, "reason": "no data"})
+                    state.firing.clear()
+                continue
+            matches = group.candidates(column, self._state)
+            for rule in group.rules:
+                state = self._state[rule.name]
+                firing, pending = state.firing, state.pending
+                breaching = {ids[i] for i in matches(rule.op, rule.threshold)}
+                if not (breaching or firing or pending):
+                    continue
+
+                if firing:
+                    if rule.clear is None or rule.clear == rule.threshold:
+                        holding = breaching
+                    else:
+                        holding = {ids[i] for i in matches(rule.op, rule.clear)}
+                    for entity in firing.keys() - holding:
+                        if index is None:
+                            index = dict(zip(ids, range(len(ids))))
+                        alert = firing.pop(entity)
+                        i = index.get(entity)
+                        events.append({"event": "resolved", **alert, "value": column[i] if i is not None else None,
+                                       "resolved_at": now, "reason": "cleared" if i is not None else "gone"})
+
+                if pending:
+                    for entity in pending.keys() - breaching:
+                        del pending[entity]
+                for entity in (breaching - firing.keys() if firing else breaching):
+                    since = pending.setdefault(entity, now)
+                    if now - since >= rule.for_s:
+                        del pending[entity]
+                        if index is None:
+                            index = dict(zip(ids, range(len(ids))))
+                        alert = firing[entity] = self._alert(rule, entity, column[index[entity]], since, now)
+                        events.append({"event": "firing", **alert})
+
+        self._frames[scope] = (ids, columns)
+        for event in events:
+            self._publish(event)
+        self.evaluations += 1
+        self.last_us = round((time.perf_counter() - start) * 1e6, 1)
+        return events
+
+    @staticmethod
+    def _alert(rule: Rule, entity: str, value: float, since: float, now: float) -> Dict:
+        summary = rule.summary.format(entity=entity, value=value, threshold=rule.threshold) \
+            if rule.summary else f"{rule.metric} {rule.op} {rule.threshold}"
+        return {"rule": rule.name, "scope": rule.scope, "entity": entity, "severity": rule.severity,
+                "value": value, "summary": summary, "pending_since": since, "fired_at": now}
+
+    def firing(self, severity: Optional[str] = None) -> List[Dict]:
+        """Firing alerts, most severe first, with the value from the latest sample."""
+        indexes = {scope: dict(zip(ids, range(len(ids)))) for scope, (ids, _) in self._frames.items()}
+        alerts = []
+        for name, state in self._state.items():
+            rule = self.rules[name]
+            if not state.firing or (severity and rule.severity != severity):
+                continue
+            ids, columns = self._frames[rule.scope]
+            column = columns.get(rule.metric)
+            for entity, alert in state.firing.items():
+                i = indexes[rule.scope].get(entity)
+                alerts.append({**alert, "value": column[i] if column is not None and i is not None else None})
+        return sorted(alerts, key=lambda a: (-SEVERITY[a["severity"]], a["fired_at"]))
+
+    def pending(self) -> List[Dict]:
+        return [{"rule": name, "entity": entity, "since": since}
+                for name, state in self._state.items() for entity, since in state.pending.items()]
+
+    def stats(self) -> Dict:
+        return {
+            "rules": len(self.rules),
+            "firing": sum(len(s.firing) for s in self._state.values()),
+            "pending": sum(len(s.pending) for s in self._state.values()),
+            "evaluations": self.evaluations,
+            "last_us": self.last_us,
+        }
+
+    def _publish(self, event: Dict) -> None:
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()  # drop oldest for slow readers
+            queue.put_nowait(event)
+
+    def subscribe(self, maxsize: int = 100) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        if queue in self._subscribers:
+            self._subscribers.remove(queue)
+
+
+def router(engine: RuleEngine, prefix: str = "/api/alerts"):
+    """
+    GET {prefix} (firing and pending), {prefix}/rules and {prefix}/stream
+    (Server-Sent Events, one event per transition). FastAPI is imported
+    here so the engine itself stays stdlib-only.
+    """
+    from fastapi import APIRouter, Query, Request
+    from fastapi.responses import StreamingResponse
+
+    api = APIRouter(prefix=prefix, tags=["alerts"])
+
+    @api.get("")
+    async def get_alerts(severity: Optional[str] = Query(None, description="info|warning|critical")) -> Dict:
+        """Firing alerts (most severe first) and alerts waiting out their for_s."""
+        return {"firing": engine.firing(severity), "pending": engine.pending(), "stats": engine.stats()}
+
+    @api.get("/rules")
+    async def get_rules() -> List[Dict]:
+        return [rule._asdict() for rule in engine.rules.values()]
+
+    @api.get("/stream")
+    async def stream_alerts(request: Request):
+        """Server-Sent Events: firing/resolved transitions as they happen."""
+        queue = engine.subscribe()
+
+        async def events():
+            try:
+                while not await request.is_disconnected():
+                    try:
+                        event = await asyncio.wait_for(queue.get(), timeout=15)
+                    except asyncio.TimeoutError:
+                        yield ": keep-alive\n\n"
+                        continue
+                    yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+            finally:
+                engine.unsubscribe(queue)
+
+        return StreamingResponse(events(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache"})
+
+    return api
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Cost of one alert evaluation (nanoidp.alerts.RuleEngine.observe) per sample
+for N entities x M rules. Metric values jitter around each entity's level;
+about 3% of the entities run hot, breach, cross back through the hysteresis
+band or disappear between samples, so firing/resolved transitions are part
+of the measured path.
+
+Usage (repo root):
+  python -m nanoidp.bench_alerts [--entities 500] [--rules 20] [--samples 2000]
+  python -m nanoidp.bench_alerts --check --budget-us 500   # exit 1 when the median is over budget
+"""
+from pathlib import Path
+import argparse
+import random
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from nanoidp import alerts  # noqa: E402
+
+METRICS = ("full_avg10", "some_avg10", "limit_ratio", "cpu_throttled", "io_wait")
+
+
+def make_rules(count: int):
+    rules = []
+    for i in range(count):
+        threshold = 80 + (i // len(METRICS)) * 4
+        rules.append(alerts.Rule(name=f"rule-{i}", scope="pods", metric=METRICS[i % len(METRICS)], op=">",
+                                 threshold=threshold, clear=threshold - 5, for_s=(i % 3) * 10,
+                                 severity="critical" if i % 4 == 0 else "warning",
+                                 summary="{entity}: {value:.1f}"))
+    return rules
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entities", type=int, default=500, help="pods/processes per sample")
+    parser.add_argument("--rules", type=int, default=20)
+    parser.add_argument("--samples", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--budget-us", type=float, default=500.0, help="median budget per evaluation")
+    parser.add_argument("--check", action="store_true", help="exit 1 when the median exceeds the budget")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    engine = alerts.RuleEngine(make_rules(args.rules))
+    ids = [f"pod{i:05d}" for i in range(args.entities)]
+    # Most entities idle around 40; ~3% run hot around the thresholds
+    bases = {metric: [40.0 if rng.random() > 0.03 else 85.0 for _ in ids] for metric in METRICS}
+    columns = {metric: [base + rng.uniform(-15, 15) for base in bases[metric]] for metric in METRICS}
+
+    latencies, transitions = [], 0
+    now = time.time()
+    for sample in range(args.samples):
+        now += 1
+        for metric, column in columns.items():
+            for _ in range(max(1, args.entities // 50)):  # a few values move each sample
+                i = rng.randrange(args.entities)
+                column[i] = bases[metric][i] + rng.uniform(-15, 15)
+        if sample % 100 == 99:  # pod churn
+            ids[rng.randrange(args.entities)] = f"pod-new{sample}"
+        start = time.perf_counter()
+        transitions += len(engine.observe("pods", ids, columns, now))
+        latencies.append((time.perf_counter() - start) * 1e6)
+
+    p50, p99 = percentile(latencies, 50), percentile(latencies, 99)
+    stats = engine.stats()
+    print(f"{args.entities} entities x {args.rules} rules, {args.samples} samples")
+    print(f"observe  p50 {p50:8.1f} us   p99 {p99:8.1f} us   max {max(latencies):8.1f} us")
+    print(f"transitions {transitions}, firing {stats['firing']}, pending {stats['pending']}")
+    if args.check and p50 > args.budget_us:
+        print(f"OVER BUDGET: p50 {p50:.1f} us > {args.budget_us:.0f} us")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
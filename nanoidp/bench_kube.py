@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Load test of the cluster-facing monitors against the fake API server.
+For each object count it starts nanoidp.fakekube, then each monitor
+(lesson 4 CNI, lesson 8 storage, lesson 9 priority) pointed at it, and
+requests every endpoint: first (cold) latency, p50/p99 of the following
+requests, non-200 count and the monitor's RSS and peak RSS afterwards.
+The response cache (nanoidp.httpcache) is turned off for the measured
+endpoints unless --cache is given. Runs fully offline.
+
+--health measures the liveness probe instead: /health (/ for lesson 4,
+/api/health for lesson 8) latency while idle, then while --concurrency
+clients keep the monitor's endpoints busy against a slow API server
+(--per-item-us, default 200 here).
+A handler that blocks the loop on a LIST shows up as probe latency.
+
+Usage (repo root):
+  python -m nanoidp.bench_kube [--pods 1000,10000,50000] [--requests 10] [--latency-ms 2] [--cache]
+  python -m nanoidp.bench_kube --health [--pods 5000] [--concurrency 4] [--probes 100]
+"""
+from pathlib import Path
+from typing import Dict, List, NamedTuple
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from nanoidp import procfs  # noqa: E402
+
+
+class Monitor(NamedTuple):
+    directory: str
+    target: str
+    endpoints: List[str]
+    probe: str = "/health"  # liveness probe path in the monitor's Deployment
+
+
+MONITORS: Dict[str, Monitor] = {
+    "cni": Monitor("lesson4/nano-idp-lesson04/cni-monitor/backend", "main:app", ["/api/cni/health"], "/"),
+    "storage": Monitor("lesson8/nano-idp-lesson8/backend", "main:app", [
+        "/api/storage/volumes", "/api/storage/volumes?consistent=true", "/api/storage/classes"], "/api/health"),
+    "priority": Monitor("lesson9/nano-idp/lesson-09-priorityclasses/backend", "app.main:app", [
+        "/api/priorityclasses", "/api/pods/priorities", "/api/stats"]),
+}
+
+
+def memory_mb(pid: int) -> Dict[str, float]:
+    status = procfs.parse_keyed(procfs.read_once(f"/proc/{pid}/status"), ["VmRSS", "VmHWM"])
+    return {"rss_mb": round(status.get("VmRSS", 0) / 1024, 1), "peak_mb": round(status.get("VmHWM", 0) / 1024, 1)}
+
+
+def wait_for(url: str, proc: subprocess.Popen, timeout_s: float = 120) -> None:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{proc.args} exited with {proc.returncode}")
+        try:
+            urllib.request.urlopen(url, timeout=2).read()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"{url} not ready after {timeout_s}s")
+
+
+def timed_get(url: str, timeout_s: float) -> (float, int):
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout_s) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        e.read()
+        status = e.code
+    except OSError:
+        status = 0
+    return (time.perf_counter() - start) * 1000, status
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+
+def stop(proc: subprocess.Popen) -> None:
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def start_monitor(monitor: Monitor, env: Dict[str, str], port: int) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", monitor.target, "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT / monitor.directory, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def bench_monitor(name: str, monitor: Monitor, env: Dict[str, str], port: int, args) -> List[Dict]:
+    proc = start_monitor(monitor, env, port)
+    base = f"http://127.0.0.1:{port}"
+    rows = []
+    try:
+        wait_for(f"{base}/openapi.json", proc)
+        for endpoint in monitor.endpoints:
+            first, first_status = timed_get(base + endpoint, args.timeout)
+            latencies, errors = [], int(first_status != 200)
+            for _ in range(args.requests):
+                ms, status = timed_get(base + endpoint, args.timeout)
+                latencies.append(ms)
+                errors += status != 200
+            rows.append({
+                "monitor": name, "endpoint": endpoint, "first_ms": round(first, 1),
+                "p50_ms": round(percentile(latencies, 50), 1), "p99_ms": round(percentile(latencies, 99), 1),
+                "errors": errors, **memory_mb(proc.pid),
+            })
+    finally:
+        stop(proc)
+    return rows
+
+
+def probe(url: str, count: int, interval_s: float, timeout_s: float) -> List[float]:
+    latencies = []
+    for _ in range(count):
+        latency, status = timed_get(url, timeout_s)
+        if status // 100 == 4:  # wrong probe path: nothing worth timing
+            raise RuntimeError(f"{url} answered {status}")
+        latencies.append(latency)
+        time.sleep(interval_s)
+    return latencies
+
+
+def bench_health(name: str, monitor: Monitor, env: Dict[str, str], port: int, args) -> Dict:
+    proc = start_monitor(monitor, env, port)
+    base = f"http://127.0.0.1:{port}"
+    stopping = threading.Event()
+    served, errors = [0], [0]
+
+    def load(endpoint: str) -> None:
+        while not stopping.is_set():
+            _, status = timed_get(base + endpoint, args.timeout)
+            served[0] += 1
+            errors[0] += status != 200
+
+    try:
+        wait_for(f"{base}/openapi.json", proc)
+        for endpoint in monitor.endpoints:  # warm up: client, config and imports
+            timed_get(base + endpoint, args.timeout)
+        idle = probe(base + monitor.probe, args.probes, args.probe_interval, args.timeout)
+        clients = [threading.Thread(target=load, args=(monitor.endpoints[i % len(monitor.endpoints)],), daemon=True)
+                   for i in range(args.concurrency)]
+        for client in clients:
+            client.start()
+        time.sleep(0.5)
+        loaded = probe(base + monitor.probe, args.probes, args.probe_interval, args.timeout)
+        stopping.set()
+        for client in clients:
+            client.join(args.timeout)
+        return {
+            "monitor": name, "probe": monitor.probe,
+            "idle_p50_ms": round(percentile(idle, 50), 1), "idle_p99_ms": round(percentile(idle, 99), 1),
+            "load_p50_ms": round(percentile(loaded, 50), 1), "load_p99_ms": round(percentile(loaded, 99), 1),
+            "load_max_ms": round(max(loaded), 1), "requests": served[0], "errors": errors[0], **memory_mb(proc.pid),
+        }
+    finally:
+        stopping.set()
+        stop(proc)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pods", default="1000,10000,50000", help="comma-separated pod counts")
+    parser.add_argument("--monitors", default=",".join(MONITORS), help="comma-separated monitors")
+    parser.add_argument("--requests", type=int, default=10, help="requests per endpoint after the first")
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="API server latency per request")
+    parser.add_argument("--per-item-us", type=float, default=None,
+                        help="API server cost per returned item (default 0, 200 with --health)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request timeout (s)")
+    parser.add_argument("--port", type=int, default=18300)
+    parser.add_argument("--cache", action="store_true", help="keep the response cache on (repeat requests hit it)")
+    parser.add_argument("--json", type=Path, help="also write the rows to this file")
+    parser.add_argument("--health", action="store_true", help="liveness probe latency under slow LISTs")
+    parser.add_argument("--concurrency", type=int, default=4, help="--health: clients keeping endpoints busy")
+    parser.add_argument("--probes", type=int, default=100, help="--health: probes idle and under load")
+    parser.add_argument("--probe-interval", type=float, default=0.02, help="--health: seconds between probes")
+    args = parser.parse_args()
+    if args.per_item_us is None:
+        args.per_item_us = 200.0 if args.health else 0.0
+
+    results = []
+    if args.health:
+        print(f"{'pods':>6} {'monitor':<9} {'probe':<11} {'idle p50':>9} {'idle p99':>9} {'load p50':>9} "
+              f"{'load p99':>9} {'load max':>9} {'requests':>9} {'err':>4}")
+    else:
+        print(f"{'pods':>6} {'monitor':<9} {'endpoint':<38} {'first ms':>9} {'p50 ms':>8} {'p99 ms':>8} "
+              f"{'err':>4} {'RSS MB':>7} {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        kubeconfig = Path(tmp) / "kubeconfig"
+        for pods in (int(p) for p in args.pods.split(",")):
+            fake = subprocess.Popen(
+                [sys.executable, "-m", "nanoidp.fakekube", "--pods", str(pods), "--port", str(args.port),
+                 "--latency-ms", str(args.latency_ms), "--per-item-us", str(args.per_item_us),
+                 "--kubeconfig-out", str(kubeconfig)],
+                cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                wait_for(f"http://127.0.0.1:{args.port}/fake/stats", fake)
+                env = dict(os.environ, KUBECONFIG=str(kubeconfig), PYTHONPATH=str(ROOT),
+                           HISTORY_DIR=str(Path(tmp) / "history"))
+                env.pop("KUBERNETES_SERVICE_HOST", None)
+                if not args.cache:
+                    env["CACHE_TTL"] = json.dumps({endpoint.partition("?")[0]: 0 for monitor in MONITORS.values()
+                                                   for endpoint in monitor.endpoints})
+                for i, name in enumerate(args.monitors.split(",")):
+                    if args.health:
+                        row = bench_health(name, MONITORS[name], env, args.port + 1 + i, args)
+                        row["pods"] = pods
+                        results.append(row)
+                        print(f"{pods:>6} {name:<9} {row['probe']:<11} {row['idle_p50_ms']:>9.1f} "
+                              f"{row['idle_p99_ms']:>9.1f} {row['load_p50_ms']:>9.1f} {row['load_p99_ms']:>9.1f} "
+                              f"{row['load_max_ms']:>9.1f} {row['requests']:>9} {row['errors']:>4}", flush=True)
+                        continue
+                    for row in bench_monitor(name, MONITORS[name], env, args.port + 1 + i, args):
+                        row["pods"] = pods
+                        results.append(row)
+                        print(f"{pods:>6} {name:<9} {row['endpoint']:<38} {row['first_ms']:>9.1f} "
+                              f"{row['p50_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['errors']:>4} "
+                              f"{row['rss_mb']:>7.1f} {row['peak_mb']:>8.1f}", flush=True)
+            finally:
+                stop(fake)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the node monitors' hot paths on synthetic trees.
+Generates /proc, cgroupfs and diskstats fixtures at the requested scale,
+loads the lesson 2, 5, 6 and 8 backends pointed at them (PROC_ROOT,
+CGROUP_ROOT, DISKSTATS_PATH) and reports ops/s and peak allocation per
+call for each function. Every run is appended to a JSON-lines results
+file and compared with the previous run at the same scale on this host.
+
+Usage (repo root):
+  python -m nanoidp.bench_monitors [--pids 50000] [--pods 2000] [--disks 64]
+  python -m nanoidp.bench_monitors --fixtures /tmp/nanoidp-fixtures   # reuse trees
+  python -m nanoidp.bench_monitors --check --threshold 15            # fail on regressions
+"""
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from nanoidp import fixtures  # noqa: E402
+
+DEFAULT_RESULTS = ROOT / "bench-results" / "monitors.jsonl"
+
+MONITORS = {
+    "memory": "lesson2/module_02/backend/main.py",
+    "kernel": "lesson5/nano-idp/kernel-monitor/src/main.py",
+    "cgroup": "lesson6/nano-idp-lesson06/monitor/backend/main.py",
+    "storage": "lesson8/nano-idp-lesson8/backend/main.py",
+}
+
+
+def load(name: str):
+    """Import a monitor's main.py under a unique module name."""
+    path = ROOT / MONITORS[name]
+    if str(path.parent) not in sys.path:
+        sys.path.append(str(path.parent))
+    spec = importlib.util.spec_from_file_location(f"bench_monitor_{name}", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def build_fixtures(root: Path, args) -> Dict:
+    """Generate the trees unless a previous run left them at the same scale."""
+    marker = root / "scale.json"
+    scale = {"pids": args.pids, "pods": args.pods, "disks": args.disks, "seed": args.seed}
+    if marker.exists() and json.loads(marker.read_text()).get("scale") == scale:
+        return json.loads(marker.read_text())
+    start = time.perf_counter()
+    info = {
+        "scale": scale,
+        "proc": fixtures.proc_tree(root / "proc", args.pids, args.seed),
+        "cgroup": fixtures.cgroup_tree(root / "cgroup", args.pods, args.seed),
+        "diskstats": fixtures.diskstats(root / "diskstats", args.disks, seed=args.seed),
+    }
+    print(f"generated fixtures in {time.perf_counter() - start:.1f}s under {root}")
+    marker.write_text(json.dumps(info))
+    return info
+
+
+def heaviest_pid(proc_root: Path) -> int:
+    """The pid with the largest maps file (the top consumer)."""
+    best = max((entry for entry in os.scandir(proc_root) if entry.name.isdigit()),
+               key=lambda entry: os.stat(f"{entry.path}/maps").st_size)
+    return int(best.name)
+
+
+def measure(fn: Callable[[], object], min_time: float) -> Dict[str, float]:
+    fn()  # warm up (opens descriptors, fills caches)
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    per_op = min(timer.repeat(repeat=3, number=number)) / number
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ops_s": round(1 / per_op, 2), "us_op": round(per_op * 1e6, 2), "peak_kb": round(peak / 1024, 1)}
+
+
+def cases(root: Path) -> List[Tuple[str, Callable[[], object]]]:
+    loop = asyncio.new_event_loop()
+
+    def run(coro_fn, *args):
+        return lambda: loop.run_until_complete(coro_fn(*args))
+
+    memory, kernel, cgroup, storage = (load(name) for name in MONITORS)
+    pid = heaviest_pid(root / "proc")
+    pressure = (root / "cgroup" / "kubepods" / "burstable" / "memory.pressure").read_bytes()
+
+    def iostat_sample():
+        storage.iostat.sample()
+        return loop.run_until_complete(storage.get_iostat())
+
+    return [
+        ("memory.parse_meminfo", memory.parse_meminfo),
+        ("memory.get_sysctl_value", lambda: memory.get_sysctl_value("vm.swappiness")),
+        ("memory.get_memory_stats", run(memory.get_memory_stats, False, None)),
+        ("kernel.get_process_maps", lambda: kernel.MapMonitor.get_process_maps(pid)),
+        ("kernel.count_maps", lambda: kernel.count_maps(attribute=False)),
+        ("kernel.count_maps+pods", kernel.count_maps),  # attribution cache warm after the first call
+        ("kernel.sample_node", run(kernel.sample_node)),  # what /metrics/maps and /metrics now serve from
+        ("kernel.get_pod_metrics", run(kernel.get_pod_metrics, 20)),
+        ("cgroup.find_pod_cgroup", lambda: cgroup.find_pod_cgroup("bench")),
+        ("cgroup.parse_pressure_file", lambda: cgroup.parse_pressure_file(pressure)),
+        ("cgroup.get_memory_stats", run(cgroup.get_memory_stats, "bench")),
+        ("storage.get_iostat", iostat_sample),
+    ]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def previous_run(path: Path, scale: Dict, host: str) -> Optional[Dict]:
+    if not path.exists():
+        return None
+    previous = None
+    for line in path.read_text().splitlines():
+        record = json.loads(line)
+        if record["scale"] == scale and record["host"] == host:
+            previous = record
+    return previous
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pids", type=int, default=50000, help="processes under /proc")
+    parser.add_argument("--pods", type=int, default=2000, help="pod cgroups under kubepods")
+    parser.add_argument("--disks", type=int, default=64, help="disks in diskstats (2 partitions each)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fixtures", type=Path, help="fixture directory to create or reuse (default: temporary)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timing repeat")
+    parser.add_argument("--only", help="run cases whose name contains this string")
+    parser.add_argument("--results", type=Path, default=DEFAULT_RESULTS, help="JSON-lines results file")
+    parser.add_argument("--threshold", type=float, default=10.0, help="ops/s drop (%%) reported as a regression")
+    parser.add_argument("--check", action="store_true", help="exit 1 on a regression")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = args.fixtures or Path(tmp)
+        info = build_fixtures(root, args)
+        os.environ.update(PROC_ROOT=str(root / "proc"), CGROUP_ROOT=str(root / "cgroup"),
+                          DISKSTATS_PATH=str(root / "diskstats"), HISTORY_DIR=tmp)
+        print(f"pids={info['proc']['pids']} ({info['proc']['maps']} maps, {info['proc']['heavy']} heavy)  "
+              f"pods={info['cgroup']['pods']} ({info['cgroup']['stalled']} stalled)  "
+              f"disks={info['diskstats']['disks']}")
+
+        host = platform.node()
+        previous = previous_run(args.results, info["scale"], host)
+        results: Dict[str, Dict[str, float]] = {}
+        regressions = []
+        print(f"{'function':<28} {'ops/s':>12} {'us/op':>12} {'peak KB':>9} {'vs prev':>9}")
+        for name, fn in cases(root):
+            if args.only and args.only not in name:
+                continue
+            result = results[name] = measure(fn, args.min_time)
+            change = ""
+            before = (previous or {}).get("results", {}).get(name)
+            if before:
+                delta = (result["ops_s"] / before["ops_s"] - 1) * 100
+                change = f"{delta:+.1f}%"
+                if delta < -args.threshold:
+                    regressions.append(f"{name}: {before['ops_s']} -> {result['ops_s']} ops/s ({change})")
+            print(f"{name:<28} {result['ops_s']:>12,.1f} {result['us_op']:>12,.1f} "
+                  f"{result['peak_kb']:>9.1f} {change:>9}")
+
+    args.results.parent.mkdir(parents=True, exist_ok=True)
+    with args.results.open("a") as f:
+        f.write(json.dumps({
+            "timestamp": round(time.time()),
+            "commit": git_commit(),
+            "host": host,
+            "python": platform.python_version(),
+            "scale": info["scale"],
+            "results": results,
+        }) + "\n")
+    if previous:
+        print(f"compared with {previous['commit']} at {time.ctime(previous['timestamp'])}")
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if args.check and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
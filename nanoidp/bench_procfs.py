@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: the monitors' original text readers vs nanoidp.procfs.
+Real /proc is used where it exists; cgroup, PSI and io.stat files fall back
+to generated fixtures so the comparison runs anywhere.
+
+Usage (repo root): python -m nanoidp.bench_procfs [--number 2000] [--pods 500]
+"""
+from operator import itemgetter
+from pathlib import Path
+import argparse
+import os
+import re
+import tempfile
+import timeit
+import tracemalloc
+
+from nanoidp import procfs
+
+PSI = "some avg10=1.25 avg60=0.80 avg300=0.20 total=123456\nfull avg10=0.50 avg60=0.30 avg300=0.05 total=65432\n"
+IO_STAT = "8:0 rbytes=1048576 wbytes=2097152 rios=256 wios=512 dbytes=0 dios=0\n"
+
+
+# --- Original implementations (as they were in lessons 2, 5, 6 and 8) ---
+
+
+def legacy_meminfo():
+    meminfo = {}
+    with Path("/proc/meminfo").open() as f:
+        for line in f:
+            if line.strip():
+                parts = line.split(":", 1)
+                if len(parts) == 2:
+                    value_parts = parts[1].strip().split()
+                    if value_parts:
+                        meminfo[parts[0].strip()] = int(value_parts[0])
+    return meminfo
+
+
+def legacy_sysctl():
+    return int(Path("/proc/sys/vm/swappiness").read_text().strip())
+
+
+def legacy_maps_scan():
+    total = 0
+    for pid_dir in Path("/proc").glob("[0-9]*"):
+        maps_file = Path(f"/proc/{pid_dir.name}/maps")
+        try:
+            if not maps_file.exists():
+                continue
+            with maps_file.open() as f:
+                total += sum(1 for _ in f)
+        except OSError:
+            continue
+    return total
+
+
+def legacy_pressure(path):
+    content = Path(path).read_text()
+    some = re.search(r'some avg10=(\d+\.\d+) avg60=(\d+\.\d+) avg300=\d+\.\d+ total=(\d+)', content)
+    full = re.search(r'full avg10=(\d+\.\d+) avg60=(\d+\.\d+)', content)
+    return (float(some.group(1)), float(some.group(2)), float(full.group(1)), float(full.group(2)),
+            int(some.group(3)))
+
+
+def legacy_cgroup_limits(cgroup):
+    current = int((cgroup / "memory.current").read_text().strip())
+    max_content = (cgroup / "memory.max").read_text().strip()
+    high_content = (cgroup / "memory.high").read_text().strip()
+    return (current, int(max_content) if max_content != "max" else None,
+            int(high_content) if high_content != "max" else None)
+
+
+def legacy_diskstats():
+    disks = {}
+    with open("/proc/diskstats") as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) >= 14:
+                disks[fields[2]] = tuple(int(fields[i]) for i in (3, 5, 6, 7, 9, 10, 11, 12, 13))
+    return disks
+
+
+def legacy_io_stat(paths):
+    data = {}
+    for path in paths:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            data[path] = os.read(fd, 65536)
+        finally:
+            os.close(fd)
+    return data
+
+
+# --- nanoidp.procfs equivalents -----------------------------------------
+
+
+def new_meminfo():
+    return procfs.parse_keyed(procfs.read("/proc/meminfo"))
+
+
+def new_sysctl():
+    return procfs.parse_int(procfs.read("/proc/sys/vm/swappiness"))
+
+
+def new_maps_scan():
+    total = 0
+    for entry in os.scandir("/proc"):
+        if entry.name.isdigit():
+            try:
+                total += procfs.count_lines(f"/proc/{entry.name}/maps")
+            except OSError:
+                continue
+    return total
+
+
+def new_pressure(path):
+    psi = procfs.parse_pressure(procfs.read(path))
+    return (psi["some"]["avg10"], psi["some"]["avg60"], psi["full"]["avg10"], psi["full"]["avg60"],
+            psi["some"]["total"])
+
+
+def new_cgroup_limits(cgroup):
+    return (procfs.parse_int(procfs.read(f"{cgroup}/memory.current")),
+            procfs.parse_limit(procfs.read(f"{cgroup}/memory.max")),
+            procfs.parse_limit(procfs.read(f"{cgroup}/memory.high")))
+
+
+_pick = itemgetter(3, 5, 6, 7, 9, 10, 11, 12, 13)
+
+
+def new_diskstats():
+    return {
+        fields[2].decode(): tuple(map(int, _pick(fields)))
+        for fields in procfs.iter_rows(procfs.read("/proc/diskstats"), 14)
+    }
+
+
+def new_io_stat(files, paths):
+    return {path: files.read(path) for path in paths}
+
+
+# --- Harness ------------------------------------------------------------
+
+
+def measure(fn, number):
+    fn()  # warm up (opens descriptors, fills caches)
+    per_op_us = min(timeit.repeat(fn, number=number, repeat=3)) / number * 1e6
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return per_op_us, peak
+
+
+def fixtures(root: Path, pods: int):
+    cgroup = root / "kubepods" / "burstable" / "pod0"
+    cgroup.mkdir(parents=True)
+    (cgroup / "memory.current").write_text("104857600\n")
+    (cgroup / "memory.max").write_text("268435456\n")
+    (cgroup / "memory.high").write_text("max\n")
+    (cgroup / "memory.pressure").write_text(PSI)
+    io_paths = []
+    for i in range(pods):
+        path = root / f"io-{i}.stat"
+        path.write_text(IO_STAT)
+        io_paths.append(str(path))
+    return cgroup, io_paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=2000, help="calls per timing run")
+    parser.add_argument("--pods", type=int, default=500, help="io.stat fixtures for the batch read")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cgroup, io_paths = fixtures(Path(tmp), args.pods)
+        pressure = "/proc/pressure/memory" if os.path.exists("/proc/pressure/memory") \
+            else str(cgroup / "memory.pressure")
+        files = procfs.FileCache()
+        scan_number = max(1, args.number // 200)
+        cases = [
+            ("meminfo (lesson2)", legacy_meminfo, new_meminfo, args.number),
+            ("sysctl (lesson2/5)", legacy_sysctl, new_sysctl, args.number),
+            ("PSI pressure (lesson6)", lambda: legacy_pressure(pressure),
+             lambda: new_pressure(pressure), args.number),
+            ("cgroup limits (lesson6)", lambda: legacy_cgroup_limits(cgroup),
+             lambda: new_cgroup_limits(cgroup), args.number),
+            ("diskstats (lesson8)", legacy_diskstats, new_diskstats, args.number),
+            (f"io.stat x{args.pods} (lesson8)", lambda: legacy_io_stat(io_paths),
+             lambda: new_io_stat(files, io_paths), scan_number),
+            ("maps scan /proc (lesson5)", legacy_maps_scan, new_maps_scan, scan_number),
+        ]
+
+        print(f"{'reader':<28} {'before us':>11} {'after us':>10} {'speedup':>8} "
+              f"{'before KB':>10} {'after KB':>9}")
+        for name, before, after, number in cases:
+            b_us, b_peak = measure(before, number)
+            a_us, a_peak = measure(after, number)
+            print(f"{name:<28} {b_us:>11.1f} {a_us:>10.1f} {b_us / a_us:>7.1f}x "
+                  f"{b_peak / 1024:>10.1f} {a_peak / 1024:>9.1f}")
+        files.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark and budget check for the Kubernetes-backed monitors.
+For each service it measures, in fresh interpreters and without a cluster
+(KUBECONFIG points at a missing file unless --kubeconfig is given):
+  - import time of the app module
+  - time from process start to the first 200 from its health endpoint
+and lists the slowest top-level imports. With --check it exits non-zero
+when a median exceeds the service's budget, for use as a CI step.
+
+Usage (repo root): python -m nanoidp.bench_startup [--runs 5] [--check] [--scale 1.5]
+"""
+from pathlib import Path
+from statistics import median
+from typing import Dict, List, NamedTuple, Tuple
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+class Service(NamedTuple):
+    directory: str
+    module: str
+    health: str
+    import_budget_ms: float
+    ready_budget_ms: float
+
+
+SERVICES: Dict[str, Service] = {
+    "cni": Service("lesson4/nano-idp-lesson04/cni-monitor/backend", "main", "/", 500, 1000),
+    "priority": Service("lesson9/nano-idp/lesson-09-priorityclasses/backend", "app.main", "/health",
+                        500, 1000),
+}
+
+IMPORT_SNIPPET = (
+    "import time; start = time.perf_counter(); import {module}; "
+    "print((time.perf_counter() - start) * 1000)"
+)
+
+
+def _run(service: Service, env: Dict[str, str], *flags: str, code: str) -> subprocess.CompletedProcess:
+    out = subprocess.run([sys.executable, *flags, "-c", code], cwd=ROOT / service.directory, env=env,
+                         capture_output=True, text=True)
+    if out.returncode:
+        raise RuntimeError(f"import {service.module} failed:\n{out.stderr[-2000:]}")
+    return out
+
+
+def import_ms(service: Service, env: Dict[str, str]) -> float:
+    out = _run(service, env, code=IMPORT_SNIPPET.format(module=service.module))
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(service: Service, env: Dict[str, str], top: int) -> List[Tuple[str, float]]:
+    """The app module's direct imports by cumulative time, from -X importtime."""
+    out = _run(service, env, "-X", "importtime", code=f"import {service.module}")
+    # Children are printed before their parent: the app module's subtree is
+    # the run of nested lines ending at its own top-level line
+    subtree: List[Tuple[str, float]] = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0:
+            if name.strip() == service.module:
+                break
+            subtree = []
+        elif depth == 1:
+            subtree.append((name.strip(), int(cumulative) / 1000))
+    return sorted(subtree, key=lambda item: item[1], reverse=True)[:top]
+
+
+def ready_ms(service: Service, env: Dict[str, str], port: int, timeout_s: float = 30) -> float:
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"{service.module}:app", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=ROOT / service.directory, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        while time.perf_counter() - start < timeout_s:
+            if proc.poll() is not None:
+                raise RuntimeError(f"{service.module} exited with {proc.returncode}:\n"
+                                   f"{proc.stderr.read().decode()[-2000:]}")
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}{service.health}", timeout=1).read()
+                return (time.perf_counter() - start) * 1000
+            except OSError:
+                time.sleep(0.005)
+        raise RuntimeError(f"{service.module} not healthy after {timeout_s}s")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--services", default=",".join(SERVICES), help="comma-separated service names")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per measurement")
+    parser.add_argument("--top", type=int, default=5, help="slowest imports to list")
+    parser.add_argument("--kubeconfig", help="kubeconfig for the services (default: none)")
+    parser.add_argument("--check", action="store_true", help="exit 1 if a budget is exceeded")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply budgets (slow CI runners)")
+    parser.add_argument("--port", type=int, default=18200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, PYTHONPATH=str(ROOT), HISTORY_DIR=str(Path(tmp) / "history"),
+                   KUBECONFIG=args.kubeconfig or str(Path(tmp) / "missing-kubeconfig"))
+        env.pop("KUBERNETES_SERVICE_HOST", None)
+
+        over_budget = []
+        print(f"{'service':<10} {'import ms':>10} {'budget':>8} {'ready ms':>10} {'budget':>8}")
+        for name in args.services.split(","):
+            service = SERVICES[name]
+            try:
+                imp = median(import_ms(service, env) for _ in range(args.runs))
+                ready = median(ready_ms(service, env, args.port) for _ in range(args.runs))
+            except RuntimeError as e:
+                print(f"{name:<10} failed to start")
+                over_budget.append(f"{name}: {e}")
+                continue
+            imp_budget = service.import_budget_ms * args.scale
+            ready_budget = service.ready_budget_ms * args.scale
+            print(f"{name:<10} {imp:>10.1f} {imp_budget:>8.0f} {ready:>10.1f} {ready_budget:>8.0f}")
+            if imp > imp_budget:
+                over_budget.append(f"{name}: import {imp:.0f} ms > {imp_budget:.0f} ms")
+            if ready > ready_budget:
+                over_budget.append(f"{name}: first {service.health} {ready:.0f} ms > {ready_budget:.0f} ms")
+            for module, ms in slowest_imports(service, env, args.top):
+                print(f"    {module:<40} {ms:>8.1f} ms")
+
+    for failure in over_budget:
+        print(f"OVER BUDGET {failure}")
+    if args.check and over_budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
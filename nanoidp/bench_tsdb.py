@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Cost of the persistent history store (nanoidp.tsdb): append per sample,
+range reads of the raw and downsampled tiers, reopen after a restart, and
+file size per series. For contrast it also times the obvious alternative,
+one JSON line per sample with an fsync, on the same directory.
+
+Usage (repo root):
+  python -m nanoidp.bench_tsdb [--dir /var/lib/nanoidp] [--samples 200000] [--fields 7]
+"""
+from pathlib import Path
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from nanoidp import tsdb  # noqa: E402
+
+
+def timed(fn, number: int) -> float:
+    """Microseconds per call."""
+    start = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return (time.perf_counter() - start) / number * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dir", type=Path, help="directory for the files (default: temporary)")
+    parser.add_argument("--samples", type=int, default=200000, help="samples appended")
+    parser.add_argument("--fields", type=int, default=7, help="fields per sample")
+    parser.add_argument("--interval", type=float, default=1.0, help="sample interval the tiers are sized for")
+    parser.add_argument("--fsync-samples", type=int, default=200, help="samples for the fsync baseline")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        fields = [f"f{i}" for i in range(args.fields)]
+        tiers = tsdb.default_tiers(args.interval)
+        path = os.path.join(tmp, "bench.tsdb")
+        series = tsdb.TimeSeries(path, fields, tiers)
+        values = [float(i) for i in range(args.fields)]
+        t0 = 1.7e9
+        start = time.perf_counter()
+        for i in range(args.samples):
+            series.append(values, t0 + i * args.interval)
+        append_us = (time.perf_counter() - start) / args.samples * 1e6
+        end = t0 + (args.samples - 1) * args.interval
+
+        print(f"file {os.path.getsize(path) / 1024:,.0f} KB for {args.fields} fields, tiers "
+              + ", ".join(f"{t.capacity}x{t.step_s or args.interval:g}s" for t in tiers))
+        print(f"{'append':<34} {append_us:>10.2f} us")
+        hour = 3600 / args.interval
+        cases = [
+            ("range raw 1h (views only)", lambda: series.range(end - 3600, end).release()),
+            (f"query raw 1h ({int(hour)} rows)", lambda: tsdb.query(series, end - 3600, end)),
+            ("query 1m tier, 1 day", lambda: tsdb.query(series, end - 86400, end, 60)),
+            ("query 1h tier, all", lambda: tsdb.query(series, step_s=3600)),
+        ]
+        for name, fn in cases:
+            print(f"{name:<34} {timed(fn, 200):>10.1f} us")
+        series.close()
+
+        start = time.perf_counter()
+        series = tsdb.TimeSeries(path, fields, tiers)
+        reopen_ms = (time.perf_counter() - start) * 1000
+        records = series.stats()["tiers"]
+        series.close()
+        print(f"{'reopen':<34} {reopen_ms:>10.2f} ms  records " + ", ".join(str(t["records"]) for t in records))
+
+        with open(os.path.join(tmp, "bench.jsonl"), "a") as f:
+            def jsonl_fsync():
+                f.write(json.dumps({"timestamp": time.time(), **dict(zip(fields, values))}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            print(f"{'baseline: JSON line + fsync':<34} {timed(jsonl_fsync, args.fsync_samples):>10.2f} us")
+
+
+if __name__ == "__main__":
+    main()
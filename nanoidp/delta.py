@@ -0,0 +1,116 @@
+"""
+Delta-encoded snapshots of a monitor's per-entity state (pods, processes),
+for the cluster aggregator.
+
+Each sample replaces the tables' records; records that differ from the
+previous sample get the next sequence number, entities that vanished get a
+tombstone. A poller sends back the last `seq` it applied (and the `epoch`
+it came from) and receives only what changed after it, so its cost follows
+churn, not table size. Changed keys are kept in change order, so answering
+a delta walks only the changed tail.
+
+    log = delta.DeltaLog({"pods": ("qos", "current_mb", "full_avg10")})
+    log.update({"pods": {"<uid>": ("burstable", 212, 0.0), ...}})   # every sample, on the loop
+    log.since(seq, epoch)   # {"epoch", "seq", "full", "tables": {"pods": {"fields", "changed", "removed"}}}
+
+Records are tuples in field order and must compare equal when nothing
+changed, so round what jitters (bytes -> MB). A full snapshot is sent when
+the poller has none, the monitor restarted (new epoch), or the tombstones
+it would need were dropped (more than max_removed removals behind).
+"""
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Mapping, Optional, Sequence, Tuple
+import secrets
+
+MAX_REMOVED = 4096
+
+_MISSING = object()
+
+
+class _Table:
+    __slots__ = ("fields", "records", "changed", "removed")
+
+    def __init__(self, fields: Sequence[str]):
+        self.fields = tuple(fields)
+        self.records: Dict[str, Tuple] = {}
+        self.changed: "OrderedDict[str, int]" = OrderedDict()  # key -> seq of last change, oldest first
+        self.removed: Deque[Tuple[int, str]] = deque()
+
+
+class DeltaLog:
+    """Per-entity tables with a shared sequence number. Not thread-safe: update and read on the loop."""
+
+    def __init__(self, tables: Mapping[str, Sequence[str]], max_removed: int = MAX_REMOVED):
+        self.epoch = secrets.token_hex(8)  # sequence numbers restart with the process
+        self.seq = 0
+        self.horizon = 0  # deltas are complete for any since >= horizon
+        self.max_removed = max_removed
+        self._tables = {name: _Table(fields) for name, fields in tables.items()}
+        self.full_sent = 0
+        self.deltas_sent = 0
+
+    def update(self, tables: Mapping[str, Mapping[str, Tuple]]) -> int:
+        """Replace the given tables' records with a new sample; returns the current seq."""
+        seq = self.seq + 1
+        dirty = False
+        for name, records in tables.items():
+            table = self._tables[name]
+            touched = False
+            for key, record in records.items():
+                if table.records.get(key, _MISSING) != record:
+                    table.records[key] = record
+                    table.changed[key] = seq
+                    table.changed.move_to_end(key)
+                    touched = True
+            dirty = dirty or touched
+            # Same size and no new or changed key: nothing can have vanished
+            if touched or len(table.records) > len(records):
+                for key in [k for k in table.records if k not in records]:
+                    del table.records[key]
+                    table.changed[key] = seq
+                    table.changed.move_to_end(key)
+                    table.removed.append((seq, key))
+                    dirty = True
+            while len(table.removed) > self.max_removed:
+                removed_at, key = table.removed.popleft()
+                self.horizon = max(self.horizon, removed_at)
+                if table.changed.get(key) == removed_at:
+                    del table.changed[key]
+        if dirty:
+            self.seq = seq
+        return self.seq
+
+    def since(self, seq: Optional[int] = None, epoch: Optional[str] = None) -> Dict[str, Any]:
+        """What changed after seq, or everything when a delta cannot be answered."""
+        full = seq is None or epoch != self.epoch or seq < self.horizon or seq > self.seq
+        tables = {}
+        for name, table in self._tables.items():
+            if full:
+                tables[name] = {"fields": table.fields, "changed": table.records, "removed": []}
+                continue
+            changed: Dict[str, Tuple] = {}
+            removed = []
+            for key in reversed(table.changed):
+                if table.changed[key] <= seq:
+                    break
+                record = table.records.get(key, _MISSING)
+                if record is _MISSING:
+                    removed.append(key)
+                else:
+                    changed[key] = record
+            tables[name] = {"fields": table.fields, "changed": changed, "removed": removed}
+        if full:
+            self.full_sent += 1
+        else:
+            self.deltas_sent += 1
+        return {"epoch": self.epoch, "seq": self.seq, "full": full, "tables": tables}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "epoch": self.epoch,
+            "seq": self.seq,
+            "horizon": self.horizon,
+            "records": {name: len(t.records) for name, t in self._tables.items()},
+            "full_sent": self.full_sent,
+            "deltas_sent": self.deltas_sent,
+        }
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Offline stand-in for the Kubernetes API server, for load-testing the
+cluster-facing monitors at scale without a cluster.
+
+Serves a generated, deterministic dataset (pods, nodes, PVs, PVCs,
+StorageClasses, PriorityClasses, NetworkPolicies and metrics.k8s.io pod and
+node metrics) with:
+  - LIST, including limit/continue pagination and equality labelSelectors
+  - WATCH (?watch=true): newline-delimited events, optional MODIFIED churn
+  - latency injection: fixed + jitter per request, plus a per-item cost
+Items are encoded once at startup and LIST responses are assembled from the
+encoded bytes, so the server's own cost stays small next to the client's.
+
+Usage (repo root):
+  python -m nanoidp.fakekube --pods 50000 --port 6443 --kubeconfig-out /tmp/fake-kubeconfig
+  KUBECONFIG=/tmp/fake-kubeconfig python main.py
+"""
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from aiohttp import web
+
+PRIORITY_CLASSES = (
+    ("system-node-critical", 2000001000, "Node-critical system pods"),
+    ("system-cluster-critical", 2000000000, "Cluster-critical system pods"),
+    ("platform-core", 1000000, "Platform control plane"),
+    ("platform-high", 100000, "Platform services"),
+    ("tenant-default", 1000, "Default tenant workloads"),
+    ("tenant-batch", 100, "Preemptible batch jobs"),
+)
+PRIORITY_VALUES = {name: value for name, value, _ in PRIORITY_CLASSES}
+
+KUBECONFIG = """apiVersion: v1
+kind: Config
+clusters:
+- cluster: {{server: "{server}"}}
+  name: fakekube
+contexts:
+- context: {{cluster: fakekube, user: fakekube}}
+  name: fakekube
+current-context: fakekube
+users:
+- name: fakekube
+  user: {{token: fakekube}}
+"""
+
+
+def _encode(obj: Dict) -> bytes:
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+class Collection:
+    """Encoded items of one resource, with the fields needed to filter them."""
+
+    def __init__(self, kind: str, api_version: str):
+        self.kind = kind
+        self.api_version = api_version
+        self.items: List[bytes] = []
+        self.namespaces: List[str] = []
+        self.labels: List[Dict[str, str]] = []
+
+    def add(self, obj: Dict) -> None:
+        metadata = obj["metadata"]
+        self.items.append(_encode(obj))
+        self.namespaces.append(metadata.get("namespace", ""))
+        self.labels.append(metadata.get("labels") or {})
+
+    def select(self, namespace: Optional[str], selector: Dict[str, str]) -> Sequence[int]:
+        """Indexes of the matching items; a range, not a list, when everything matches."""
+        if namespace is None and not selector:
+            return range(len(self.items))
+        return [
+            i for i in range(len(self.items))
+            if (namespace is None or self.namespaces[i] == namespace)
+            and all(self.labels[i].get(k) == v for k, v in selector.items())
+        ]
+
+
+class Dataset:
+    """A deterministic cluster of `pods` pods and proportionate other objects."""
+
+    def __init__(self, pods: int, nodes: Optional[int] = None, volumes: Optional[int] = None,
+                 policies: int = 100, namespaces: int = 50, seed: int = 0):
+        rng = random.Random(seed)
+        self.nodes = nodes or max(1, pods // 110)
+        self.volumes = pods // 10 if volumes is None else volumes
+        created = "2026-01-01T00:00:00Z"
+        self.collections: Dict[str, Collection] = {
+            "pods": Collection("PodList", "v1"),
+            "nodes": Collection("NodeList", "v1"),
+            "persistentvolumes": Collection("PersistentVolumeList", "v1"),
+            "persistentvolumeclaims": Collection("PersistentVolumeClaimList", "v1"),
+            "storageclasses": Collection("StorageClassList", "storage.k8s.io/v1"),
+            "priorityclasses": Collection("PriorityClassList", "scheduling.k8s.io/v1"),
+            "networkpolicies": Collection("NetworkPolicyList", "networking.k8s.io/v1"),
+            "metrics/pods": Collection("PodMetricsList", "metrics.k8s.io/v1beta1"),
+            "metrics/nodes": Collection("NodeMetricsList", "metrics.k8s.io/v1beta1"),
+        }
+        c = self.collections
+
+        def meta(name: str, namespace: Optional[str] = None, labels: Optional[Dict] = None) -> Dict:
+            m = {"name": name, "uid": str(uuid.UUID(int=rng.getrandbits(128))),
+                 "resourceVersion": str(rng.randrange(1, 10 ** 7)), "creationTimestamp": created}
+            if namespace:
+                m["namespace"] = namespace
+            if labels:
+                m["labels"] = labels
+            return m
+
+        for name, value, description in PRIORITY_CLASSES:
+            c["priorityclasses"].add({
+                "metadata": meta(name), "value": value, "globalDefault": name == "tenant-default",
+                "description": description, "preemptionPolicy": "PreemptLowerPriority"})
+        c["storageclasses"].add({
+            "metadata": meta("local-path", labels={"storageclass.kubernetes.io/is-default-class": "true"}),
+            "provisioner": "rancher.io/local-path", "reclaimPolicy": "Delete",
+            "volumeBindingMode": "WaitForFirstConsumer"})
+
+        node_names = [f"node-{i:04d}" for i in range(self.nodes)]
+        for name in node_names:
+            c["nodes"].add({
+                "metadata": meta(name, labels={"kubernetes.io/hostname": name}),
+                "status": {"capacity": {"cpu": "8", "memory": "8Gi", "pods": "110"},
+                           "allocatable": {"cpu": "7800m", "memory": "7600Mi", "pods": "110"},
+                           "conditions": [{"type": "Ready", "status": "True"}]}})
+            c["metrics/nodes"].add({
+                "metadata": meta(name), "timestamp": created, "window": "10s",
+                "usage": {"cpu": f"{rng.randrange(100, 7000)}m", "memory": f"{rng.randrange(1, 7000)}Mi"}})
+
+        tenants = [f"tenant-{i}" for i in range(namespaces)]
+        claims: List[Tuple[str, str]] = []
+        for i in range(self.volumes):
+            pv_name = f"pvc-{uuid.UUID(int=rng.getrandbits(128))}"
+            namespace, claim = rng.choice(tenants), f"data-{i}"
+            size = f"{rng.choice((1, 5, 10, 50))}Gi"
+            c["persistentvolumes"].add({
+                "metadata": meta(pv_name),
+                "spec": {"capacity": {"storage": size}, "storageClassName": "local-path",
+                         "hostPath": {"path": f"/var/lib/rancher/k3s/storage/{pv_name}_{namespace}_{claim}"},
+                         "claimRef": {"kind": "PersistentVolumeClaim", "namespace": namespace, "name": claim},
+                         "persistentVolumeReclaimPolicy": "Delete", "accessModes": ["ReadWriteOnce"]},
+                "status": {"phase": "Bound"}})
+            c["persistentvolumeclaims"].add({
+                "metadata": meta(claim, namespace),
+                "spec": {"volumeName": pv_name, "storageClassName": "local-path",
+                         "accessModes": ["ReadWriteOnce"], "resources": {"requests": {"storage": size}}},
+                "status": {"phase": "Bound", "capacity": {"storage": size}}})
+            claims.append((namespace, claim))
+
+        for i in range(policies):
+            c["networkpolicies"].add({
+                "metadata": meta(f"policy-{i}", tenants[i % len(tenants)]),
+                "spec": {"podSelector": {"matchLabels": {"app": f"app-{i}"}}, "policyTypes": ["Ingress"]}})
+
+        # Cilium: one agent per node plus the operator, in kube-system
+        system = [("cilium", {"k8s-app": "cilium"}, "system-node-critical", "500Mi")] * self.nodes
+        system.append(("cilium-operator", {"name": "cilium-operator"}, "system-cluster-critical", "200Mi"))
+        for i, (prefix, labels, priority_class, limit) in enumerate(system):
+            self._add_pod(rng, meta, f"{prefix}-{i:05d}", "kube-system", labels, priority_class,
+                          PRIORITY_VALUES[priority_class], limit, node_names[i % self.nodes], None)
+
+        tenant_classes = ("tenant-default", "tenant-default", "tenant-batch", "platform-high", None)
+        for i in range(max(0, pods - len(system))):
+            namespace = rng.choice(tenants)
+            priority_class = rng.choice(tenant_classes)
+            claim = claims[i][1] if i < len(claims) else None
+            self._add_pod(rng, meta, f"app-{i % 1000}-{uuid.UUID(int=rng.getrandbits(128)).hex[:10]}",
+                          claims[i][0] if claim else namespace, {"app": f"app-{i % 1000}"},
+                          priority_class, PRIORITY_VALUES.get(priority_class, 0),
+                          rng.choice(("128Mi", "256Mi", "512Mi", "1Gi")), rng.choice(node_names), claim)
+
+    def _add_pod(self, rng, meta, name, namespace, labels, priority_class, priority, limit, node, claim):
+        phase = "Running" if rng.random() < 0.95 else rng.choice(("Pending", "Failed", "Succeeded"))
+        pod_meta = meta(name, namespace, labels)
+        pod_meta["ownerReferences"] = [{"apiVersion": "apps/v1", "kind": "ReplicaSet",
+                                        "name": name.rsplit("-", 1)[0], "uid": pod_meta["uid"],
+                                        "controller": True}]
+        volumes = [{"name": "kube-api-access", "projected": {"sources": [{"serviceAccountToken": {"path": "token"}}]}}]
+        mounts = [{"name": "kube-api-access", "mountPath": "/var/run/secrets/kubernetes.io/serviceaccount",
+                   "readOnly": True}]
+        if claim:
+            volumes.append({"name": "data", "persistentVolumeClaim": {"claimName": claim}})
+            mounts.append({"name": "data", "mountPath": "/data"})
+        spec = {
+            "nodeName": node, "priority": priority, "schedulerName": "default-scheduler",
+            "serviceAccountName": "default", "restartPolicy": "Always", "volumes": volumes,
+            "containers": [{
+                "name": "main", "image": f"registry.local/{labels.get('app', name)}:1.0",
+                "ports": [{"containerPort": 8080, "protocol": "TCP"}],
+                "resources": {"requests": {"cpu": "50m", "memory": limit}, "limits": {"memory": limit}},
+                "volumeMounts": mounts,
+            }],
+        }
+        if priority_class:
+            spec["priorityClassName"] = priority_class
+        status = {
+            "phase": phase, "podIP": f"10.42.{rng.randrange(256)}.{rng.randrange(256)}",
+            "hostIP": "172.18.0.2", "qosClass": "Burstable", "startTime": "2026-01-01T00:00:00Z",
+            "conditions": [{"type": t, "status": "True" if phase == "Running" else "False"}
+                           for t in ("Initialized", "Ready", "ContainersReady", "PodScheduled")],
+            "containerStatuses": [{"name": "main", "ready": phase == "Running", "restartCount": 0,
+                                   "image": spec["containers"][0]["image"],
+                                   "imageID": f"{spec['containers'][0]['image']}@sha256:{pod_meta['uid'].replace('-', '')}",
+                                   "containerID": f"containerd://{pod_meta['uid'].replace('-', '')}",
+                                   "started": phase == "Running"}],
+        }
+        self.collections["pods"].add({"metadata": pod_meta, "spec": spec, "status": status})
+        if phase == "Running":
+            self.collections["metrics/pods"].add({
+                "metadata": {"name": name, "namespace": namespace, "creationTimestamp": "2026-01-01T00:00:00Z"},
+                "timestamp": "2026-01-01T00:00:00Z", "window": "10s",
+                "containers": [{"name": "main", "usage": {"cpu": f"{rng.randrange(1, 500)}m",
+                                                          "memory": f"{rng.randrange(10, 900)}Mi"}}]})
+
+
+def _selector(value: Optional[str]) -> Dict[str, str]:
+    """Equality-based label selector: "a=b,c==d"."""
+    selector = {}
+    for term in filter(None, (value or "").split(",")):
+        key, _, val = term.partition("=")
+        selector[key.strip()] = val.lstrip("=").strip()
+    return selector
+
+
+class FakeAPIServer:
+    def __init__(self, dataset: Dataset, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 per_item_us: float = 0.0, churn: float = 0.0, seed: int = 0):
+        self.dataset = dataset
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.per_item_us = per_item_us
+        self.churn = churn
+        self.rng = random.Random(seed)
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    async def _delay(self, items: int) -> None:
+        delay = self.latency_ms + self.rng.uniform(0, self.jitter_ms) + items * self.per_item_us / 1000
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+    def _count(self, resource: str, verb: str, nbytes: int) -> None:
+        entry = self.stats.setdefault(f"{verb} {resource}", {"requests": 0, "bytes": 0})
+        entry["requests"] += 1
+        entry["bytes"] += nbytes
+
+    def handler(self, resource: str):
+        collection = self.dataset.collections[resource]
+
+        async def handle(request: web.Request) -> web.StreamResponse:
+            query = request.query
+            namespace = request.match_info.get("namespace")
+            selected = collection.select(namespace, _selector(query.get("labelSelector")))
+            if query.get("watch", "").lower() in ("true", "1"):
+                return await self._watch(request, resource, collection, selected)
+
+            start = int(query.get("continue") or 0)
+            limit = int(query.get("limit") or 0)
+            end = min(len(selected), start + limit) if limit else len(selected)
+            metadata = {"resourceVersion": "1"}
+            if end < len(selected):
+                metadata["continue"] = str(end)
+                metadata["remainingItemCount"] = len(selected) - end
+            await self._delay(end - start)
+            body = b"".join((
+                b'{"kind":"', collection.kind.encode(), b'","apiVersion":"', collection.api_version.encode(),
+                b'","metadata":', _encode(metadata), b',"items":[',
+                b",".join(collection.items[i] for i in selected[start:end]), b"]}",
+            ))
+            self._count(resource, "list", len(body))
+            return web.Response(body=body, content_type="application/json")
+
+        return handle
+
+    async def _watch(self, request, resource, collection, selected) -> web.StreamResponse:
+        response = web.StreamResponse(headers={"Content-Type": "application/json"})
+        await response.prepare(request)
+        self._count(resource, "watch", 0)
+        timeout = float(request.query.get("timeoutSeconds") or 300)
+        deadline = time.monotonic() + timeout
+        try:
+            while time.monotonic() < deadline:
+                if self.churn > 0 and selected:
+                    await asyncio.sleep(1 / self.churn)
+                    item = collection.items[self.rng.choice(selected)]
+                    await response.write(b'{"type":"MODIFIED","object":' + item + b"}\n")
+                else:
+                    await asyncio.sleep(min(5.0, max(0.0, deadline - time.monotonic())))
+        except (ConnectionResetError, asyncio.CancelledError):
+            pass
+        return response
+
+    async def stats_handler(self, request: web.Request) -> web.Response:
+        sizes = {name: len(c.items) for name, c in self.dataset.collections.items()}
+        return web.json_response({"objects": sizes, "requests": self.stats})
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        routes = [
+            ("/api/v1/pods", "pods"),
+            ("/api/v1/namespaces/{namespace}/pods", "pods"),
+            ("/api/v1/nodes", "nodes"),
+            ("/api/v1/persistentvolumes", "persistentvolumes"),
+            ("/api/v1/persistentvolumeclaims", "persistentvolumeclaims"),
+            ("/api/v1/namespaces/{namespace}/persistentvolumeclaims", "persistentvolumeclaims"),
+            ("/apis/storage.k8s.io/v1/storageclasses", "storageclasses"),
+            ("/apis/scheduling.k8s.io/v1/priorityclasses", "priorityclasses"),
+            ("/apis/networking.k8s.io/v1/networkpolicies", "networkpolicies"),
+            ("/apis/networking.k8s.io/v1/namespaces/{namespace}/networkpolicies", "networkpolicies"),
+            ("/apis/metrics.k8s.io/v1beta1/pods", "metrics/pods"),
+            ("/apis/metrics.k8s.io/v1beta1/namespaces/{namespace}/pods", "metrics/pods"),
+            ("/apis/metrics.k8s.io/v1beta1/nodes", "metrics/nodes"),
+        ]
+        for path, resource in routes:
+            app.router.add_get(path, self.handler(resource))
+        app.router.add_get("/fake/stats", self.stats_handler)
+        return app
+
+
+def write_kubeconfig(path: Path, server: str) -> None:
+    path.write_text(KUBECONFIG.format(server=server))
+
+
+async def serve(server: FakeAPIServer, host: str, port: int) -> Tuple[web.AppRunner, int]:
+    runner = web.AppRunner(server.app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    return runner, site._server.sockets[0].getsockname()[1]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pods", type=int, default=50000)
+    parser.add_argument("--nodes", type=int, help="default: pods / 110")
+    parser.add_argument("--volumes", type=int, help="PV/PVC pairs (default: pods / 10)")
+    parser.add_argument("--policies", type=int, default=100)
+    parser.add_argument("--namespaces", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="fixed delay per request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="extra uniform random delay")
+    parser.add_argument("--per-item-us", type=float, default=0.0, help="delay per returned item")
+    parser.add_argument("--churn", type=float, default=0.0, help="MODIFIED events/s on each watch")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6443)
+    parser.add_argument("--kubeconfig-out", type=Path, help="write a kubeconfig for this server")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    dataset = Dataset(args.pods, args.nodes, args.volumes, args.policies, args.namespaces, args.seed)
+    server = FakeAPIServer(dataset, args.latency_ms, args.jitter_ms, args.per_item_us, args.churn, args.seed)
+    runner, port = await serve(server, args.host, args.port)
+    url = f"http://{args.host}:{port}"
+    if args.kubeconfig_out:
+        write_kubeconfig(args.kubeconfig_out, url)
+    sizes = ", ".join(f"{len(c.items)} {name}" for name, c in dataset.collections.items())
+    print(f"fake API server on {url} ({sizes}; built in {time.perf_counter() - start:.1f}s)", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
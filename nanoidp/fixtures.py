@@ -0,0 +1,174 @@
+"""
+Synthetic procfs, cgroupfs and diskstats trees for benchmarks.
+Files are laid out the way the monitors read them, at any scale, and the
+output is deterministic for a given seed. Point a monitor at a tree with
+PROC_ROOT, CGROUP_ROOT or DISKSTATS_PATH.
+"""
+from pathlib import Path
+from typing import Dict
+import random
+import uuid
+
+QOS_CLASSES = (("burstable", 0.6), ("besteffort", 0.3), ("guaranteed", 0.1))
+
+MEMINFO_KEYS = (
+    "MemTotal", "MemFree", "MemAvailable", "Buffers", "Cached", "SwapCached", "Active",
+    "Inactive", "Active(anon)", "Inactive(anon)", "Active(file)", "Inactive(file)",
+    "Unevictable", "Mlocked", "SwapTotal", "SwapFree", "Zswap", "Zswapped", "Dirty",
+    "Writeback", "AnonPages", "Mapped", "Shmem", "KReclaimable", "Slab", "SReclaimable",
+    "SUnreclaim", "KernelStack", "PageTables", "SecPageTables", "NFS_Unstable", "Bounce",
+    "WritebackTmp", "CommitLimit", "Committed_AS", "VmallocTotal", "VmallocUsed",
+    "VmallocChunk", "Percpu", "HardwareCorrupted", "AnonHugePages", "ShmemHugePages",
+    "ShmemPmdMapped", "FileHugePages", "FilePmdMapped", "CmaTotal", "CmaFree",
+    "Unaccepted", "HugePages_Total", "HugePages_Free", "HugePages_Rsvd", "HugePages_Surp",
+    "Hugepagesize", "Hugetlb", "DirectMap4k", "DirectMap2M", "DirectMap1G",
+)
+
+LIBRARIES = ("/usr/lib/x86_64-linux-gnu/libc.so.6", "/usr/lib/x86_64-linux-gnu/libm.so.6",
+             "/usr/local/bin/python3.12", "/usr/lib/locale/C.utf8/LC_CTYPE", "[heap]", "[stack]")
+
+
+def meminfo(rng: random.Random, total_kb: int = 8 * 1024 * 1024) -> bytes:
+    available = int(total_kb * rng.uniform(0.1, 0.7))
+    values = {key: rng.randrange(0, total_kb // 8) for key in MEMINFO_KEYS}
+    values.update(MemTotal=total_kb, MemAvailable=available, MemFree=available // 2,
+                  SwapTotal=4 * 1024 * 1024, SwapFree=rng.randrange(1024 * 1024, 4 * 1024 * 1024),
+                  HugePages_Total=0, HugePages_Free=0, HugePages_Rsvd=0, HugePages_Surp=0)
+    lines = []
+    for key in MEMINFO_KEYS:
+        unit = "" if key.startswith("HugePages_") else " kB"
+        lines.append(f"{key + ':':<16}{values[key]:>8}{unit}")
+    return ("\n".join(lines) + "\n").encode()
+
+
+def maps(rng: random.Random, count: int) -> bytes:
+    lines = []
+    address = 0x55d0_0000_0000 + rng.randrange(0, 1 << 32) * 4096
+    for _ in range(count):
+        size = rng.choice((4096, 8192, 65536, 1 << 20))
+        path = rng.choice(LIBRARIES) if rng.random() < 0.4 else ""
+        lines.append(f"{address:x}-{address + size:x} {rng.choice(('r--p', 'r-xp', 'rw-p'))} "
+                     f"00000000 00:00 0 {path}".rstrip())
+        address += size
+    return ("\n".join(lines) + "\n").encode()
+
+
+def pid_cgroup(rng: random.Random, pods: list) -> bytes:
+    """/proc/<pid>/cgroup (v2): a container of one of `pods`, or a host service."""
+    if not pods or rng.random() < 0.3:
+        return rng.choice((b"0::/init.scope\n", b"0::/system.slice/containerd.service\n",
+                           b"0::/system.slice/kubelet.service\n", b"0::/user.slice/user-1000.slice\n"))
+    uid, qos, containers = rng.choice(pods)
+    container = rng.choice(containers)
+    if rng.random() < 0.5:  # systemd cgroup driver
+        parent = "kubepods.slice" if qos == "guaranteed" else f"kubepods.slice/kubepods-{qos}.slice"
+        prefix = "kubepods" if qos == "guaranteed" else f"kubepods-{qos}"
+        path = f"/{parent}/{prefix}-pod{uid.replace('-', '_')}.slice/cri-containerd-{container}.scope"
+    else:  # cgroupfs driver
+        path = f"/kubepods/pod{uid}/{container}" if qos == "guaranteed" else f"/kubepods/{qos}/pod{uid}/{container}"
+    return f"0::{path}\n".encode()
+
+
+def pid_stat(pid: int, starttime: int) -> bytes:
+    return (f"{pid} (app) S 1 {pid} {pid} 0 -1 4194560 120 0 0 0 3 1 0 0 20 0 1 0 {starttime} "
+            f"31457280 2048 18446744073709551615 1 1 0 0 0 0 0 16781312 16386 0 0 0 17 0 0 0 0 0 0\n").encode()
+
+
+def proc_tree(root: Path, pids: int, seed: int = 0, heavy_ratio: float = 0.01) -> Dict:
+    """
+    /proc with meminfo, the vm sysctls and `pids` processes. Most have 20-60
+    mappings; heavy_ratio of them have 500-5000 (JVMs, browsers, databases).
+    About 70% of the processes run in one of pids/25 pods (1-3 containers
+    each, both cgroup drivers); the rest are host services.
+    """
+    rng = random.Random(seed)
+    pod_rng = random.Random(seed + 1)  # separate stream: maps stay as before
+    pods = [(str(uuid.UUID(int=pod_rng.getrandbits(128))),
+             pod_rng.choices([q for q, _ in QOS_CLASSES], [w for _, w in QOS_CLASSES])[0],
+             [f"{pod_rng.getrandbits(256):064x}" for _ in range(pod_rng.randint(1, 3))])
+            for _ in range(max(1, pids // 25))]
+    root.mkdir(parents=True, exist_ok=True)
+    (root / "meminfo").write_bytes(meminfo(rng))
+    vm = root / "sys" / "vm"
+    vm.mkdir(parents=True, exist_ok=True)
+    (vm / "swappiness").write_text("60\n")
+    (vm / "vfs_cache_pressure").write_text("100\n")
+    (vm / "max_map_count").write_text("262144\n")
+    total_maps = heavy = 0
+    for pid in range(1, pids + 1):
+        pid_dir = root / str(pid)
+        pid_dir.mkdir(exist_ok=True)
+        if rng.random() < heavy_ratio:
+            count = rng.randrange(500, 5000)
+            heavy += 1
+        else:
+            count = rng.randrange(20, 60)
+        total_maps += count
+        (pid_dir / "maps").write_bytes(maps(rng, count))
+        (pid_dir / "cmdline").write_bytes(b"/usr/bin/app\x00--worker\x00" + str(pid).encode() + b"\x00")
+        (pid_dir / "stat").write_bytes(pid_stat(pid, 1000 + pid * 7))
+        (pid_dir / "cgroup").write_bytes(pid_cgroup(pod_rng, pods))
+    return {"pids": pids, "heavy": heavy, "maps": total_maps, "pods": len(pods)}
+
+
+def pressure(rng: random.Random, stalled: bool) -> bytes:
+    if not stalled:
+        return b"some avg10=0.00 avg60=0.00 avg300=0.00 total=0\nfull avg10=0.00 avg60=0.00 avg300=0.00 total=0\n"
+    some = rng.uniform(0.5, 20)
+    full = some * rng.uniform(0.1, 0.8)
+    return (f"some avg10={some:.2f} avg60={some / 2:.2f} avg300={some / 4:.2f} "
+            f"total={rng.randrange(1, 10 ** 9)}\n"
+            f"full avg10={full:.2f} avg60={full / 2:.2f} avg300={full / 4:.2f} "
+            f"total={rng.randrange(1, 10 ** 8)}\n").encode()
+
+
+def cgroup_tree(root: Path, pods: int, seed: int = 0, stalled_ratio: float = 0.05) -> Dict:
+    """
+    cgroup v2 mount with `pods` pod cgroups, laid out as the cgroupfs driver
+    does: kubepods/<qos>/pod<uid>, guaranteed pods directly under kubepods.
+    """
+    rng = random.Random(seed)
+    (root / "kubepods").mkdir(parents=True, exist_ok=True)
+    (root / "cgroup.controllers").write_text("cpuset cpu io memory hugetlb pids rdma misc\n")
+    for qos in ("burstable", "besteffort"):
+        qos_dir = root / "kubepods" / qos
+        qos_dir.mkdir(exist_ok=True)
+        (qos_dir / "memory.pressure").write_bytes(pressure(rng, True))
+    weights = [weight for _, weight in QOS_CLASSES]
+    stalled = 0
+    for _ in range(pods):
+        qos = rng.choices(QOS_CLASSES, weights)[0][0]
+        parent = root / "kubepods" if qos == "guaranteed" else root / "kubepods" / qos
+        pod_dir = parent / f"pod{uuid.UUID(int=rng.getrandbits(128))}"
+        pod_dir.mkdir()
+        limit = rng.choice((128, 256, 512, 1024)) * 1024 * 1024
+        (pod_dir / "memory.current").write_text(f"{int(limit * rng.uniform(0.2, 0.95))}\n")
+        (pod_dir / "memory.max").write_text("max\n" if qos == "besteffort" else f"{limit}\n")
+        (pod_dir / "memory.high").write_text("max\n")
+        is_stalled = rng.random() < stalled_ratio
+        stalled += is_stalled
+        (pod_dir / "memory.pressure").write_bytes(pressure(rng, is_stalled))
+    return {"pods": pods, "stalled": stalled}
+
+
+def diskstats(path: Path, disks: int, partitions: int = 2, seed: int = 0) -> Dict:
+    """/proc/diskstats with `disks` NVMe disks, their partitions and loop devices."""
+    rng = random.Random(seed)
+    lines = []
+
+    def line(major: int, minor: int, name: str) -> str:
+        reads, writes = rng.randrange(10 ** 6), rng.randrange(10 ** 6)
+        return (f"{major:>4} {minor:>7} {name} {reads} {reads // 10} {reads * 8} {reads // 2} "
+                f"{writes} {writes // 10} {writes * 8} {writes} 0 {reads + writes} "
+                f"{(reads + writes) * 2} 0 0 0 0 {rng.randrange(10 ** 4)} {rng.randrange(10 ** 5)}")
+
+    for i in range(8):
+        lines.append(line(7, i, f"loop{i}"))
+    for disk in range(disks):
+        name = f"nvme{disk}n1"
+        lines.append(line(259, disk * (partitions + 1), name))
+        for part in range(1, partitions + 1):
+            lines.append(line(259, disk * (partitions + 1) + part, f"{name}p{part}"))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("\n".join(lines) + "\n")
+    return {"disks": disks, "lines": len(lines)}
@@ -0,0 +1,231 @@
+"""
+Response cache for the polled GET endpoints, as pure ASGI middleware.
+
+Each configured route keeps its last response for a TTL, keyed by path,
+query string and Accept-Encoding. Responses carry a strong ETag (hash of
+the body, computed once per recompute) and `Cache-Control: no-cache`, so
+browsers revalidate every poll with If-None-Match; an unchanged payload
+answers 304 without a body. Concurrent misses on one key share a single
+run of the handler. Only buffered 200 responses are stored; streaming
+routes (SSE) must not be listed. Expired entries are dropped on every store
+and the cache as a whole is capped at MAX_BYTES of bodies (oldest first),
+since routes keyed by query string (history ?since=) rarely hit twice.
+
+    cache = httpcache.ResponseCache({"/api/memory/stats": 2, "/api/memory-stats/{pod}": 2})
+    app.add_middleware(httpcache.CacheMiddleware, cache=cache)
+
+CACHE_TTL can hold a JSON object that overrides the TTLs by route
+template; 0 turns caching off for that route.
+"""
+from typing import Dict, List, Mapping, NamedTuple, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+
+MAX_ENTRIES = 256
+MAX_BODY = 4 * 1024 * 1024
+MAX_BYTES = 8 * 1024 * 1024
+
+Headers = List[Tuple[bytes, bytes]]
+
+
+class Entry(NamedTuple):
+    expires: float
+    status: int
+    headers: Headers
+    body: bytes
+    etag: bytes
+    route: object = None  # the matched route, so hits are labelled like misses
+
+
+def etag_of(body: bytes) -> bytes:
+    return b'"' + hashlib.blake2b(body, digest_size=12).hexdigest().encode() + b'"'
+
+
+def etag_matches(if_none_match: bytes, etag: bytes) -> bool:
+    """If-None-Match uses the weak comparison: W/ prefixes are ignored."""
+    if if_none_match.strip() == b"*":
+        return True
+    for tag in if_none_match.split(b","):
+        tag = tag.strip()
+        if tag.startswith(b"W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+class _Route:
+    __slots__ = ("template", "pattern", "ttl_s", "hits", "misses", "not_modified", "shared", "uncached")
+
+    def __init__(self, template: str, ttl_s: float):
+        self.template = template
+        self.pattern = re.compile("^" + re.sub(r"\\\{\w+\\\}", "[^/]+", re.escape(template)) + "$")
+        self.ttl_s = ttl_s
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.shared = 0
+        self.uncached = 0
+
+    def stats(self) -> Dict:
+        return {"ttl_s": self.ttl_s, "hits": self.hits, "misses": self.misses,
+                "not_modified": self.not_modified, "shared": self.shared, "uncached": self.uncached}
+
+
+class ResponseCache:
+    """Per-route TTLs, the stored responses and their hit/miss counters."""
+
+    def __init__(self, routes: Mapping[str, float], max_entries: int = MAX_ENTRIES,
+                 max_body: int = MAX_BODY, max_bytes: int = MAX_BYTES, overrides: Optional[str] = None):
+        ttls = dict(routes)
+        overrides = overrides if overrides is not None else os.getenv("CACHE_TTL")
+        if overrides:
+            ttls.update(json.loads(overrides))
+        self._exact: Dict[str, _Route] = {}
+        self._templated: List[_Route] = []
+        for template, ttl_s in ttls.items():
+            route = _Route(template, float(ttl_s))
+            if "{" in template:
+                self._templated.append(route)
+            else:
+                self._exact[template] = route
+        self.max_entries = max_entries
+        self.max_body = min(max_body, max_bytes)
+        self.max_bytes = max_bytes
+        self._entries: Dict[Tuple, Entry] = {}
+        self._bytes = 0
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+
+    def route(self, path: str) -> Optional[_Route]:
+        route = self._exact.get(path)
+        if route is None:
+            for candidate in self._templated:
+                if candidate.pattern.match(path):
+                    return candidate
+        return route
+
+    def get(self, key: Tuple, now: float) -> Optional[Entry]:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires <= now:
+            self._drop(key)
+            return None
+        return entry
+
+    def _drop(self, key: Tuple) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry.body)
+
+    def put(self, key: Tuple, entry: Entry) -> None:
+        self._drop(key)
+        now = time.monotonic()
+        for stale in [k for k, e in self._entries.items() if e.expires <= now]:
+            self._drop(stale)
+        size = len(entry.body)
+        while self._entries and (len(self._entries) >= self.max_entries or self._bytes + size > self.max_bytes):
+            self._drop(next(iter(self._entries)))  # oldest insert
+        self._entries[key] = entry
+        self._bytes += size
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict:
+        routes = [*self._exact.values(), *self._templated]
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "inflight": len(self._inflight),
+            "routes": {route.template: route.stats() for route in routes if route.ttl_s > 0},
+        }
+
+
+class CacheMiddleware:
+    def __init__(self, app, cache: ResponseCache):
+        self.app = app
+        self.cache = cache
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        path = scope["path"]
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):  # mounted under the agent
+            path = path[len(root_path):] or "/"
+        route = self.cache.route(path)
+        if route is None or route.ttl_s <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = accept_encoding = b""
+        no_cache = False
+        for name, value in scope["headers"]:
+            if name == b"if-none-match":
+                if_none_match = value
+            elif name == b"accept-encoding":
+                accept_encoding = value
+            elif name == b"cache-control":
+                no_cache = b"no-cache" in value and b"max-age" not in value
+        key = (path, scope.get("query_string", b""), accept_encoding)
+
+        entry = None if no_cache else self.cache.get(key, time.monotonic())
+        if entry is not None:
+            route.hits += 1
+        else:
+            future = self.cache._inflight.get(key)
+            if future is None:
+                route.misses += 1
+                future = asyncio.ensure_future(self._fill(scope, receive, key, route))
+                self.cache._inflight[key] = future
+                future.add_done_callback(lambda _: self.cache._inflight.pop(key, None))
+            else:
+                route.shared += 1
+            # Shield: one poller disconnecting must not cancel the run for the others
+            entry = await asyncio.shield(future)
+        if entry.route is not None:
+            scope["route"] = entry.route
+
+        if if_none_match and entry.status == 200 and etag_matches(if_none_match, entry.etag):
+            route.not_modified += 1
+            headers = [(k, v) for k, v in entry.headers if k in (b"etag", b"cache-control", b"vary")]
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await send({"type": "http.response.start", "status": entry.status, "headers": entry.headers})
+        await send({"type": "http.response.body", "body": entry.body})
+
+    async def _fill(self, scope, receive, key: Tuple, route: _Route) -> Entry:
+        """Run the handler once and buffer its response; store it when cacheable."""
+        start: Dict = {}
+        chunks: List[bytes] = []
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+        body = b"".join(chunks)
+        status = start.get("status", 500)
+        headers = list(start.get("headers", []))
+        if status != 200 or len(body) > self.cache.max_body:
+            route.uncached += 1
+            return Entry(0.0, status, headers, body, b"", scope.get("route"))
+
+        etag = next((v for k, v in headers if k == b"etag"), None)
+        if etag is None:
+            etag = etag_of(body)
+            headers.append((b"etag", etag))
+        if not any(k == b"cache-control" for k, _ in headers):
+            headers.append((b"cache-control", b"no-cache"))
+        entry = Entry(time.monotonic() + route.ttl_s, status, headers, body, etag, scope.get("route"))
+        self.cache.put(key, entry)
+        return entry
@@ -0,0 +1,108 @@
+"""
+Process-wide Kubernetes clients.
+A standalone monitor gets one `kubernetes_asyncio` client per process;
+under the agent every plugin shares it, so there is one config load and
+one connection pool per process.
+
+Nothing here imports kubernetes_asyncio or loads config until the client
+is first asked for: a monitor starts (and answers its health probe)
+without paying ~300 ms of imports up front, and without a cluster.
+"""
+from typing import Awaitable, Dict, List, Optional
+import asyncio
+import importlib
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+SERVICE_ACCOUNT_DIR = "/var/run/secrets/kubernetes.io/serviceaccount"
+
+_async_client = None
+_async_lock: Optional[asyncio.Lock] = None
+
+
+def __getattr__(name: str):
+    # Exception classes for `except kube.ApiException:`; the except clause
+    # only looks the name up once an exception is actually propagating
+    if name == "ApiException":
+        from kubernetes_asyncio.client.rest import ApiException
+        return ApiException
+    if name == "ConfigException":
+        from kubernetes_asyncio.config import ConfigException
+        return ConfigException
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+async def async_api_client(pool_maxsize: int = 16):
+    """
+    Shared `kubernetes_asyncio` ApiClient with a keep-alive pool of
+    pool_maxsize connections (the first caller's size wins).
+    """
+    global _async_client, _async_lock
+    if _async_client is not None:
+        return _async_client
+    if _async_lock is None:
+        _async_lock = asyncio.Lock()
+    async with _async_lock:
+        if _async_client is None:
+            # A few hundred ms of imports: run them off the loop so health
+            # probes keep answering while the first API request sets up
+            await asyncio.get_running_loop().run_in_executor(
+                None, importlib.import_module, "kubernetes_asyncio.client")
+            from kubernetes_asyncio import client, config
+            if os.path.exists(SERVICE_ACCOUNT_DIR):
+                config.load_incluster_config()
+                logger.info("Loaded in-cluster Kubernetes config")
+            else:
+                await config.load_kube_config()
+                logger.info("Loaded local Kubernetes config")
+            configuration = client.Configuration.get_default_copy()
+            configuration.connection_pool_maxsize = pool_maxsize
+            _async_client = client.ApiClient(configuration)
+    return _async_client
+
+
+async def get_json(call, timeout_s: Optional[float] = None, **kwargs) -> Dict:
+    """
+    One kubernetes_asyncio API call, e.g. CoreV1Api(...).list_namespaced_pod,
+    as parsed JSON without building model objects (which is CPU on the loop).
+    With _preload_content=False the client hands back the HTTP response
+    unchecked, so non-2xx answers are raised here as ApiException.
+    """
+    import orjson
+    response = await call(_preload_content=False, _request_timeout=timeout_s, **kwargs)
+    try:
+        data = await response.read()
+    finally:
+        response.release()
+    if not 200 <= response.status <= 299:
+        from kubernetes_asyncio.client.rest import ApiException
+        error = ApiException(status=response.status, reason=response.reason)
+        error.body = data.decode(errors="replace")
+        raise error
+    return orjson.loads(data)
+
+
+async def gather(*calls: Awaitable, timeout: Optional[float] = None) -> List:
+    """
+    Run independent API calls concurrently and return their results in
+    order. Unlike a bare asyncio.gather, the first failure or the deadline
+    (asyncio.TimeoutError) cancels the calls still in flight, and so does
+    cancelling the caller, so no request outlives its handler.
+    """
+    tasks = [asyncio.ensure_future(call) for call in calls]
+    try:
+        return await asyncio.wait_for(asyncio.gather(*tasks), timeout)
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+async def close() -> None:
+    """Close the shared client if it was created; safe to call more than once."""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
@@ -0,0 +1,264 @@
+"""
+Zero-copy readers for procfs, sysfs and cgroupfs.
+
+Kernel pseudo-files regenerate their contents on every read from offset 0,
+so a reader can keep its descriptor open and os.preadv() straight into a
+preallocated buffer: no open/close per sample, no text decoding, no new
+buffer per read. The parsers work on bytes and only decode what they return.
+"""
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+import glob
+import os
+import re
+import resource
+import threading
+
+DEFAULT_BUFFER = 4096
+SCRATCH_BUFFER = 64 * 1024
+
+_KEYED = re.compile(rb"^([^\s:]+):?[ \t]+(\d+)", re.M)
+# Pod cgroup of a process, cgroupfs (kubepods/burstable/pod<uid>/<id>) or
+# systemd driver (kubepods-burstable-pod<uid_with_underscores>.slice/cri-containerd-<id>.scope)
+_POD_CGROUP = re.compile(
+    rb"/kubepods\b[^\n]*?pod([0-9a-f]{8}[-_][0-9a-f]{4}[-_][0-9a-f]{4}[-_][0-9a-f]{4}[-_][0-9a-f]{12})"
+    rb"(?:\.slice)?(?:/(?:[a-z-]+-)?([0-9a-f]{64}))?")
+# Pod cgroup directories under a cgroup v2 mount: cgroupfs driver
+# (kubepods/pod<uid> for guaranteed, kubepods/burstable/pod<uid>) and systemd
+# driver (kubepods.slice/kubepods-burstable.slice/kubepods-burstable-pod<uid>.slice)
+POD_CGROUP_GLOBS = (
+    "kubepods/pod*",
+    "kubepods/*/pod*",
+    "kubepods.slice/kubepods-pod*.slice",
+    "kubepods.slice/*/kubepods-*-pod*.slice",
+)
+_POD_UID = re.compile(r"pod([0-9a-f]{8}[-_][0-9a-f]{4}[-_][0-9a-f]{4}[-_][0-9a-f]{4}[-_][0-9a-f]{12})")
+_QOS = re.compile(r"(burstable|besteffort)")
+
+
+class KernelFile:
+    """One kernel file, opened lazily and re-read in place."""
+
+    __slots__ = ("path", "fd", "buf", "view", "size")
+
+    def __init__(self, path: str, size: int = DEFAULT_BUFFER):
+        self.path = path
+        self.fd: Optional[int] = None
+        self.buf = bytearray(size)
+        self.view = memoryview(self.buf)
+        self.size = 0
+
+    def _fill(self) -> int:
+        if self.fd is None:
+            self.fd = os.open(self.path, os.O_RDONLY | os.O_CLOEXEC)
+        try:
+            while True:
+                n = os.preadv(self.fd, [self.buf], 0)
+                if n < len(self.buf):
+                    self.size = n
+                    return n
+                # Buffer was filled exactly; the file may be longer
+                self.view.release()
+                self.buf.extend(bytes(len(self.buf)))
+                self.view = memoryview(self.buf)
+        except OSError:
+            # cgroup removed, pid exited...: reopen on the next read
+            self.close()
+            raise
+
+    def read(self) -> bytes:
+        """Current contents as bytes (one copy out of the shared buffer)."""
+        n = self._fill()
+        return self.view[:n].tobytes()
+
+    def count(self, sub: bytes = b"\n") -> int:
+        """Occurrences of sub in the current contents, counted in place."""
+        return self.buf.count(sub, 0, self._fill())
+
+    def close(self) -> None:
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+def _default_max_open() -> int:
+    soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    return max(64, min(4096, soft // 2)) if soft != resource.RLIM_INFINITY else 4096
+
+
+class FileCache:
+    """LRU of open KernelFiles keyed by path, bounded to stay under RLIMIT_NOFILE."""
+
+    def __init__(self, max_open: Optional[int] = None):
+        self.max_open = max_open or _default_max_open()
+        self._files: "OrderedDict[str, KernelFile]" = OrderedDict()
+        # Samplers offloaded to the executor share the cache with the loop
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> KernelFile:
+        kf = self._files.get(path)
+        if kf is not None:
+            self._files.move_to_end(path)
+            return kf
+        kf = self._files[path] = KernelFile(path)
+        if len(self._files) > self.max_open:
+            _, oldest = self._files.popitem(last=False)
+            oldest.close()
+        return kf
+
+    def read(self, path: str) -> bytes:
+        with self._lock:
+            return self.get(path).read()
+
+    def discard(self, path: str) -> None:
+        with self._lock:
+            kf = self._files.pop(path, None)
+            if kf is not None:
+                kf.close()
+
+    def close(self) -> None:
+        with self._lock:
+            for kf in self._files.values():
+                kf.close()
+            self._files.clear()
+
+
+# Process-wide cache for callers that just want "read this path, fast"
+files = FileCache()
+_local = threading.local()
+
+
+def _scratch() -> bytearray:
+    """Per-thread scratch buffer (readv releases the GIL mid-fill)."""
+    buf = getattr(_local, "scratch", None)
+    if buf is None:
+        buf = _local.scratch = bytearray(SCRATCH_BUFFER)
+    return buf
+
+
+def read(path: str) -> bytes:
+    return files.read(path)
+
+
+def read_once(path: str, limit: int = SCRATCH_BUFFER) -> bytes:
+    """Read a file that is not worth keeping open (e.g. /proc/<pid>/cmdline)."""
+    fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+    try:
+        return os.read(fd, limit)
+    finally:
+        os.close(fd)
+
+
+def count_lines(path: str) -> int:
+    """
+    Newlines in a file of any size (e.g. /proc/<pid>/maps), read through the
+    thread's scratch buffer and counted in place.
+    """
+    scratch = _scratch()
+    fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+    try:
+        lines = 0
+        while True:
+            n = os.readv(fd, [scratch])
+            if n == 0:
+                return lines
+            lines += scratch.count(b"\n", 0, n)
+    finally:
+        os.close(fd)
+
+
+# --- Parsers ------------------------------------------------------------
+
+
+def parse_int(data: bytes) -> int:
+    """Single-value files: "60\\n" -> 60."""
+    return int(data)
+
+
+def parse_limit(data: bytes) -> Optional[int]:
+    """cgroup limits: "max\\n" -> None, "1048576\\n" -> 1048576."""
+    data = data.strip()
+    return None if data == b"max" else int(data)
+
+
+def parse_keyed(data: bytes, keys: Optional[Iterable[str]] = None) -> Dict[str, int]:
+    """
+    "Key: value [unit]" or "key value" lines (meminfo, memory.stat, vmstat)
+    -> {key: int}. With keys, other lines are skipped without decoding.
+    """
+    pairs = _KEYED.findall(data)
+    if keys is None:
+        return {key.decode(): int(value) for key, value in pairs}
+    wanted = frozenset(k.encode() for k in keys)
+    return {key.decode(): int(value) for key, value in pairs if key in wanted}
+
+
+def parse_pressure(data: bytes) -> Dict[str, Dict[str, float]]:
+    """
+    PSI files (/proc/pressure/*, <cgroup>/*.pressure):
+    "some avg10=0.12 avg60=0.05 avg300=0.01 total=1234" ->
+    {"some": {"avg10": 0.12, "avg60": 0.05, "avg300": 0.01, "total": 1234}}
+    The kernel always prints the fields in this order.
+    """
+    result = {}
+    for line in data.splitlines():
+        parts = line.split()
+        if len(parts) != 5:
+            continue
+        result[parts[0].decode()] = {
+            "avg10": float(parts[1][6:]),
+            "avg60": float(parts[2][6:]),
+            "avg300": float(parts[3][7:]),
+            "total": int(parts[4][6:]),
+        }
+    return result
+
+
+def parse_starttime(data: bytes) -> int:
+    """
+    /proc/<pid>/stat field 22: start time in clock ticks after boot. With the
+    pid it identifies a process across pid reuse. comm may contain spaces and
+    parentheses, so fields are counted from the last ")".
+    """
+    return int(data[data.rindex(b")") + 2:].split(None, 20)[19])
+
+
+class PodCgroup(NamedTuple):
+    uid: str
+    qos: str
+    container_id: Optional[str]
+
+
+def parse_pod_cgroup(data: bytes) -> Optional[PodCgroup]:
+    """
+    /proc/<pid>/cgroup -> the pod (uid, QoS class) and container the process
+    runs in, or None outside kubepods. Works for cgroup v1 and v2 files.
+    """
+    match = _POD_CGROUP.search(data)
+    if match is None:
+        return None
+    line = data[match.start():match.end()]
+    qos = "burstable" if b"burstable" in line else "besteffort" if b"besteffort" in line else "guaranteed"
+    container = match.group(2)
+    return PodCgroup(match.group(1).decode().replace("_", "-"), qos, container.decode() if container else None)
+
+
+def discover_pod_cgroups(root: str) -> Dict[str, Tuple[str, str]]:
+    """pod uid -> (cgroup directory, QoS class) for every pod cgroup under root."""
+    pods = {}
+    for pattern in POD_CGROUP_GLOBS:
+        for path in glob.glob(os.path.join(root, pattern)):
+            match = _POD_UID.search(os.path.basename(path))
+            if not match:
+                continue
+            qos = _QOS.search(os.path.basename(os.path.dirname(path)))
+            pods[match.group(1).replace("_", "-")] = (path, qos.group(1) if qos else "guaranteed")
+    return pods
+
+
+def iter_rows(data: bytes, min_fields: int = 1) -> Iterator[List[bytes]]:
+    """Whitespace-separated tables (diskstats, /proc/net/dev, mountinfo)."""
+    for line in data.splitlines():
+        fields = line.split()
+        if len(fields) >= min_fields:
+            yield fields
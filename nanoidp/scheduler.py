@@ -0,0 +1,171 @@
+"""
+One sampling scheduler per process.
+Periodic jobs share a single timer task instead of one sleep loop each.
+Ticks are fixed-rate, so the schedule does not drift with job run time.
+Each run is its own task, so a slow job never delays the others. A tick
+that comes due while the previous run is still going is skipped and
+counted as an overrun.
+"""
+from typing import Awaitable, Callable, Dict, List, Optional, Union
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+JobFn = Callable[[], Union[None, Awaitable[None]]]
+
+
+class Job:
+    """A periodic job; cancel() removes it from the schedule."""
+
+    def __init__(self, scheduler: "Scheduler", name: str, interval_s: float, fn: JobFn,
+                 offload: bool):
+        self.scheduler = scheduler
+        self.name = name
+        self.interval_s = interval_s
+        self.fn = fn
+        self.offload = offload
+        self.due = 0.0
+        self.runs = 0
+        self.failures = 0
+        self.overruns = 0
+        self.last_ms = 0.0
+        self.cancelled = False
+        self._running: Optional[asyncio.Task] = None
+        self._waiter: Optional[asyncio.Task] = None
+
+    def cancel(self) -> None:
+        self.cancelled = True
+        if self._waiter:
+            self._waiter.cancel()
+        if self._running:
+            self._running.cancel()
+        self.scheduler._jobs.discard(self)
+
+    async def _run(self) -> None:
+        start = time.perf_counter()
+        try:
+            if self.offload:
+                await asyncio.get_running_loop().run_in_executor(None, self.fn)
+            else:
+                result = self.fn()
+                if asyncio.iscoroutine(result):
+                    await result
+            self.runs += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failures += 1
+            logger.warning(f"Scheduled job {self.name} failed: {e}")
+        finally:
+            self.last_ms = round((time.perf_counter() - start) * 1000, 3)
+
+    def stats(self) -> Dict:
+        return {
+            "name": self.name,
+            "interval_s": self.interval_s,
+            "runs": self.runs,
+            "failures": self.failures,
+            "overruns": self.overruns,
+            "last_ms": self.last_ms,
+            "waiting": self._waiter is not None and not self._waiter.done(),
+        }
+
+
+class Scheduler:
+    """Heap of jobs ordered by next due time, driven by one task."""
+
+    def __init__(self):
+        self._heap: List = []
+        self._jobs = set()
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._users = 0
+
+    def every(self, interval_s: float, fn: JobFn, name: Optional[str] = None,
+              offload: bool = False, after: Optional[asyncio.Event] = None) -> Job:
+        """
+        Run fn every interval_s seconds, starting now (or as soon as `after`
+        is set). Sync functions run on the loop unless offload=True, which
+        sends them to the default executor; coroutine functions are awaited.
+        """
+        job = Job(self, name or getattr(fn, "__qualname__", "job"), interval_s, fn, offload)
+        self._jobs.add(job)
+        if after is not None and not after.is_set():
+            async def wait():
+                await after.wait()
+                self._push(job, time.monotonic())
+            job._waiter = asyncio.create_task(wait())
+        else:
+            self._push(job, time.monotonic())
+        return job
+
+    def _push(self, job: Job, due: float) -> None:
+        job.due = due
+        heapq.heappush(self._heap, (due, next(self._seq), job))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        """Start the timer task; nested start/stop pairs are reference-counted."""
+        self._users += 1
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        self._users = max(0, self._users - 1)
+        if self._users or self._task is None:
+            return
+        self._task.cancel()
+        for job in list(self._jobs):
+            job.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self._heap.clear()
+
+    async def _loop(self) -> None:
+        while True:
+            self._wakeup.clear()
+            while self._heap and self._heap[0][2].cancelled:
+                heapq.heappop(self._heap)
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+            delay = self._heap[0][0] - time.monotonic()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, job = heapq.heappop(self._heap)
+            if job._running is not None and not job._running.done():
+                job.overruns += 1
+            else:
+                job._running = asyncio.create_task(job._run())
+            # Fixed-rate: next tick from the scheduled time, skipping missed ones
+            now = time.monotonic()
+            due = job.due + job.interval_s
+            if due <= now:
+                due += ((now - due) // job.interval_s + 1) * job.interval_s
+            self._push(job, due)
+
+    def stats(self) -> List[Dict]:
+        return sorted((job.stats() for job in self._jobs), key=lambda s: s["name"])
+
+
+_default: Optional[Scheduler] = None
+
+
+def default() -> Scheduler:
+    """The process-wide scheduler shared by every monitor in this process."""
+    global _default
+    if _default is None:
+        _default = Scheduler()
+    return _default
@@ -0,0 +1,219 @@
+"""
+Seeded, deterministic memory scenarios for many simulated nodes and pods.
+
+Each node runs a scenario over its pods, and the node's memory follows from
+them:
+
+    steady      pods jitter around their working set
+    leak        one or two pods leak without a limit: cache is reclaimed,
+                then anon pages swap out, then the node OOM-kills its largest pod
+    oom-cycle   leaking pods hit their memory limit and restart (sawtooth)
+    swap-storm  swappiness 100 and periodic demand bursts past RAM
+    mixed       each node draws one of the above
+
+Pods drive anon memory. The page cache fills free memory and is reclaimed
+first. Demand past RAM swaps anon pages out, with swappiness setting how much
+cache is kept. Swap-in follows once memory frees up. PSI some/full avg10 is
+an exponential average over a 10 s window, like the kernel's, of the stall
+implied by low available memory and swap traffic.
+
+step() advances every node by one interval and returns a Batch: one list per
+field over all nodes (the frame layout alerts.RuleEngine takes). Batch.meminfo(i)
+gives node i as the /proc/meminfo keys, so simulated samples go through the
+same parsing-free path as procfs.parse_keyed(meminfo). All randomness comes
+from one random.Random(seed) drawn in a fixed order, so a (seed, scenario,
+tick) always gives the same sample.
+
+    cluster = synthetic.Cluster(nodes=2000, pods_per_node=12, scenario="mixed", seed=7)
+    batch = cluster.step()            # batch.ids, batch.columns["available_mb"], ...
+    batch.meminfo(0)                  # {"MemTotal": ..., "MemAvailable": ..., ...} in kB
+"""
+from math import exp
+from typing import Dict, List, NamedTuple, Optional
+import random
+
+SCENARIOS = ("steady", "leak", "oom-cycle", "swap-storm", "mixed")
+MIXED_WEIGHTS = {"steady": 0.55, "leak": 0.15, "oom-cycle": 0.2, "swap-storm": 0.1}
+
+COLUMNS = ("total_mb", "free_mb", "available_mb", "cached_mb", "swap_total_mb", "swap_free_mb",
+           "psi_some_avg10", "psi_full_avg10", "swappiness", "cache_pressure", "oom_kills")
+
+MIN_FREE_MB = 64
+CACHE_FILL_MB_S = 4.0  # page cache growth into free memory
+SWAPIN_MB_S = 8.0
+STORM_PERIOD_S = 300
+STORM_LENGTH_S = 60
+STORM_FACTOR = 2.6
+
+
+class Batch(NamedTuple):
+    tick: int
+    ids: List[str]
+    columns: Dict[str, List[float]]
+
+    def meminfo(self, i: int) -> Dict[str, int]:
+        """Node i as /proc/meminfo keys, in kB."""
+        c = self.columns
+        return {
+            "MemTotal": int(c["total_mb"][i] * 1024),
+            "MemFree": int(c["free_mb"][i] * 1024),
+            "MemAvailable": int(c["available_mb"][i] * 1024),
+            "Cached": int(c["cached_mb"][i] * 1024),
+            "SwapTotal": int(c["swap_total_mb"][i] * 1024),
+            "SwapFree": int(c["swap_free_mb"][i] * 1024),
+        }
+
+    def sysctl(self, i: int, name: str) -> int:
+        return int(self.columns["swappiness" if "swappiness" in name else "cache_pressure"][i])
+
+
+class Cluster:
+    """Simulated nodes and their pods; node i owns pods [i*P, (i+1)*P)."""
+
+    def __init__(self, nodes: int = 1, pods_per_node: int = 12, scenario: str = "mixed",
+                 seed: int = 0, interval_s: float = 5.0, total_mb: int = 8192, swap_mb: int = 4096):
+        if scenario not in SCENARIOS:
+            raise ValueError(f"Unknown scenario {scenario!r}; one of {SCENARIOS}")
+        self.rng = random.Random(seed)
+        self.interval_s = interval_s
+        self.pods_per_node = pods_per_node
+        self.tick = 0
+        self.ids = [f"sim-node-{i:05d}" for i in range(nodes)]
+        rng = self.rng
+        names, weights = zip(*MIXED_WEIGHTS.items())
+        self.scenarios = [scenario if scenario != "mixed" else rng.choices(names, weights)[0]
+                          for _ in range(nodes)]
+
+        # Node state
+        self.total = [float(total_mb)] * nodes
+        self.swap_total = [float(swap_mb)] * nodes
+        self.system = [500 + rng.random() * 400 for _ in range(nodes)]  # kernel, kubelet, runtime
+        self.cache = [total_mb * 0.1] * nodes
+        self.swap = [0.0] * nodes
+        self.psi_some = [0.0] * nodes
+        self.psi_full = [0.0] * nodes
+        self.oom_kills = [0] * nodes
+        self.swappiness = [100 if s == "swap-storm" else rng.choice((10, 60, 60)) for s in self.scenarios]
+        self.storm_offset = [rng.randrange(STORM_PERIOD_S) for _ in range(nodes)]
+
+        # Pod state, flat over all nodes
+        self.initial: List[float] = []
+        self.base: List[float] = []
+        self.rss: List[float] = []
+        self.limit: List[float] = []  # 0: no limit
+        self.leak: List[float] = []  # MB/s
+        self.restarts: List[int] = []
+        for node_scenario in self.scenarios:
+            leakers = set()
+            if node_scenario == "leak":
+                leakers = set(rng.sample(range(pods_per_node), min(pods_per_node, rng.choice((1, 2)))))
+            elif node_scenario == "oom-cycle":
+                leakers = set(rng.sample(range(pods_per_node), min(pods_per_node, rng.choice((2, 3)))))
+            for p in range(pods_per_node):
+                base = 40 + rng.random() ** 2 * 600
+                self.initial.append(base)
+                self.base.append(base)
+                self.rss.append(base)
+                leaking = p in leakers
+                self.leak.append(rng.uniform(0.5, 3.0) if leaking else 0.0)
+                bounded = node_scenario == "oom-cycle" and leaking
+                self.limit.append(base * rng.uniform(1.6, 2.5) if bounded else 0.0)
+                self.restarts.append(0)
+
+    def _restart(self, j: int) -> float:
+        """OOM-kill pod j and restart it at its initial working set; returns the MB freed."""
+        freed = self.rss[j] - self.initial[j]
+        self.rss[j] = self.base[j] = self.initial[j]
+        self.restarts[j] += 1
+        return freed
+
+    def _kill_largest(self, i: int) -> float:
+        """Node OOM killer: restart the node's largest pod; returns the MB freed."""
+        if not self.pods_per_node:
+            return 0.0
+        self.oom_kills[i] += 1
+        lo = i * self.pods_per_node
+        return self._restart(max(range(lo, lo + self.pods_per_node), key=self.rss.__getitem__))
+
+    def step(self) -> Batch:
+        """Advance every node by one interval."""
+        dt = self.interval_s
+        decay = exp(-dt / 10.0)
+        noise = self.rng.random
+        now_s = self.tick * dt
+        P = self.pods_per_node
+        base, rss, limit, leak = self.base, self.rss, self.limit, self.leak
+        columns: Dict[str, List[float]] = {name: [] for name in COLUMNS}
+        out_free, out_avail, out_cached = columns["free_mb"], columns["available_mb"], columns["cached_mb"]
+        out_swap_free, out_some, out_full = columns["swap_free_mb"], columns["psi_some_avg10"], columns["psi_full_avg10"]
+
+        for i in range(len(self.ids)):
+            total, swap_total, swappiness = self.total[i], self.swap_total[i], self.swappiness[i]
+            storm = (self.scenarios[i] == "swap-storm"
+                     and (now_s + self.storm_offset[i]) % STORM_PERIOD_S < STORM_LENGTH_S)
+            factor = STORM_FACTOR if storm else 1.0
+
+            anon = self.system[i]
+            for j in range(i * P, (i + 1) * P):
+                target = base[j] * factor
+                r = rss[j]
+                # Mean-reverting working set (with a leak, the target moves up)
+                r += (target - r) * 0.3 + (noise() - 0.5) * 0.04 * base[j]
+                if leak[j]:
+                    base[j] += leak[j] * dt
+                rss[j] = r
+                if limit[j] and r > limit[j]:  # container OOM kill and restart
+                    self._restart(j)
+                    self.oom_kills[i] += 1
+                anon += rss[j]
+
+            # Cache is reclaimed first; what cache swappiness protects forces swap-out
+            swap_before = self.swap[i]
+            resident = anon - self.swap[i]
+            min_cache = 64 + swappiness * 3.0
+            room = total - MIN_FREE_MB - resident  # for cache
+            if room < min_cache:
+                self.swap[i] += min_cache - room
+                resident = anon - self.swap[i]
+            elif self.swap[i] and room - self.cache[i] > total * 0.2:  # pressure gone: swap back in
+                swapin = min(self.swap[i], SWAPIN_MB_S * dt)
+                self.swap[i] -= swapin
+                resident += swapin
+            if self.swap[i] > swap_total:  # out of swap: node OOM killer
+                self.swap[i] = swap_total
+                anon -= self._kill_largest(i)
+                resident = anon - self.swap[i]
+            cache = min(self.cache[i] + CACHE_FILL_MB_S * dt, max(min_cache, total - MIN_FREE_MB - resident))
+            self.cache[i] = cache
+            free = max(float(MIN_FREE_MB), total - resident - cache)
+            available = max(0.0, free - MIN_FREE_MB + cache * 0.85)
+
+            # PSI: stall from low available memory and from swap traffic, averaged like avg10
+            swap_io = abs(self.swap[i] - swap_before) / dt
+            scarcity = max(0.0, (0.12 - available / total) / 0.12)
+            some = min(100.0, 60.0 * scarcity * scarcity + swap_io * 0.8)
+            full = some * (0.5 if available < total * 0.05 else 0.2)
+            self.psi_some[i] = self.psi_some[i] * decay + some * (1 - decay)
+            self.psi_full[i] = self.psi_full[i] * decay + full * (1 - decay)
+
+            out_free.append(round(free, 1))
+            out_avail.append(round(available, 1))
+            out_cached.append(round(cache, 1))
+            out_swap_free.append(round(swap_total - self.swap[i], 1))
+            out_some.append(round(self.psi_some[i], 2))
+            out_full.append(round(self.psi_full[i], 2))
+
+        columns["total_mb"] = list(self.total)
+        columns["swap_total_mb"] = list(self.swap_total)
+        columns["swappiness"] = list(self.swappiness)
+        columns["cache_pressure"] = [100] * len(self.ids)
+        columns["oom_kills"] = list(self.oom_kills)
+        self.tick += 1
+        return Batch(self.tick, self.ids, columns)
+
+    def advance_to(self, tick: int) -> Optional[Batch]:
+        """Step until `tick` samples have been produced; the last batch (None if already past)."""
+        batch = None
+        while self.tick < tick:
+            batch = self.step()
+        return batch
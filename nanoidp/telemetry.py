@@ -0,0 +1,480 @@
+"""
+Self-observability for the monitor backends: is the service inside its own
+budget?
+
+- per-route latency histograms (time to response start) and status counts,
+  as pure ASGI middleware
+- event-loop lag from a 100 ms ticker; a watchdog thread logs the loop
+  thread's stack when it has not ticked for LOOP_BLOCK_MS (a handler
+  blocking the loop)
+- process RSS/peak RSS, CPU over the last 10 s, thread count
+- GC collections and pause times per generation (gc.callbacks)
+- tracemalloc top allocations, started and snapshotted on demand
+
+    telemetry.install(app, "memory-monitor", memory_budget_mb=64)
+
+adds GET /metrics (Prometheus text), GET /debug/runtime and
+GET|POST /debug/tracemalloc. The loop monitor is process-wide and
+reference-counted; it starts with the app's lifespan, so a host mounting
+several apps (the agent) runs one. MEMORY_BUDGET_MB and CPU_BUDGET_PERCENT
+override the budgets.
+"""
+from bisect import bisect_left
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+import asyncio
+import gc
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import traceback
+
+from nanoidp import procfs
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency, lag and GC pause buckets
+BUCKETS_S = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+LOOP_TICK_S = 0.1
+LOOP_BLOCK_S = float(os.getenv("LOOP_BLOCK_MS", "250")) / 1000
+CPU_WINDOW_S = 10.0
+STACK_FRAMES = 12  # innermost frames logged for a stall
+
+
+class Histogram:
+    """Fixed-bucket histogram: one bisect and two adds per observation."""
+
+    __slots__ = ("counts", "sum", "count", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_S) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(BUCKETS_S, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (max for the overflow bucket)."""
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(BUCKETS_S[i], self.max) if i < len(BUCKETS_S) else self.max
+        return self.max
+
+    def summary(self) -> Dict:
+        return {"count": self.count, "p50_ms": round(self.quantile(0.5) * 1000, 2),
+                "p99_ms": round(self.quantile(0.99) * 1000, 2), "max_ms": round(self.max * 1000, 2),
+                "mean_ms": round(self.sum / self.count * 1000, 3) if self.count else 0.0}
+
+    def render(self, name: str, labels: str) -> List[str]:
+        sep = "," if labels else ""
+        lines, cumulative = [], 0
+        for bound, n in zip(BUCKETS_S, self.counts):
+            cumulative += n
+            lines.append(f'{name}_bucket{{{labels}{sep}le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum:.6f}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class LoopMonitor:
+    """Event-loop lag ticker plus a watchdog thread that catches blocking calls."""
+
+    def __init__(self, tick_s: float = LOOP_TICK_S, block_s: float = LOOP_BLOCK_S):
+        self.tick_s = tick_s
+        self.block_s = block_s
+        self.lag = Histogram()
+        self.last_lag_s = 0.0
+        self.blocked = 0
+        self.stalls: Deque[Dict] = deque(maxlen=5)
+        self.cpu_percent = 0.0
+        self._beat: Optional[float] = None
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._users = 0
+
+    def start(self) -> None:
+        """Start on the running loop; nested starts share one ticker."""
+        self._users += 1
+        if self._task is None or self._task.done():
+            self._loop_thread = threading.get_ident()
+            self._beat = time.monotonic()
+            self._task = asyncio.get_running_loop().create_task(self._tick())
+        if self._watchdog is None:
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._users = max(0, self._users - 1)
+        if self._users or self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._beat = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def _tick(self) -> None:
+        cpu_at, cpu_mark = time.monotonic(), cpu_seconds()
+        while True:
+            before = time.monotonic()
+            await asyncio.sleep(self.tick_s)
+            now = time.monotonic()
+            self._beat = now
+            self.last_lag_s = max(0.0, now - before - self.tick_s)
+            self.lag.observe(self.last_lag_s)
+            if now - cpu_at >= CPU_WINDOW_S:
+                cpu = cpu_seconds()
+                self.cpu_percent = round((cpu - cpu_mark) / (now - cpu_at) * 100, 2)
+                cpu_at, cpu_mark = now, cpu
+
+    def _watch(self) -> None:
+        reported = None
+        while True:
+            time.sleep(self.block_s / 2)
+            beat = self._beat
+            if beat is None or beat == reported:
+                continue
+            stalled = time.monotonic() - beat
+            if stalled < self.block_s:
+                continue
+            reported = beat
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = "".join(traceback.format_stack(frame, STACK_FRAMES)) if frame is not None else ""
+            self.blocked += 1
+            self.stalls.append({"at": time.time(), "stalled_ms": round(stalled * 1000, 1), "stack": stack})
+            logger.warning(f"Event loop blocked for {stalled * 1000:.0f} ms+, loop thread stack:\n{stack}")
+
+    def stats(self) -> Dict:
+        return {"running": self.running, "tick_ms": self.tick_s * 1000, "block_ms": self.block_s * 1000,
+                "last_lag_ms": round(self.last_lag_s * 1000, 2), "lag": self.lag.summary(),
+                "blocked": self.blocked}
+
+
+class GCStats:
+    """Collections and pause time per generation, from gc.callbacks."""
+
+    def __init__(self):
+        self.collections = [0, 0, 0]
+        self.collected = [0, 0, 0]
+        self.pause_s = [0.0, 0.0, 0.0]
+        self.pauses = Histogram()
+        self._started = 0.0
+        gc.callbacks.append(self._callback)
+
+    def _callback(self, phase: str, info: Dict) -> None:
+        if phase == "start":
+            self._started = time.perf_counter()
+            return
+        pause = time.perf_counter() - self._started
+        generation = info["generation"]
+        self.collections[generation] += 1
+        self.collected[generation] += info["collected"]
+        self.pause_s[generation] += pause
+        self.pauses.observe(pause)
+
+    def stats(self) -> Dict:
+        return {
+            "generations": [{"collections": c, "collected": n, "pause_ms": round(p * 1000, 2)}
+                            for c, n, p in zip(self.collections, self.collected, self.pause_s)],
+            "pause": self.pauses.summary(),
+            "thresholds": gc.get_threshold(),
+        }
+
+
+class AllocationTracker:
+    """On-demand tracemalloc: start, top allocation sites, diff with the previous snapshot."""
+
+    _FILTERS = (tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"))
+
+    def __init__(self):
+        self._previous: Optional[tracemalloc.Snapshot] = None
+
+    def start(self, frames: int = 1) -> Dict:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            self._previous = None
+        return self.status()
+
+    def stop(self) -> Dict:
+        tracemalloc.stop()
+        self._previous = None
+        return self.status()
+
+    def status(self) -> Dict:
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        return {"tracing": tracing, "frames": tracemalloc.get_traceback_limit() if tracing else 0,
+                "traced_kb": current // 1024, "peak_traced_kb": peak // 1024,
+                "overhead_kb": tracemalloc.get_tracemalloc_memory() // 1024 if tracing else 0}
+
+    def snapshot(self, top: int = 20, key: str = "lineno") -> Dict:
+        """Top allocation sites, plus the biggest growth since the last snapshot."""
+        if not tracemalloc.is_tracing():
+            return {**self.status(), "top": [], "growth": []}
+        snapshot = tracemalloc.take_snapshot().filter_traces(self._FILTERS)
+        result = {**self.status(), "top": [
+            {"site": str(stat.traceback), "size_kb": round(stat.size / 1024, 1), "count": stat.count}
+            for stat in snapshot.statistics(key)[:top]
+        ], "growth": []}
+        if self._previous is not None:
+            result["growth"] = [
+                {"site": str(stat.traceback), "size_diff_kb": round(stat.size_diff / 1024, 1),
+                 "count_diff": stat.count_diff}
+                for stat in snapshot.compare_to(self._previous, key)[:top] if stat.size_diff
+            ]
+        self._previous = snapshot
+        return result
+
+
+def cpu_seconds() -> float:
+    times = os.times()
+    return times.user + times.system
+
+
+def memory_kb() -> Dict[str, int]:
+    status = procfs.parse_keyed(procfs.read("/proc/self/status"), ["VmRSS", "VmHWM", "Threads"])
+    return {"rss_kb": status.get("VmRSS", 0), "peak_rss_kb": status.get("VmHWM", 0),
+            "threads": status.get("Threads", 0)}
+
+
+class _Process:
+    """Process-wide collectors, shared by every instrumented app."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.loop = LoopMonitor()
+        self.gc = GCStats()
+        self.allocations = AllocationTracker()
+
+
+_process: Optional[_Process] = None
+
+
+def process() -> _Process:
+    global _process
+    if _process is None:
+        _process = _Process()
+    return _process
+
+
+class Telemetry:
+    """One app's route histograms and budgets; process stats come from process()."""
+
+    def __init__(self, service: str, memory_budget_mb: Optional[float] = None,
+                 cpu_budget_percent: Optional[float] = None):
+        self.service = service
+        budget = os.getenv("MEMORY_BUDGET_MB")
+        self.memory_budget_mb = float(budget) if budget else memory_budget_mb
+        budget = os.getenv("CPU_BUDGET_PERCENT")
+        self.cpu_budget_percent = float(budget) if budget else cpu_budget_percent
+        self.process = process()
+        self.routes: Dict[Tuple[str, str], Histogram] = {}
+        self.statuses: Dict[Tuple[str, str, int], int] = {}
+
+    def record(self, method: str, label: str, status: int, seconds: float) -> None:
+        key = (method, label)
+        histogram = self.routes.get(key)
+        if histogram is None:
+            histogram = self.routes[key] = Histogram()
+        histogram.observe(seconds)
+        status_key = (method, label, status)
+        self.statuses[status_key] = self.statuses.get(status_key, 0) + 1
+
+    def budget(self, memory: Dict[str, int]) -> Dict:
+        rss_mb = memory["rss_kb"] / 1024
+        cpu = self.process.loop.cpu_percent
+        return {
+            "memory_mb": self.memory_budget_mb, "rss_mb": round(rss_mb, 1),
+            "memory_ok": None if self.memory_budget_mb is None else rss_mb <= self.memory_budget_mb,
+            "cpu_percent": self.cpu_budget_percent, "cpu_used_percent": cpu,
+            "cpu_ok": None if self.cpu_budget_percent is None else cpu <= self.cpu_budget_percent,
+        }
+
+    def runtime(self) -> Dict:
+        """Everything /debug/runtime reports."""
+        memory = memory_kb()
+        return {
+            "service": self.service,
+            "uptime_s": round(time.time() - self.process.started, 1),
+            "budget": self.budget(memory),
+            "memory": memory,
+            "cpu_seconds": round(cpu_seconds(), 2),
+            "loop": {**self.process.loop.stats(), "stalls": list(self.process.loop.stalls)},
+            "gc": self.process.gc.stats(),
+            "tracemalloc": self.process.allocations.status(),
+            "routes": {f"{method} {label}": histogram.summary()
+                       for (method, label), histogram in sorted(self.routes.items(), key=lambda kv: kv[0][1])},
+        }
+
+    def render(self) -> str:
+        """Prometheus text exposition of the process and route metrics."""
+        memory = memory_kb()
+        loop, gc_stats = self.process.loop, self.process.gc
+        service = f'service="{self.service}"'
+        lines = [
+            "# HELP process_resident_memory_bytes Resident set size",
+            "# TYPE process_resident_memory_bytes gauge",
+            f"process_resident_memory_bytes {memory['rss_kb'] * 1024}",
+            "# HELP nanoidp_process_peak_resident_memory_bytes Peak resident set size (VmHWM)",
+            "# TYPE nanoidp_process_peak_resident_memory_bytes gauge",
+            f"nanoidp_process_peak_resident_memory_bytes {memory['peak_rss_kb'] * 1024}",
+            "# HELP process_cpu_seconds_total User and system CPU time",
+            "# TYPE process_cpu_seconds_total counter",
+            f"process_cpu_seconds_total {cpu_seconds():.3f}",
+            "# HELP nanoidp_process_cpu_percent CPU use over the last 10 s",
+            "# TYPE nanoidp_process_cpu_percent gauge",
+            f"nanoidp_process_cpu_percent {loop.cpu_percent}",
+            "# HELP nanoidp_process_threads OS threads",
+            "# TYPE nanoidp_process_threads gauge",
+            f"nanoidp_process_threads {memory['threads']}",
+        ]
+        if self.memory_budget_mb is not None:
+            lines += ["# HELP nanoidp_memory_budget_bytes Stated RSS budget of the service",
+                      "# TYPE nanoidp_memory_budget_bytes gauge",
+                      f"nanoidp_memory_budget_bytes{{{service}}} {int(self.memory_budget_mb * 1024 * 1024)}"]
+        if self.cpu_budget_percent is not None:
+            lines += ["# HELP nanoidp_cpu_budget_percent Stated CPU budget of the service",
+                      "# TYPE nanoidp_cpu_budget_percent gauge",
+                      f"nanoidp_cpu_budget_percent{{{service}}} {self.cpu_budget_percent}"]
+        lines += ["# HELP nanoidp_event_loop_lag_seconds Lateness of a 100 ms loop tick",
+                  "# TYPE nanoidp_event_loop_lag_seconds histogram"]
+        lines += loop.lag.render("nanoidp_event_loop_lag_seconds", "")
+        lines += ["# HELP nanoidp_event_loop_blocked_total Loop stalls longer than LOOP_BLOCK_MS",
+                  "# TYPE nanoidp_event_loop_blocked_total counter",
+                  f"nanoidp_event_loop_blocked_total {loop.blocked}",
+                  "# HELP nanoidp_gc_collections_total Garbage collections per generation",
+                  "# TYPE nanoidp_gc_collections_total counter"]
+        lines += [f'nanoidp_gc_collections_total{{generation="{g}"}} {n}' for g, n in enumerate(gc_stats.collections)]
+        lines += ["# HELP nanoidp_gc_pause_seconds_total Time spent in garbage collection per generation",
+                  "# TYPE nanoidp_gc_pause_seconds_total counter"]
+        lines += [f'nanoidp_gc_pause_seconds_total{{generation="{g}"}} {s:.6f}' for g, s in enumerate(gc_stats.pause_s)]
+        lines += ["# HELP nanoidp_gc_pause_seconds Garbage collection pauses",
+                  "# TYPE nanoidp_gc_pause_seconds histogram"]
+        lines += gc_stats.pauses.render("nanoidp_gc_pause_seconds", "")
+        lines += ["# HELP nanoidp_http_request_duration_seconds Time to response start per route",
+                  "# TYPE nanoidp_http_request_duration_seconds histogram"]
+        for (method, label), histogram in self.routes.items():
+            lines += histogram.render("nanoidp_http_request_duration_seconds",
+                                      f'{service},method="{method}",route="{label}"')
+        lines += ["# HELP nanoidp_http_requests_total Requests per route and status",
+                  "# TYPE nanoidp_http_requests_total counter"]
+        lines += [f'nanoidp_http_requests_total{{{service},method="{method}",route="{label}",status="{status}"}} {n}'
+                  for (method, label, status), n in self.statuses.items()]
+        return "\n".join(lines) + "\n"
+
+
+class TelemetryMiddleware:
+    def __init__(self, app, telemetry: Telemetry):
+        self.app = app
+        self.telemetry = telemetry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.app(scope, self._lifespan(receive), send)
+            return
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        root_path = scope.get("root_path", "")
+        status = 500
+        elapsed = None
+
+        async def timed_send(message):
+            nonlocal status, elapsed
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed = time.perf_counter() - start
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            # Mounted apps extend root_path: keep the mount prefix in the label.
+            # A Mount as the last route means nothing inside it matched.
+            route = scope.get("route")
+            prefix = scope.get("root_path", "")[len(root_path):]
+            label = prefix + route.path if hasattr(route, "endpoint") else f"{prefix}/<unmatched>"
+            self.telemetry.record(scope["method"], label, status,
+                                  elapsed if elapsed is not None else time.perf_counter() - start)
+
+    def _lifespan(self, receive):
+        loop = self.telemetry.process.loop
+
+        async def wrapped():
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                loop.start()
+            elif message["type"] == "lifespan.shutdown":
+                await loop.stop()
+            return message
+
+        return wrapped
+
+
+def install(app, service: str, memory_budget_mb: Optional[float] = None,
+            cpu_budget_percent: Optional[float] = None, metrics_path: Optional[str] = "/metrics") -> Telemetry:
+    """
+    Instrument a FastAPI app and add its /metrics and /debug routes.
+    metrics_path=None leaves /metrics to the app, which can append
+    Telemetry.render() to its own output.
+    """
+    from fastapi import APIRouter, Query
+    from fastapi.responses import PlainTextResponse
+
+    telemetry = Telemetry(service, memory_budget_mb, cpu_budget_percent)
+    app.add_middleware(TelemetryMiddleware, telemetry=telemetry)
+    allocations = telemetry.process.allocations
+    api = APIRouter(tags=["telemetry"])
+
+    if metrics_path:
+        @api.get(metrics_path, response_class=PlainTextResponse)
+        async def metrics() -> str:
+            return telemetry.render()
+
+    @api.get("/debug/runtime")
+    async def debug_runtime() -> Dict:
+        """RSS and CPU against the budget, loop lag and stalls, GC, per-route latency."""
+        return telemetry.runtime()
+
+    @api.get("/debug/tracemalloc")
+    async def debug_tracemalloc(top: int = Query(20, ge=1, le=200),
+                                key: str = Query("lineno", pattern="^(lineno|filename|traceback)$")) -> Dict:
+        """Top allocation sites and growth since the previous call (start tracing first)."""
+        return allocations.snapshot(top, key)
+
+    @api.post("/debug/tracemalloc/start")
+    async def debug_tracemalloc_start(frames: int = Query(1, ge=1, le=25)) -> Dict:
+        return allocations.start(frames)
+
+    @api.post("/debug/tracemalloc/stop")
+    async def debug_tracemalloc_stop() -> Dict:
+        return allocations.stop()
+
+    app.include_router(api)
+    return telemetry
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Terminal memory monitor for the node, replacing the lesson 1 monitor.sh and
+lesson 3 monitor_memory.sh loops.
+
+One process and no subprocesses per tick: meminfo, the sysctls and memory PSI
+are read through nanoidp.procfs (descriptors kept open, same parsers as the
+lesson 2 parse_meminfo/get_sysctl_value), each once per tick. The screen is
+a grid of cells; a tick rewrites only the cells whose text changed, so an
+idle node costs a few bytes of output per refresh. Sparklines come from an
+in-memory history of the last samples.
+
+Usage (repo root):
+  python -m nanoidp.top [--interval 2] [--containers [N]]
+  python -m nanoidp.top --once --containers      # one plain-text frame, e.g. for a pipe
+
+--containers lists the top N container cgroups by memory.current (docker,
+containerd, CRI-O and podman scopes, including pods nested inside a k3d node).
+q or Ctrl+C exits.
+"""
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+import argparse
+import os
+import re
+import select
+import sys
+import time
+
+try:
+    from nanoidp import procfs
+except ImportError:  # run as a script from nanoidp/
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from nanoidp import procfs
+
+PROC_ROOT = os.getenv("PROC_ROOT", "/proc")
+CGROUP_ROOT = os.getenv("CGROUP_ROOT", "/sys/fs/cgroup")
+DOCKER_ROOT = os.getenv("DOCKER_ROOT", "/var/lib/docker")
+
+HISTORY = 240  # samples per sparkline
+SPARKS = "▁▂▃▄▅▆▇█"
+DISCOVER_EVERY = 10  # ticks between cgroup tree walks
+MAX_DEPTH = 7  # system.slice/docker-<id>.scope/kubepods/burstable/pod<uid>/<id>
+
+BOLD, DIM, RESET = "\033[1m", "\033[2m", "\033[0m"
+GREEN, YELLOW, RED, CYAN = "\033[0;32m", "\033[1;33m", "\033[0;31m", "\033[0;36m"
+
+# Budget status thresholds on used %, as in monitor.sh
+STATUS = ((50, "HEALTHY", GREEN), (75, "ELEVATED", YELLOW), (101, "CRITICAL", RED))
+
+_CONTAINER = re.compile(r"^(?:(?:docker|cri-containerd|crio|libpod)-)?([0-9a-f]{64})(?:\.scope)?$")
+_POD = re.compile(r"pod([0-9a-f_-]{36})(?:\.slice)?$")
+
+Cell = Tuple[str, str]  # (text, style)
+
+
+def sparkline(values, width: int, top: float = 100.0) -> str:
+    """Last `width` values on a fixed 0..top scale."""
+    if width <= 0:
+        return ""
+    tail = list(values)[-width:]
+    scale = (len(SPARKS) - 1) / top
+    return "".join(SPARKS[min(len(SPARKS) - 1, max(0, int(v * scale + 0.5)))] for v in tail)
+
+
+class Screen:
+    """
+    Cell grid on an ANSI terminal. draw() takes the whole frame and writes
+    only the cells whose text or style changed since the previous one,
+    blanking what the new text no longer covers. A resize redraws everything.
+    """
+
+    def __init__(self, out=sys.stdout):
+        self.out = out
+        self.cells: Dict[Tuple[int, int], Cell] = {}
+        self.size: Optional[os.terminal_size] = None
+
+    def draw(self, frame: Dict[Tuple[int, int], Cell]) -> int:
+        size = terminal_size(self.out)
+        parts: List[str] = []
+        if size != self.size:
+            self.size, self.cells = size, {}
+            parts.append("\033[2J")
+        # Blank vanished cells first: new text may now cover part of them
+        for row, col in self.cells.keys() - frame.keys():
+            parts.append(f"\033[{row + 1};{col + 1}H" + " " * len(self.cells[row, col][0]))
+        for (row, col), cell in frame.items():
+            if row >= size.lines:
+                continue
+            old = self.cells.get((row, col))
+            if old == cell:
+                continue
+            text, style = cell
+            text = text[:max(0, size.columns - col)]
+            pad = " " * max(0, len(old[0]) - len(text)) if old else ""
+            parts.append(f"\033[{row + 1};{col + 1}H{style}{text}{RESET if style else ''}{pad}")
+        self.cells = {pos: cell for pos, cell in frame.items() if pos[0] < size.lines}
+        output = "".join(parts)
+        if output:
+            self.out.write(output)
+            self.out.flush()
+        return len(output)
+
+    def open(self) -> None:
+        self.out.write("\033[?1049h\033[?25l")  # alternate screen, hide cursor
+
+    def close(self) -> None:
+        self.out.write("\033[?25h\033[?1049l")
+        self.out.flush()
+
+
+def plain(frame: Dict[Tuple[int, int], Cell]) -> str:
+    """A frame as plain lines, for --once and pipes."""
+    rows: Dict[int, List[Tuple[int, str]]] = {}
+    for (row, col), (text, _) in frame.items():
+        rows.setdefault(row, []).append((col, text))
+    lines = []
+    for row in range(max(rows, default=-1) + 1):
+        line = ""
+        for col, text in sorted(rows.get(row, [])):
+            line = line.ljust(col) + text
+        lines.append(line.rstrip())
+    return "\n".join(lines)
+
+
+class Containers:
+    """Container cgroups under CGROUP_ROOT, rediscovered every DISCOVER_EVERY ticks."""
+
+    def __init__(self, root: str = CGROUP_ROOT):
+        self.root = root
+        self.paths: Dict[str, str] = {}  # cgroup dir -> label
+        self._names: Dict[str, str] = {}
+        self._ticks = 0
+
+    def _name(self, container_id: str) -> str:
+        """Docker's container name when its config is readable (root), else the short id."""
+        name = self._names.get(container_id)
+        if name is None:
+            name = container_id[:12]
+            try:
+                import json
+                with open(f"{DOCKER_ROOT}/containers/{container_id}/config.v2.json", "rb") as f:
+                    name = json.load(f).get("Name", "").lstrip("/") or name
+            except (OSError, ValueError):
+                pass
+            self._names[container_id] = name
+        return name
+
+    def _walk(self, path: str, depth: int, parent: str, found: Dict[str, str]) -> None:
+        try:
+            entries = list(os.scandir(path))
+        except OSError:
+            return
+        for entry in entries:
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+            label = parent
+            match = _CONTAINER.match(entry.name)
+            if match:
+                name = self._name(match.group(1)) if not parent else match.group(1)[:12]
+                label = f"{parent}/{name}" if parent else name
+                found[entry.path] = label
+            else:
+                pod = _POD.search(entry.name)
+                if pod and parent:
+                    label = f"{parent}/pod{pod.group(1)[:8]}"
+            if depth < MAX_DEPTH:
+                self._walk(entry.path, depth + 1, label, found)
+
+    def sample(self) -> List[Tuple[str, int, Optional[int]]]:
+        """(label, memory.current, memory.max or None) for every known container."""
+        if self._ticks % DISCOVER_EVERY == 0:
+            found: Dict[str, str] = {}
+            self._walk(self.root, 1, "", found)
+            for gone in self.paths.keys() - found.keys():
+                procfs.files.discard(f"{gone}/memory.current")
+                procfs.files.discard(f"{gone}/memory.max")
+            self.paths = found
+        self._ticks += 1
+        rows = []
+        for path, label in list(self.paths.items()):
+            try:
+                current = procfs.parse_int(procfs.read(f"{path}/memory.current"))
+                limit = procfs.parse_limit(procfs.read(f"{path}/memory.max"))
+            except (OSError, ValueError):  # container stopped between walks
+                procfs.files.discard(f"{path}/memory.current")
+                procfs.files.discard(f"{path}/memory.max")
+                del self.paths[path]
+                continue
+            rows.append((label, current, limit))
+        rows.sort(key=lambda r: r[1], reverse=True)
+        return rows
+
+
+class Monitor:
+    def __init__(self, containers: int = 0):
+        self.history: Dict[str, Deque[float]] = {
+            name: deque(maxlen=HISTORY) for name in ("used", "available", "swap", "psi")}
+        self.containers = Containers() if containers else None
+        self.max_containers = containers
+        self._cpu: Optional[Tuple[float, float]] = None
+
+    def _sysctl(self, name: str) -> Optional[int]:
+        try:
+            return procfs.parse_int(procfs.read(f"{PROC_ROOT}/sys/{name.replace('.', '/')}"))
+        except (OSError, ValueError):
+            return None
+
+    def sample(self) -> Dict:
+        meminfo = procfs.parse_keyed(procfs.read(f"{PROC_ROOT}/meminfo"),
+                                     ("MemTotal", "MemAvailable", "SwapTotal", "SwapFree"))
+        total = meminfo.get("MemTotal", 0) // 1024
+        available = meminfo.get("MemAvailable", 0) // 1024
+        swap_total = meminfo.get("SwapTotal", 0) // 1024
+        swap_used = swap_total - meminfo.get("SwapFree", 0) // 1024
+        try:
+            psi = procfs.parse_pressure(procfs.read(f"{PROC_ROOT}/pressure/memory"))["some"]["avg10"]
+        except (OSError, KeyError, ValueError):
+            psi = None
+        sample = {
+            "total_mb": total, "available_mb": available, "used_mb": total - available,
+            "used_percent": (total - available) * 100 / total if total else 0.0,
+            "swap_total_mb": swap_total, "swap_used_mb": swap_used,
+            "swap_percent": swap_used * 100 / swap_total if swap_total else 0.0,
+            "psi_some_avg10": psi,
+            "swappiness": self._sysctl("vm.swappiness"),
+            "cache_pressure": self._sysctl("vm.vfs_cache_pressure"),
+            "containers": self.containers.sample()[:self.max_containers] if self.containers else [],
+        }
+        self.history["used"].append(sample["used_percent"])
+        self.history["available"].append(100 - sample["used_percent"])
+        self.history["swap"].append(sample["swap_percent"])
+        if psi is not None:
+            self.history["psi"].append(psi)
+        return sample
+
+    def self_usage(self) -> Tuple[float, float]:
+        """This process: RSS in MB and CPU % since the previous call."""
+        rss = int(procfs.read(f"{PROC_ROOT}/self/statm").split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1048576
+        now, cpu = time.monotonic(), sum(os.times()[:2])
+        previous, self._cpu = self._cpu, (now, cpu)
+        if previous is None or now <= previous[0]:
+            return rss, 0.0
+        return rss, (cpu - previous[1]) * 100 / (now - previous[0])
+
+    def frame(self, sample: Dict, width: int, interval: float) -> Dict[Tuple[int, int], Cell]:
+        cells: Dict[Tuple[int, int], Cell] = {}
+        spark_col = 38
+        spark_width = max(0, min(HISTORY, width - spark_col - 1))
+
+        cells[0, 0] = ("Nano-IDP Memory Monitor - 8GB Budget", BOLD)
+        cells[0, max(40, width - 9)] = (time.strftime("%H:%M:%S"), DIM)
+        cells[2, 0] = ("System Memory", BOLD)
+
+        def metric(row: int, label: str, value: str, series: Optional[str], style: str = "") -> None:
+            cells[row, 2] = (label, "")
+            cells[row, 14] = (value, style)
+            if series and spark_width:
+                cells[row, spark_col] = (sparkline(self.history[series], spark_width), CYAN)
+
+        metric(3, "Total", f"{sample['total_mb']} MB", None)
+        metric(4, "Used", f"{sample['used_mb']} MB ({sample['used_percent']:.1f}%)", "used")
+        metric(5, "Available", f"{sample['available_mb']} MB", "available")
+        if sample["swap_total_mb"]:
+            metric(6, "Swap used", f"{sample['swap_used_mb']} / {sample['swap_total_mb']} MB", "swap")
+        else:
+            metric(6, "Swap", "none configured", None, YELLOW)
+        if sample["psi_some_avg10"] is not None:
+            metric(7, "PSI some", f"{sample['psi_some_avg10']:.2f}% (avg10)", "psi")
+        metric(8, "Swappiness", f"{sample['swappiness']}  vfs_cache_pressure {sample['cache_pressure']}", None)
+
+        _, status, color = next(s for s in STATUS if sample["used_percent"] < s[0])
+        cells[10, 0] = ("Budget Status:", BOLD)
+        cells[10, 15] = (status, color)
+
+        row = 12
+        if self.containers is not None:
+            cells[row, 0] = ("Containers", BOLD)
+            cells[row, 46] = ("memory     limit", DIM)
+            for label, current, limit in sample["containers"]:
+                row += 1
+                cells[row, 2] = (label[:42], "")
+                cells[row, 46] = (f"{current / 1048576:6.0f} MB", "")
+                cells[row, 57] = (f"{limit / 1048576:.0f} MB" if limit else "-", DIM)
+            row += 2
+
+        rss, cpu = self.self_usage()
+        footer = f"monitor: {rss:.1f} MB RSS, {cpu:.1f}% CPU"
+        if interval:
+            footer += f". q or Ctrl+C to exit, refreshing every {interval:g}s"
+        cells[row, 0] = (footer, DIM)
+        return cells
+
+
+def terminal_size(out=sys.stdout) -> os.terminal_size:
+    """Window size, 80x24 when the terminal does not report one (e.g. a fresh pty)."""
+    try:
+        size = os.get_terminal_size(out.fileno())
+    except OSError:
+        size = None
+    return size if size and size.columns and size.lines else os.terminal_size((80, 24))
+
+
+def wait_for_key(timeout: float) -> Optional[str]:
+    """Sleep up to timeout; return a key pressed meanwhile (stdin in cbreak mode)."""
+    if timeout <= 0:
+        return None
+    ready, _, _ = select.select([sys.stdin], [], [], timeout)
+    return os.read(sys.stdin.fileno(), 1).decode(errors="ignore") if ready else None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--interval", type=float, default=2.0, help="seconds between refreshes")
+    parser.add_argument("--containers", type=int, nargs="?", const=8, default=0,
+                        help="show the top N containers by memory (default 8 when given)")
+    parser.add_argument("--once", action="store_true", help="print one frame as plain text and exit")
+    args = parser.parse_args()
+
+    monitor = Monitor(args.containers)
+    if args.once or not sys.stdout.isatty():
+        print(plain(monitor.frame(monitor.sample(), 80, 0)))
+        return
+
+    import termios
+    import tty
+    screen = Screen()
+    interactive = sys.stdin.isatty()
+    saved = termios.tcgetattr(sys.stdin) if interactive else None
+    try:
+        if interactive:
+            tty.setcbreak(sys.stdin.fileno())
+        screen.open()
+        deadline = time.monotonic()
+        while True:
+            sample = monitor.sample()
+            screen.draw(monitor.frame(sample, terminal_size().columns, args.interval))
+            deadline += args.interval
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                if not interactive:
+                    time.sleep(remaining)
+                elif wait_for_key(remaining) in ("q", "Q"):
+                    return
+            if time.monotonic() - deadline > args.interval:  # suspended or overran: resync
+                deadline = time.monotonic()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        screen.close()
+        if saved is not None:
+            termios.tcsetattr(sys.stdin, termios.TCSADRAIN, saved)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,396 @@
+"""
+Fixed-size, memory-mapped time-series files for monitor history.
+
+One file holds one series: a fixed set of float fields sampled over time,
+kept in circular tiers of fixed-size records: the raw samples, then
+downsampled tiers (e.g. 1-minute and 1-hour buckets, each with the mean and
+max of every field). The file is preallocated when created, so disk and
+page-cache use are fixed up front and old records are overwritten in place.
+
+Durability: records are written straight into a MAP_SHARED mapping, which
+lives in the page cache, so they survive the process being OOM-killed or
+restarted. Writeback to disk is left to the kernel (no fsync per sample);
+flush() forces it and runs on close. The cursors, and the downsample
+buckets still being filled (start, count, sums, maxes), live in two header
+slots written alternately with a sequence number and CRC; a torn header
+write falls back to the other slot, a record only becomes visible once the
+header that covers it is committed, and a restart carries on the current
+minute and hour instead of dropping them.
+
+Layout: [schema block | header slot A | header slot B | tier 0 | tier 1 ...]
+Tier 0 records are (timestamp, values...); downsampled records are
+(bucket start, means..., maxes...). All values are float64.
+"""
+from bisect import bisect_left, bisect_right
+from contextlib import asynccontextmanager
+from typing import (AsyncIterator, Awaitable, Callable, Dict, Iterator, List, NamedTuple, Optional,
+                    Sequence, Tuple, Union)
+import asyncio
+import fcntl
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+import zlib
+
+from nanoidp import scheduler
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"NIDPTSDB"
+VERSION = 2
+SCHEMA_SIZE = 2048
+SLOT_SIZE = 1024
+DATA_OFFSET = SCHEMA_SIZE + 2 * SLOT_SIZE
+MAX_TIERS = 8
+
+# hostPath (or emptyDir) the monitors keep their series in; override with HISTORY_DIR
+DEFAULT_DIR = "/var/lib/nanoidp"
+
+_SCHEMA_HEAD = struct.Struct("<8sII")  # magic, version, schema JSON length
+_SLOT_HEAD = struct.Struct("<QdI")  # sequence, last timestamp, CRC of the rest
+_CURSOR = struct.Struct("<QQ")  # next write index, record count
+_BUCKET = struct.Struct("<dQ")  # open bucket start, sample count (0: none), then sums and maxes
+
+
+class Tier(NamedTuple):
+    """step_s=0 keeps every sample; otherwise samples are bucketed by step_s."""
+    step_s: float
+    capacity: int
+
+
+def default_tiers(interval_s: float, raw_hours: float = 6) -> Tuple[Tier, ...]:
+    """Raw samples for raw_hours, 1-minute buckets for 2 days, hourly for 60 days."""
+    return (Tier(0, max(1, int(raw_hours * 3600 / interval_s))), Tier(60, 2 * 1440), Tier(3600, 60 * 24))
+
+
+class _Bucket:
+    __slots__ = ("start", "count", "sums", "maxes")
+
+    def __init__(self, start: float, n: int):
+        self.start = start
+        self.count = 0
+        self.sums = [0.0] * n
+        self.maxes = [float("-inf")] * n
+
+
+class Range:
+    """
+    Records of one tier between two timestamps, as zero-copy float64 views
+    of the mapping (two segments when the range wraps around the ring).
+    Use as a context manager, or call release(), before the series closes.
+    """
+
+    def __init__(self, names: List[str], width: int, segments: List[memoryview]):
+        self.names = names
+        self.width = width
+        self.segments = segments
+
+    def __len__(self) -> int:
+        return sum(len(segment) for segment in self.segments) // self.width
+
+    def column(self, index: int) -> List[float]:
+        """One column (0 = timestamps) via strided views; copies only the result."""
+        values: List[float] = []
+        for segment in self.segments:
+            values.extend(segment[index::self.width].tolist())
+        return values
+
+    def to_dict(self) -> Dict:
+        """Columnar form for JSON: {"timestamps": [...], "<field>": [...], ...}."""
+        result = {"timestamps": self.column(0)}
+        for i, name in enumerate(self.names, start=1):
+            result[name] = self.column(i)
+        return result
+
+    def rows(self) -> Iterator[Tuple[float, ...]]:
+        for segment in self.segments:
+            for i in range(0, len(segment), self.width):
+                yield tuple(segment[i:i + self.width].tolist())
+
+    def release(self) -> None:
+        for segment in self.segments:
+            segment.release()
+        self.segments = []
+
+    def __enter__(self) -> "Range":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+class _TimestampIndex:
+    """Logical record index -> timestamp, for bisect over a ring tier."""
+
+    def __init__(self, view: memoryview, base: int, width: int, capacity: int, oldest: int, count: int):
+        self.view, self.base, self.width = view, base, width
+        self.capacity, self.oldest, self.count = capacity, oldest, count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, i: int) -> float:
+        return self.view[self.base + ((self.oldest + i) % self.capacity) * self.width]
+
+
+class TimeSeries:
+    """A single-writer series file; see the module docstring for the format."""
+
+    def __init__(self, path: str, fields: Sequence[str], tiers: Sequence[Tier]):
+        if not tiers or tiers[0].step_s != 0 or len(tiers) > MAX_TIERS:
+            raise ValueError("tiers must start with a raw tier (step_s=0), at most 8 in total")
+        self.path = path
+        self.fields = list(fields)
+        self.tiers = [Tier(float(t.step_s), int(t.capacity)) for t in tiers]
+        n = len(self.fields)
+        self.widths = [1 + n] + [1 + 2 * n] * (len(self.tiers) - 1)
+        self._records = [struct.Struct(f"<{width}d") for width in self.widths]
+        self._offsets = []
+        offset = DATA_OFFSET
+        for tier, width in zip(self.tiers, self.widths):
+            self._offsets.append(offset // 8)
+            offset += tier.capacity * width * 8
+        self.size = offset
+        self._schema = json.dumps({"fields": self.fields, "tiers": self.tiers}).encode()
+        if len(self._schema) > SCHEMA_SIZE - _SCHEMA_HEAD.size:
+            raise ValueError("too many fields for the schema block")
+        self._sums = struct.Struct(f"<{2 * n}d")
+        self._slot_size = (len(self.tiers) * _CURSOR.size
+                           + (len(self.tiers) - 1) * (_BUCKET.size + self._sums.size))
+        if self._slot_size > SLOT_SIZE - _SLOT_HEAD.size:
+            raise ValueError("too many fields and tiers for the header slot")
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_CLOEXEC, 0o644)
+        try:
+            # One writer per file (e.g. two replicas sharing a hostPath)
+            fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            fresh = not self._schema_matches()
+            if fresh:
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, self.size)
+                try:
+                    os.posix_fallocate(self._fd, 0, self.size)
+                except OSError:  # tmpfs/overlay without fallocate: stay sparse
+                    pass
+            self._mm = mmap.mmap(self._fd, self.size)
+        except Exception:
+            os.close(self._fd)
+            raise
+        self._view = memoryview(self._mm).cast("d")
+        self._seq = 0
+        self._cursors = [[0, 0] for _ in self.tiers]
+        self._buckets: List[Optional[_Bucket]] = [None] * len(self.tiers)
+        self.last_ts = 0.0
+        if fresh:
+            _SCHEMA_HEAD.pack_into(self._mm, 0, MAGIC, VERSION, len(self._schema))
+            self._mm[_SCHEMA_HEAD.size:_SCHEMA_HEAD.size + len(self._schema)] = self._schema
+            self._commit()
+            self._commit()
+        else:
+            self._load_header()
+
+    def _schema_matches(self) -> bool:
+        size = os.fstat(self._fd).st_size
+        if size != self.size:
+            if size:
+                logger.warning(f"{self.path}: schema changed, starting a new history")
+            return False
+        head = os.pread(self._fd, SCHEMA_SIZE, 0)
+        magic, version, length = _SCHEMA_HEAD.unpack_from(head)
+        if (magic, version) != (MAGIC, VERSION) or head[_SCHEMA_HEAD.size:_SCHEMA_HEAD.size + length] != self._schema:
+            logger.warning(f"{self.path}: schema changed, starting a new history")
+            return False
+        return True
+
+    # --- Header slots ---------------------------------------------------
+
+    def _slot_payload(self) -> bytes:
+        parts = [_CURSOR.pack(*cursor) for cursor in self._cursors]
+        n = len(self.fields)
+        for bucket in self._buckets[1:]:
+            if bucket is None:
+                parts.append(_BUCKET.pack(0.0, 0) + self._sums.pack(*[0.0] * (2 * n)))
+            else:
+                parts.append(_BUCKET.pack(bucket.start, bucket.count) + self._sums.pack(*bucket.sums, *bucket.maxes))
+        return b"".join(parts)
+
+    def _commit(self) -> None:
+        self._seq += 1
+        payload = self._slot_payload()
+        offset = SCHEMA_SIZE + (self._seq % 2) * SLOT_SIZE
+        crc = zlib.crc32(struct.pack("<Qd", self._seq, self.last_ts) + payload)
+        self._mm[offset + _SLOT_HEAD.size:offset + _SLOT_HEAD.size + len(payload)] = payload
+        _SLOT_HEAD.pack_into(self._mm, offset, self._seq, self.last_ts, crc)
+
+    def _load_header(self) -> None:
+        best = None
+        size = self._slot_size
+        for slot in (0, 1):
+            offset = SCHEMA_SIZE + slot * SLOT_SIZE
+            seq, last_ts, crc = _SLOT_HEAD.unpack_from(self._mm, offset)
+            payload = bytes(self._mm[offset + _SLOT_HEAD.size:offset + _SLOT_HEAD.size + size])
+            if zlib.crc32(struct.pack("<Qd", seq, last_ts) + payload) != crc:
+                continue
+            if best is None or seq > best[0]:
+                best = (seq, last_ts, payload)
+        if best is None:
+            logger.warning(f"{self.path}: no valid header, starting a new history")
+            self._commit()
+            self._commit()
+            return
+        self._seq, self.last_ts, payload = best
+        self._cursors = [list(_CURSOR.unpack_from(payload, i * _CURSOR.size)) for i in range(len(self.tiers))]
+        n = len(self.fields)
+        offset = len(self.tiers) * _CURSOR.size
+        for tier in range(1, len(self.tiers)):
+            start, count = _BUCKET.unpack_from(payload, offset)
+            if count:
+                values = self._sums.unpack_from(payload, offset + _BUCKET.size)
+                bucket = self._buckets[tier] = _Bucket(start, n)
+                bucket.count, bucket.sums, bucket.maxes = count, list(values[:n]), list(values[n:])
+            offset += _BUCKET.size + self._sums.size
+
+    # --- Writes ---------------------------------------------------------
+
+    def _write(self, tier: int, record: Sequence[float]) -> None:
+        cursor = self._cursors[tier]
+        capacity = self.tiers[tier].capacity
+        self._records[tier].pack_into(self._mm, (self._offsets[tier] + cursor[0] * self.widths[tier]) * 8, *record)
+        cursor[0] = (cursor[0] + 1) % capacity
+        cursor[1] = min(cursor[1] + 1, capacity)
+
+    def append(self, values: Sequence[float], ts: Optional[float] = None) -> None:
+        """Add one sample (in field order); feeds the downsampled tiers too."""
+        ts = time.time() if ts is None else ts
+        ts = max(ts, self.last_ts)  # keep each tier ordered if the clock steps back
+        n = len(self.fields)
+        self._write(0, (ts, *values))
+        for tier in range(1, len(self.tiers)):
+            step = self.tiers[tier].step_s
+            start = ts - ts % step
+            bucket = self._buckets[tier]
+            if bucket is not None and bucket.start != start:
+                self._write(tier, (bucket.start, *(s / bucket.count for s in bucket.sums), *bucket.maxes))
+                bucket = None
+            if bucket is None:
+                bucket = self._buckets[tier] = _Bucket(start, n)
+            bucket.count += 1
+            for i, value in enumerate(values):
+                bucket.sums[i] += value
+                if value > bucket.maxes[i]:
+                    bucket.maxes[i] = value
+        self.last_ts = ts
+        self._commit()
+
+    # --- Reads ----------------------------------------------------------
+
+    def tier_index(self, step_s: float) -> int:
+        for i, tier in enumerate(self.tiers):
+            if tier.step_s == step_s:
+                return i
+        raise ValueError(f"No tier with step {step_s}s (have {[t.step_s for t in self.tiers]})")
+
+    def names(self, tier: int) -> List[str]:
+        if tier == 0:
+            return list(self.fields)
+        return [f"{f}_mean" for f in self.fields] + [f"{f}_max" for f in self.fields]
+
+    def range(self, since: Optional[float] = None, until: Optional[float] = None, tier: int = 0) -> Range:
+        """Records of a tier with since <= timestamp <= until, oldest first."""
+        head, count = self._cursors[tier]
+        capacity, width = self.tiers[tier].capacity, self.widths[tier]
+        oldest = (head - count) % capacity
+        index = _TimestampIndex(self._view, self._offsets[tier], width, capacity, oldest, count)
+        lo = 0 if since is None else bisect_left(index, since)
+        hi = count if until is None else bisect_right(index, until)
+        segments = []
+        start = (oldest + lo) % capacity
+        remaining = hi - lo
+        while remaining > 0:
+            run = min(remaining, capacity - start)
+            base = self._offsets[tier] + start * width
+            segments.append(self._view[base:base + run * width])
+            remaining -= run
+            start = 0
+        return Range(self.names(tier), width, segments)
+
+    def stats(self) -> Dict:
+        return {
+            "path": self.path,
+            "bytes": self.size,
+            "last_ts": self.last_ts,
+            "tiers": [{"step_s": t.step_s, "capacity": t.capacity, "records": c[1]}
+                      for t, c in zip(self.tiers, self._cursors)],
+        }
+
+    def flush(self) -> None:
+        self._mm.flush()
+
+    def close(self) -> None:
+        if self._mm.closed:
+            return
+        self.flush()
+        self._view.release()
+        self._mm.close()
+        os.close(self._fd)
+
+
+def open_series(directory: Optional[str], name: str, fields: Sequence[str],
+                tiers: Sequence[Tier]) -> Optional[TimeSeries]:
+    """
+    <directory>/<name>.tsdb, or None (history disabled) when directory is
+    unset or unusable, so a monitor keeps working without a writable volume.
+    """
+    if not directory:
+        return None
+    try:
+        os.makedirs(directory, exist_ok=True)
+        return TimeSeries(os.path.join(directory, f"{name}.tsdb"), fields, tiers)
+    except OSError as e:
+        logger.warning(f"History for {name} disabled: {e}")
+        return None
+
+
+def query(series: TimeSeries, since: Optional[float] = None, until: Optional[float] = None,
+          step_s: float = 0) -> Dict:
+    """JSON-ready range of the tier with this step (0 = raw samples)."""
+    with series.range(since, until, series.tier_index(step_s)) as records:
+        return {"step_s": step_s, "count": len(records), **records.to_dict()}
+
+
+SampleFn = Callable[[], Union[Optional[Sequence[float]], Awaitable[Optional[Sequence[float]]]]]
+
+
+@asynccontextmanager
+async def recording(name: str, fields: Sequence[str], sample: SampleFn,
+                    interval_s: float) -> AsyncIterator[Optional[TimeSeries]]:
+    """
+    For a lifespan: call sample() every interval_s on the shared scheduler
+    and append what it returns (values in field order, or None to skip) to
+    <HISTORY_DIR>/<name>.tsdb. A sample that blocks should offload its own
+    reads; the append happens on the loop, so readers on the loop never see
+    a half-written record. When history is disabled this yields None and
+    sample() still runs, since it may feed other consumers (alert rules).
+    """
+    series = open_series(os.getenv("HISTORY_DIR", DEFAULT_DIR), name, fields, default_tiers(interval_s))
+
+    async def record():
+        values = sample()
+        if asyncio.iscoroutine(values):
+            values = await values
+        if values is not None and series is not None:
+            series.append(values)
+
+    sampling = scheduler.default()
+    sampling.start()
+    job = sampling.every(interval_s, record, name=f"{name}-sample")
+    try:
+        yield series
+    finally:
+        job.cancel()
+        await sampling.stop()
+        if series is not None:
+            series.close()